@@ -0,0 +1,34 @@
+'''
+This benchmark runs one caseload through BatchRunner with 1, 2, 4, ... worker
+processes (up to the number of CPUs) to show how the throughput scales.
+
+Run it from the repository root:
+    python -m benchmarks.bench_batch_runner
+'''
+from datetime import date
+import os
+import random
+from src.batch_runner import BatchRunner
+from src.defendant import Defendant
+from test.random_records import random_record
+
+def make_cases(count:int, size:int=12, seed:int=0):
+    '''This returns count random cases of about size convictions each.'''
+    rng = random.Random(seed)
+    defendant = Defendant("John", "Doe", date(1985, 1, 1))
+    return [ (defendant, tuple(random_record(rng, rng.randrange(size * 2))),
+            ()) for i in range(count) ]
+
+def main(count:int=200000, chunksize:int=1000):
+    cases = make_cases(count)
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        runner = BatchRunner(workers=workers, chunksize=chunksize)
+        for report in runner.run(cases):
+            pass
+        print(f"{workers:>3} workers: {runner.stats.per_second:>10,.0f} \
+defendants/s")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+'''
+This benchmark compares the memory and construction time of the slotted Charge
+against the Charge it replaced (BaselineCharge below, copied from the baseline
+src/charge.py: a per-instance __dict__, the list of valid classes rebuilt for
+every charge, and six setter calls).
+
+Run it from the repository root:
+    python -m benchmarks.bench_charge
+'''
+from datetime import date
+import timeit
+import tracemalloc
+from src.charge import Charge
+
+class BaselineCharge:
+    '''This is the baseline Charge, as far as construction goes: its
+    __init__, setters, and validate_date, unchanged.'''
+    def __init__(self, crime:str, crime_class:str, offense_date, 
+    conviction_date, conviction_loc:str, statute:str):
+        self._valid_classes = [ "Infraction", "Class 3 Misdemeanor", 
+        "Class 2 Misdemeanor", "Class 1 Misdemeanor", "Class A1 Misdemeanor", 
+        "Class I Felony", "Class H Felony", "Class G Felony", "Class F Felony", 
+        "Class E Felony", "Class D Felony", "Class C Felony", "Class B1 Felony",
+                        "Class B2 Felony", "Class A Felony" ]
+        self.set_crime(crime)
+        self.set_crime_class(crime_class)
+        self.set_offense_date(offense_date)
+        self.set_conviction_date(conviction_date)
+        self.set_conviction_loc(conviction_loc)
+        self.set_statute(statute)
+
+    def set_crime_class(self, crime_class:str):
+        if crime_class in self._valid_classes:
+            self._crime_class = crime_class
+        else:
+            raise ValueError(f"The crime class is not a valid crime class. \
+Valid Crime classes are {str(self._valid_classes)}.")
+
+    def validate_date(self, input_date):
+        if type(input_date) == date:
+            return True
+        else:
+            raise ValueError("The dates of conviction and offense must be a \
+valid datetime date objects. conviction_date may be None if charge still \
+pending.")
+
+    def set_offense_date(self, offense_date):
+        if self.validate_date(offense_date):
+            self._offense_date = offense_date
+
+    def set_conviction_date(self, conviction_date):
+        if conviction_date == None:
+            self._conviction_date = None
+        elif self.validate_date(conviction_date):
+            self._conviction_date = conviction_date
+
+    def set_crime(self, crime:str):
+        if type(crime) == str and len(crime) > 0:
+            self._crime = crime[:50]
+        else:
+            raise ValueError("A crime should be a string of non-zero \
+length (up to 50 chars).")
+
+    def set_conviction_loc(self, conviction_loc:str):
+        if type(conviction_loc) == str and len(conviction_loc) > 0:
+            self._conviction_loc = conviction_loc[:50]
+        else:
+            raise ValueError("A conviction location value should be a string \
+of non-zero length (up to 50 chars).")
+
+    def set_statute(self, statute:str):
+        if type(statute) == str and len(statute) > 0:
+            self._statute = statute[:50]
+        else:
+            raise ValueError("The Statute should be a string valud between 1 \
+and 50 characters.")
+
+ARGS = ( "Larceny", "Class H Felony", date(2015, 1, 1), date(2016, 1, 1),
+        "Randolph County", "14-72" )
+
+def bytes_per_object(cls, count:int):
+    '''This returns the average number of bytes allocated per instance when
+    count instances are held in memory at once.'''
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [ cls(*ARGS) for i in range(count) ]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (after - before) / count
+
+def constructions_per_second(cls, count:int, repeat:int=5):
+    '''This returns how many instances can be constructed per second (the
+    best of repeat runs, since the timings are noisy).'''
+    seconds = min(timeit.repeat(lambda: cls(*ARGS), number=count,
+                                repeat=repeat))
+    return count / seconds
+
+def rows_per_second(count:int, repeat:int=5):
+    '''This returns how many rows per second Charge() in a loop and the 
+    validating Charge.from_rows can build (the best of repeat runs).'''
+    rows = [ ARGS ] * count
+    loop = min(timeit.repeat(lambda: [ Charge(*row) for row in rows ],
+                             number=1, repeat=repeat))
+    bulk = min(timeit.repeat(lambda: Charge.from_rows(rows), number=1,
+                             repeat=repeat))
+    return count / loop, count / bulk
+
+def main(count:int=100000, rows:int=200000):
+    for cls in (BaselineCharge, Charge):
+        print(f"{cls.__name__:>14}: {bytes_per_object(cls, count):8.1f} \
+bytes/object, {constructions_per_second(cls, count):12,.0f} objects/second")
+    loop, bulk = rows_per_second(rows)
+    print(f"{'Charge() loop':>14}: {loop:12,.0f} rows/second")
+    print(f"{'from_rows':>14}: {bulk:12,.0f} rows/second")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+'''
+This benchmark times Felony_RecordMachine on records from 1,000 to 100,000
+convictions, each on its own conviction date, to show that the engine scales
+linearly (the time per conviction should stay flat).
+
+Run it from the repository root:
+    python -m benchmarks.bench_felony_engine
+'''
+from datetime import date, timedelta
+import random
+import timeit
+from src.charge import Charge
+from src.crime_class import CRIME_CLASSES
+from src.felony_record_statemachine import Felony_RecordMachine
+
+def make_record(size:int, seed:int=0):
+    '''This returns size convictions with random classes and statutes, each
+    on a different conviction date.'''
+    rng = random.Random(seed)
+    start = date(1900, 1, 1)
+    rows = [ ("Crime", rng.choice(CRIME_CLASSES), start + timedelta(days=i),
+            start + timedelta(days=i), "Randolph County",
+            rng.choice(("14-72", "20-28(a1)", "20-138.1", "90-95(d)(2)")))
+            for i in range(size) ]
+    return Charge.from_rows(rows, trusted=True).charges
+
+def run(record):
+    machine = Felony_RecordMachine()
+    machine.on_event(record)
+    return machine.points
+
+def main(sizes=(1000, 10000, 100000), repeat:int=5):
+    for size in sizes:
+        record = make_record(size)
+        seconds = min(timeit.repeat(lambda: run(record), number=1,
+                                    repeat=repeat))
+        print(f"{size:>8} convictions: {seconds * 1000:9.2f} ms, \
+{seconds / size * 1e9:7.1f} ns/conviction")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+'''
+This benchmark times the three record machines run back to back (as Runner
+does) against the fused run_record kernel, on records from 1,000 to 100,000
+convictions.
+
+Run it from the repository root:
+    python -m benchmarks.bench_record_kernel
+'''
+from datetime import date, timedelta
+import random
+import timeit
+from src.charge import Charge
+from src.crime_class import CRIME_CLASSES
+from src.felony_record_statemachine import Felony_RecordMachine
+from src.habitual_machine import HabitualMachine
+from src.misdemeanor_recordmachine import MisdemeanorRecordMachine
+from src.record_kernel import run_record
+
+BIRTHDATE = date(1900, 1, 1)
+
+def make_record(size:int, seed:int=0):
+    '''This returns size convictions with random classes and statutes, with a
+    few convictions on each conviction date.'''
+    rng = random.Random(seed)
+    start = date(1920, 1, 1)
+    rows = []
+    for i in range(size):
+        convicted = start + timedelta(days=i // 3)
+        rows.append(("Crime", rng.choice(CRIME_CLASSES),
+                    convicted - timedelta(days=rng.randrange(400)), convicted,
+                    "Randolph County", rng.choice(("14-72", "14-7.31",
+                    "20-28(a1)", "20-138.1", "90-95(d)(2)"))))
+    return tuple(Charge.from_rows(rows, trusted=True).charges)
+
+def run_machines(record):
+    misdemeanor = MisdemeanorRecordMachine()
+    misdemeanor.on_event(record)
+    felony = Felony_RecordMachine()
+    felony.on_event(record)
+    habitual = HabitualMachine()
+    habitual.on_event(record, BIRTHDATE)
+    return misdemeanor.points, felony.points, habitual.date_eligible
+
+def main(sizes=(1000, 10000, 100000), repeat:int=5):
+    for size in sizes:
+        record = make_record(size)
+        machines = min(timeit.repeat(lambda: run_machines(record), number=1,
+                                        repeat=repeat))
+        kernel = min(timeit.repeat(lambda: run_record(record, BIRTHDATE),
+                                    number=1, repeat=repeat))
+        print(f"{size:>8} convictions: machines {machines * 1000:9.2f} ms, \
+kernel {kernel * 1000:9.2f} ms, {machines / kernel:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+'''
+This benchmark calls RecordRunner.run over many small records, the way a
+batch job would, and reports the throughput in records per second.
+
+Run it from the repository root:
+    python -m benchmarks.bench_record_runner
+'''
+from datetime import date
+import random
+import time
+from src.defendant import Defendant
+from src.run_all_records import RecordRunner
+from test.random_records import random_record
+
+def make_records(count:int, size:int=12, seed:int=0):
+    '''This returns count random records of about size convictions each.'''
+    rng = random.Random(seed)
+    return [ tuple(random_record(rng, rng.randrange(size * 2))) \
+        for i in range(count) ]
+
+def main(count:int=100000):
+    defendant = Defendant("John", "Doe", date(1985, 1, 1))
+    records = make_records(count)
+    runner = RecordRunner()
+    started = time.perf_counter()
+    for record in records:
+        runner.run(defendant, record)
+    seconds = time.perf_counter() - started
+    print(f"{count} records in {seconds:.2f} s: {count / seconds:,.0f} \
+records/s")
+
+if __name__ == "__main__":
+    main()
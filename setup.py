@@ -7,9 +7,15 @@ setup (
     name='criminal_records_nc',
     version='0.0.1',
     description='This is a set of tools for calculating NC criminal records (intended for attorneys only).',
-    py_modules=[    "felony_record_statemachine", "charge", "defendant", "dumbwaiter", "habitual_machine", "felony_punishments", "defendant_maker", "pending_maker"
-                    "record_maker", "misdemeanor_recordmachine", "misdemeanor_punishments", "run_all_records"],
+    py_modules=[    "felony_record_statemachine", "charge", "defendant", "dumbwaiter", "habitual_machine", "felony_punishments", "defendant_maker", "pending_maker",
+                    "record_maker", "misdemeanor_recordmachine", "misdemeanor_punishments", "run_all_records", "crime_class",
+                    "charge_table", "statute", "charge_collection",
+                    "record_kernel", "batch_runner", "csv_ingest",
+                    "jsonl_interface", "record_store",
+                    "record_cache", "incremental_record",
+                    "record_timeline"],
     package_dir={'':'src'}, 
+    extras_require={'batch': ['numpy']},
     long_description=long_description,
     long_description_content_type="text/markdown",
     classifiers=[
@@ -0,0 +1,181 @@
+'''
+This module runs the records of a whole caseload (IE: every defendant of an
+office overnight) across processes.
+
+BatchRunner takes cases, each a (defendant, convictions, pendings) tuple,
+splits them into chunks of chunksize cases, and runs the chunks on a
+ProcessPoolExecutor with RecordRunner. Each worker process is set up once by
+_start_worker, which builds its RecordRunner and parses the statutes it is
+given (IE: the ones the caseload is known to repeat), so they are in the
+worker's statute cache before the first case.
+
+Passing data between processes costs far more than running a record, so
+BatchRunner keeps it small: a chunk of cases goes to a worker at a time, each
+charge goes as a tuple of its values with its dates as day ordinals (which
+pickle much faster than Charge and date objects), and a worker sends back only
+the figures of each report and the positions of the habitual convictions and
+pendings. The reports are put back together with the caller's own objects.
+
+The reports stream back from BatchRunner.run in the order of the cases
+(ordered=True), or chunk by chunk as the workers finish them (ordered=False).
+Only a window of chunks (two per worker) is in flight at a time: the cases are
+read, and the next chunk sent, as the reports of earlier chunks are yielded,
+so a run over a large extract (IE: from csv_ingest.read_cases) holds a few
+chunks in memory rather than the whole caseload. BatchRunner.stats has the
+throughput of the run so far.
+'''
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+from itertools import islice
+import os
+import time
+from src.charge import Charge
+from src.run_all_records import RecordReport, RecordRunner
+from src.statute import parse_statute
+
+class BatchStats(namedtuple("BatchStats", [ "defendants", "convictions",
+                                            "seconds" ])):
+    '''The throughput of a BatchRunner run: how many defendants and
+    convictions have been run, and in how many seconds.'''
+    __slots__ = ()
+
+    @property
+    def per_second(self):
+        '''This returns the defendants run per second.'''
+        return self.defendants / self.seconds if self.seconds else 0.0
+
+# The figures of a RecordReport that a worker sends back, by name
+_FIGURES = ( "misdemeanor_points", "misdemeanor_level", "felony_points",
+            "felony_level", "hab_eligible", "date_eligible" )
+
+_RUNNER = None                          # the RecordRunner of a worker process
+
+def _start_worker(statutes=()):
+    '''This sets up a worker process: it builds the worker's RecordRunner and
+    parses statutes, so the worker's first cases find them already in the
+    statute cache.'''
+    global _RUNNER
+    _RUNNER = RecordRunner()
+    for statute in statutes:
+        parse_statute(statute)
+
+def _pack(charge):
+    '''This returns the values of a charge as a tuple to send to a worker, 
+    with its dates as day ordinals (0 for no conviction date).'''
+    crime, crime_class, offense_date, conviction_date, conviction_loc, \
+        statute = charge.key()
+    return ( crime, crime_class, offense_date.toordinal(), 
+            conviction_date.toordinal() if conviction_date else 0, 
+            conviction_loc, statute )
+
+def _unpack(row):
+    '''This makes a charge back from the tuple _pack returned.'''
+    crime, crime_class, offense_day, conviction_day, conviction_loc, \
+        statute = row
+    return Charge._from_valid(crime, crime_class, date.fromordinal(offense_day),
+        date.fromordinal(conviction_day) if conviction_day else None, 
+        conviction_loc, statute)
+
+def _positions(chosen, charges):
+    '''This returns the positions in charges of the chosen charges.'''
+    position = { id(charge): i for i, charge in enumerate(charges) }
+    return tuple( position[id(charge)] for charge in chosen )
+
+def _run_chunk(packed_cases):
+    '''This runs a chunk of packed cases in a worker process. It returns, for 
+    each case, the figures of its report and the positions of its habitual 
+    convictions and habitual pendings.'''
+    if _RUNNER is None:
+        _start_worker()
+    results = []
+    for defendant, convictions, pendings in packed_cases:
+        convictions = [ _unpack(row) for row in convictions ]
+        pendings = [ _unpack(row) for row in pendings ]
+        report = _RUNNER.run(defendant, convictions, pendings)
+        results.append(( tuple( getattr(report, name) for name in _FIGURES ),
+            _positions(report.habitual_convictions, convictions),
+            _positions(report.habitual_pendings, pendings) ))
+    return results
+
+def _report(case, result):
+    '''This puts the RecordReport of a case back together from what the 
+    worker returned.'''
+    defendant, convictions, pendings = case
+    figures, habitual_convictions, habitual_pendings = result
+    return RecordReport(defendant, convictions, pendings,
+        **dict(zip(_FIGURES, figures)),
+        habitual_convictions=tuple( convictions[i] for i in \
+            habitual_convictions ),
+        habitual_pendings=tuple( pendings[i] for i in habitual_pendings ))
+
+def _chunks(cases, chunksize:int):
+    '''This splits the cases (any iterable) into lists of chunksize cases.'''
+    cases = iter(cases)
+    chunk = list(islice(cases, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(islice(cases, chunksize))
+
+class BatchRunner:
+    '''BatchRunner runs many defendants' records on a pool of worker
+    processes. workers is the number of processes (None means one per CPU),
+    chunksize is the number of cases sent to a worker at a time, and statutes
+    are statutes for each worker to parse when it starts.'''
+
+    def __init__(self, workers=None, chunksize:int=256, ordered:bool=True,
+    statutes=()):
+        if workers is not None and (type(workers) != int or workers < 1):
+            raise ValueError("The number of workers must be a positive int.")
+        if type(chunksize) != int or chunksize < 1:
+            raise ValueError("The chunksize must be a positive int.")
+        self.workers = workers
+        self.chunksize = chunksize
+        self.ordered = ordered
+        self.statutes = tuple(statutes)
+        self.stats = BatchStats(0, 0, 0.0)
+
+    def run(self, cases):
+        '''This takes an iterable of (defendant, convictions, pendings) cases
+        and yields a RecordReport for each. The cases are read a chunk at a
+        time, with at most two chunks per worker in flight, and each chunk is
+        let go once its reports are yielded. stats is updated as the reports
+        come back.'''
+        started = time.perf_counter()
+        self.stats = BatchStats(0, 0, 0.0)
+        window = 2 * (self.workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=self.workers,
+            initializer=_start_worker, initargs=(self.statutes,)) as pool:
+            in_flight = {}              # future: its chunk, in sent order
+            for chunk in _chunks(cases, self.chunksize):
+                chunk = [ (defendant, tuple(convictions), tuple(pendings)) \
+                    for defendant, convictions, pendings in chunk ]
+                packed = [ (defendant, [ _pack(c) for c in convictions ], 
+                            [ _pack(p) for p in pendings ]) \
+                            for defendant, convictions, pendings in chunk ]
+                in_flight[pool.submit(_run_chunk, packed)] = chunk
+                if len(in_flight) >= window:
+                    yield from self._collect(in_flight, started)
+            while in_flight:
+                yield from self._collect(in_flight, started)
+
+    def _collect(self, in_flight:dict, started:float):
+        '''This waits for the next chunk (the oldest if ordered, otherwise the
+        first to finish), drops it from in_flight, updates stats, and returns
+        its reports.'''
+        if self.ordered:
+            future = next(iter(in_flight))
+        else:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            future = next(iter(done))
+        chunk = in_flight.pop(future)
+        reports = [ _report(case, result) for case, result in \
+            zip(chunk, future.result()) ]
+        self.stats = BatchStats(self.stats.defendants + len(reports),
+            self.stats.convictions + sum( len(report.convictions) \
+            for report in reports ), time.perf_counter() - started)
+        return reports
+
+    def run_all(self, cases):
+        '''This runs every case and returns the list of reports.'''
+        return list(self.run(cases))
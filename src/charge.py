@@ -1,31 +1,115 @@
 from datetime import date, datetime, timedelta
 import typing
+from collections import namedtuple
+from collections.abc import Sequence
+from src.crime_class import CrimeClass, CRIME_CLASSES, _BY_LABEL, _CLASS_ERROR
+from src.statute import parse_statute
+
+# The fields of a charge, in the order Charge() and Charge.from_rows() take them
+FIELDS = (  "crime", "crime_class", "offense_date", "conviction_date", 
+            "conviction_loc", "statute" )
+
+_DATE_ERROR = "The dates of conviction and offense must be a valid datetime \
+date objects. conviction_date may be None if charge still pending."
+_CRIME_ERROR = "A crime should be a string of non-zero length (up to 50 chars)."
+_LOCATION_ERROR = "A conviction location value should be a string of non-zero \
+length (up to 50 chars)."
+_STATUTE_ERROR = "The Statute should be a string valud between 1 and 50 \
+characters."
+_UNCONVICTED_ERROR = "Only charges with a conviction date may be counted as \
+convictions. A charge with no conviction date is still pending."
+_ROW_ERROR = f"A row should have {len(FIELDS)} values."
 
 class Charge:
     '''This class should serve as both a pending charge (conviction_date is 
-    None) and a conviction (has conviction date as datetime date object).'''
+    None) and a conviction (has conviction date as datetime date object).
+    Charges are slotted (no per-instance __dict__) so that loading a large 
+    record stays cheap. The crime class is held as a shared CrimeClass 
+    member.
+
+    Charges compare by identity, because two charges can hold identical data 
+    and still be separate counts. Use key() to compare, hash, or count charges 
+    by value.'''
+    __slots__ = (   "_crime", "_classification", "_offense_date", 
+                    "_conviction_date", "_conviction_loc", "_statute", 
+                    "_parsed_statute" )
+    _valid_classes = CRIME_CLASSES
+
     def __init__(self, crime:str, crime_class:str, offense_date, 
     conviction_date, conviction_loc:str, statute:str):
-        self._valid_classes = [ "Infraction", "Class 3 Misdemeanor", 
-        "Class 2 Misdemeanor", "Class 1 Misdemeanor", "Class A1 Misdemeanor", 
-        "Class I Felony", "Class H Felony", "Class G Felony", "Class F Felony", 
-        "Class E Felony", "Class D Felony", "Class C Felony", "Class B1 Felony",
-                        "Class B2 Felony", "Class A Felony" ]
-        self.set_crime(crime)
-        self.set_crime_class(crime_class)
-        self.set_offense_date(offense_date)
-        self.set_conviction_date(conviction_date)
-        self.set_conviction_loc(conviction_loc)
-        self.set_statute(statute)
+        '''This validates the fields in the same order, and with the same 
+        errors, as the setters, but checks them inline: building a charge is 
+        the hot path of loading a record, and six setter calls cost more than 
+        the checks themselves.'''
+        if type(crime) != str or crime == "":
+            raise ValueError(_CRIME_ERROR)
+        classification = _BY_LABEL.get(crime_class) if \
+            type(crime_class) == str else None
+        if classification is None:
+            raise ValueError(_CLASS_ERROR)
+        if type(offense_date) != date or (conviction_date is not None and \
+            type(conviction_date) != date):
+            raise ValueError(_DATE_ERROR)
+        if type(conviction_loc) != str or conviction_loc == "":
+            raise ValueError(_LOCATION_ERROR)
+        if type(statute) != str or statute == "":
+            raise ValueError(_STATUTE_ERROR)
+        self._crime = crime[:50]
+        self._classification = classification
+        self._offense_date = offense_date
+        self._conviction_date = conviction_date
+        self._conviction_loc = conviction_loc[:50]
+        self._statute = statute = statute[:50]
+        self._parsed_statute = parse_statute(statute)
+
+    @classmethod
+    def from_rows(cls, rows, trusted:bool=False):
+        '''This builds many charges at once from rows of values in FIELDS 
+        order (the same order as Charge()) and returns a ChargeBatch. Each row 
+        goes straight to Charge(), which checks its fields inline, so a clean 
+        batch costs the same as a loop over Charge(). If any row is rejected, 
+        the batch is built again row by row, and each rejected row (including 
+        one that is not a sequence of len(FIELDS) values) is reported in 
+        ChargeBatch.errors as one RowError per bad field instead of raising. If trusted is True (the rows were 
+        already validated, IE: at ingest), validation is skipped entirely.'''
+        rows = rows if type(rows) == list else list(rows)
+        if trusted:
+            charges = [ cls._from_valid(*row) for row in rows ]
+            return ChargeBatch(charges, list(range(len(rows))), [])
+        try:
+            charges = [ cls(*row) for row in rows ]
+            return ChargeBatch(charges, list(range(len(rows))), [])
+        except (TypeError, ValueError):
+            pass
+        charges, good, errors = [], [], []
+        add, keep = charges.append, good.append
+        for i, row in enumerate(rows):
+            try:
+                add(cls(*row))
+                keep(i)
+            except (TypeError, ValueError):
+                errors.extend(_row_errors(i, row))
+        return ChargeBatch(charges, good, errors)
+
+    @classmethod
+    def _from_valid(cls, crime:str, crime_class:str, offense_date, 
+    conviction_date, conviction_loc:str, statute:str):
+        '''This makes a charge from values that are already known to be 
+        valid, without running the setters.'''
+        charge = cls.__new__(cls)
+        charge._crime = crime[:50]
+        charge._classification = _BY_LABEL[crime_class]
+        charge._offense_date = offense_date
+        charge._conviction_date = conviction_date
+        charge._conviction_loc = conviction_loc[:50]
+        charge._statute = statute[:50]
+        charge._parsed_statute = parse_statute(charge._statute)
+        return charge
 
     def set_crime_class(self, crime_class:str):
-        '''This should validate a crime_class from a list of valid 
-        crime_classes.'''
-        if crime_class in self._valid_classes:
-            self._crime_class = crime_class
-        else:
-            raise ValueError(f"The crime class is not a valid crime class. \
-Valid Crime classes are {str(self._valid_classes)}.")
+        '''This should validate a crime_class from the table of valid 
+        crime_classes and store its CrimeClass member.'''
+        self._classification = CrimeClass.from_label(crime_class)
 
     def validate_contiguous_str(self, s:str):
         '''This method validates that the input is a string of non-zero length 
@@ -36,11 +120,27 @@ Valid Crime classes are {str(self._valid_classes)}.")
             raise ValueError("The value failed to validate. It should be a \
 string of non-zero length with no whitespace.")
 
+    @property
+    def _crime_class(self):
+        '''This returns the name of the crime class from its CrimeClass member.'''
+        return self._classification.label
+
     @property
     def crime_class(self):
         '''This returns the _crime_class value when crime_class is 
         dereferenced.'''
-        return self._crime_class
+        return self._classification.label
+
+    @property
+    def classification(self):
+        '''This returns the CrimeClass member for the crime class.'''
+        return self._classification
+
+    @property
+    def class_ordinal(self):
+        '''This returns the severity ordinal of the crime class (0 for an 
+        infraction up to 14 for a Class A Felony).'''
+        return self._classification.severity
 
     @crime_class.setter
     def crime_class(self, crime_class:str):
@@ -52,9 +152,7 @@ string of non-zero length with no whitespace.")
         if type(input_date) == date:
             return True
         else:
-            raise ValueError("The dates of conviction and offense must be a \
-valid datetime date objects. conviction_date may be None if charge still \
-pending.")
+            raise ValueError(_DATE_ERROR)
 
     def set_offense_date(self, offense_date):
         '''This validates the offense_date is a datetime date object, or \
@@ -93,8 +191,7 @@ raises a ValueError with an appropriate message'''
         if type(crime) == str and len(crime) > 0:
             self._crime = crime[:50]
         else:
-            raise ValueError("A crime should be a string of non-zero \
-length (up to 50 chars).")
+            raise ValueError(_CRIME_ERROR)
 
     @property
     def crime(self):
@@ -110,8 +207,7 @@ length (up to 50 chars).")
         if type(conviction_loc) == str and len(conviction_loc) > 0:
             self._conviction_loc = conviction_loc[:50]
         else:
-            raise ValueError("A conviction location value should be a string \
-of non-zero length (up to 50 chars).")
+            raise ValueError(_LOCATION_ERROR)
     
     @property
     def conviction_loc(self):
@@ -124,9 +220,9 @@ of non-zero length (up to 50 chars).")
     def set_statute(self, statute:str):
         if type(statute) == str and len(statute) > 0:
             self._statute = statute[:50]
+            self._parsed_statute = parse_statute(self._statute)
         else:
-            raise ValueError("The Statute should be a string valud between 1 \
-and 50 characters.")
+            raise ValueError(_STATUTE_ERROR)
 
     @property
     def statute(self):
@@ -136,38 +232,106 @@ and 50 characters.")
     def statute(self, statute:str):
         self.set_statute(statute)
 
+    @property
+    def parsed_statute(self):
+        '''This returns the Statute parsed from the statute when it was set.'''
+        return self._parsed_statute
+
+    @property
+    def felony_record_points(self):
+        '''This returns the points the charge would add to a felony record if 
+        it were the highest conviction on its date: the points for its class, 
+        or 0 if its statute is excluded from felony records.'''
+        if self._parsed_statute.excluded_from_felony_record:
+            return 0
+        return self._classification.felony_points
+
     @property
     def is_felony(self):
         '''This returns true if the crime_class is a felony'''
-        eligible_felonies = {   'Class I Felony', 'Class H Felony', 
-        'Class G Felony', 'Class F Felony', 'Class E Felony','Class D Felony',
-        'Class C Felony', 'Class B2 Felony','Class B1 Felony', 'Class A Felony' 
-        }
-        if self.crime_class in eligible_felonies:
-            return True
-        else:
-            return False
+        return self._classification.is_felony
 
     @property
     def is_misdemeanor(self):
         '''This returns true if the crime_class is a misdemeanor'''
-        misdemeanors = {   'Class 3 Misdemeanor', 'Class 2 Misdemeanor', 
-        'Class 1 Misdemeanor', 'Class A1 Misdemeanor' }
-        if self.crime_class in misdemeanors:
-            return True
-        else:
-            return False
+        return self._classification.is_misdemeanor
     
     @property
     def is_infraction(self):
         '''This returns true if the crime_class is an infraction, else 
         false.'''
-        if self.crime_class == "Infraction":
-            return True
-        else:
-            return False
+        return self._classification.is_infraction
+
+    def key(self):
+        '''This returns a ChargeKey, an immutable and hashable fingerprint of 
+        the charge's values. Two counts of the same crime on the same day have 
+        equal keys, so counting keys (IE: with collections.Counter) keeps the 
+        number of counts.'''
+        return ChargeKey(   self._crime, self._classification.label, 
+                            self._offense_date, self._conviction_date, 
+                            self._conviction_loc, self._statute )
 
     def __str__(self):
         '''This returns the custom string for the class'''
-        return f"{self._crime[:10]}, {self._crime_class}, on offense date: \
+        return f"{self._crime[:10]}, {self.crime_class}, on offense date: \
 {self._offense_date}"
+
+
+def _is_record(convictions):
+    '''This returns True if convictions is a list of charges or another 
+    sequence of them (IE: a tuple or a ChargesView), as the record machines 
+    take.'''
+    return isinstance(convictions, Sequence) and not \
+        isinstance(convictions, str)
+
+ChargeKey = namedtuple("ChargeKey", FIELDS)
+ChargeKey.__doc__ = '''The values of a charge, in FIELDS order, as returned by 
+Charge.key().'''
+
+RowError = namedtuple("RowError", [ "row", "field", "reason" ])
+RowError.__doc__ = '''One problem with one row passed to Charge.from_rows(): the 
+row index, the name of the bad field, and the reason it failed.'''
+
+def _row_errors(row_index:int, row):
+    '''This returns a RowError for every bad field of a row Charge() 
+    rejected, in FIELDS order, or a single "row" error if it is not a 
+    sequence of len(FIELDS) values.'''
+    try:
+        crime, crime_class, offense_date, conviction_date, conviction_loc, \
+            statute = row
+    except (TypeError, ValueError):
+        return [ RowError(row_index, "row", _ROW_ERROR) ]
+    errors = []
+    if type(crime) != str or crime == "":
+        errors.append(RowError(row_index, "crime", _CRIME_ERROR))
+    if type(crime_class) != str or crime_class not in _BY_LABEL:
+        errors.append(RowError(row_index, "crime_class", _CLASS_ERROR))
+    if type(offense_date) != date:
+        errors.append(RowError(row_index, "offense_date", _DATE_ERROR))
+    if conviction_date is not None and type(conviction_date) != date:
+        errors.append(RowError(row_index, "conviction_date", _DATE_ERROR))
+    if type(conviction_loc) != str or conviction_loc == "":
+        errors.append(RowError(row_index, "conviction_loc", _LOCATION_ERROR))
+    if type(statute) != str or statute == "":
+        errors.append(RowError(row_index, "statute", _STATUTE_ERROR))
+    return errors
+
+class ChargeBatch:
+    '''This is the result of Charge.from_rows(). It holds the valid charges, 
+    the index of the source row of each charge (rows), and a RowError for each 
+    problem found in the rows that were left out (errors).'''
+    def __init__(self, charges:list, rows:list, errors:list):
+        self.charges = charges
+        self.rows = rows
+        self.errors = errors
+
+    @property
+    def ok(self):
+        '''This returns True if every row made a charge.'''
+        return self.errors == []
+
+    def __len__(self):
+        return len(self.charges)
+
+    def __iter__(self):
+        return iter(self.charges)
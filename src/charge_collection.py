@@ -1,110 +1,365 @@
 '''
-This is a custom data structure for getting all of the charges for a given D. 
+This is a custom data structure for getting all of the charges for a given D.
 A rewrite, it could clean up the fsms for analyzing pending
 charges and criminal records/points and habitual felon eligibility.
 
 It has a list for all of the pending charges, and add and remove functions.
+The charges are kept sorted as they are added (Pending_Charges by offense
+date, Charges_Convicted by conviction date and then offense date), using
+bisect, so an insert costs O(log n) comparisons and a date-range query is a
+binary search. The charges property returns a read-only ChargesView of the
+sorted charges rather than a copy, and a ChargesView can be passed straight
+to the record machines.
 
-Remember, a D can be charged more than once with crimes/charges having 
-identical data. IE: John Doe is charged with two counts of larceny on the 
+The charges view follows the collection as it changes. A range view (from a
+date query, or a slice of a view) holds positions in the sorted charges, so it
+is only good until the collection next changes: every add_charge and
+remove_charge raises the collection's version, and reading a range view made
+at an older version raises a ValueError rather than handing back the wrong
+charges. Copy a range view (IE: list(view)) to keep it.
+
+Remember, a D can be charged more than once with crimes/charges having
+identical data. IE: John Doe is charged with two counts of larceny on the
 same date, or
-Jane Doe is charged with resisting, delaying, and obstructing (or 
+Jane Doe is charged with resisting, delaying, and obstructing (or
 assaulting) two officers out of the same incident.
+
+Charges_Convicted also keeps a DateSummary for every conviction date (the
+highest class convicted that day, the felony record points the date is worth,
+and how many of its convictions count for a misdemeanor record), updated on
+each add_charge/remove_charge. Its felony_points and misdemeanor_points are
+running totals over those summaries, so no regrouping is needed to read them.
+
+A charge's dates, class, and statute should not be changed while it is in a
+collection, since its place and its date summary are worked out when it is
+added.
 '''
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+from datetime import date
 import typing
-from .charge import Charge
+from src.charge import Charge
+from src.felony_record_statemachine import FinishedState as FelonyFinished
+from src.misdemeanor_recordmachine import misdemeanor_level
+
+class ChargesView(Sequence):
+    '''This is a read-only window over the sorted charges of a collection,
+    from start up to (not including) stop. A stop of None means the end of
+    the collection. Slicing a view returns another view, without copying.
+
+    The whole view (start 0, stop None) follows the collection. Any other
+    view is stamped with the collection's version, and raises a ValueError
+    once the collection has changed.'''
+    __slots__ = ( "_collection", "_start", "_stop", "_version" )
+
+    def __init__(self, collection, start:int=0, stop=None):
+        self._collection = collection
+        self._start = start
+        self._stop = stop
+        self._version = None if start == 0 and stop is None else \
+            collection._version
+
+    def _bounds(self):
+        if self._version is not None and \
+            self._version != self._collection._version:
+            raise ValueError("This view is stale: its collection has changed \
+since the view was made.")
+        charges = self._collection._charges
+        stop = len(charges) if self._stop is None else self._stop
+        return self._start, max(self._start, stop)
+
+    def __len__(self):
+        start, stop = self._bounds()
+        return stop - start
+
+    def __getitem__(self, index):
+        start, stop = self._bounds()
+        if isinstance(index, slice):
+            first, last, step = index.indices(stop - start)
+            if step != 1:
+                return [ self[i] for i in range(first, last, step) ]
+            return ChargesView(self._collection, start + first,
+                                start + max(first, last))
+        if index < 0:
+            index += stop - start
+        if not 0 <= index < stop - start:
+            raise IndexError("ChargesView index out of range")
+        return self._collection._charges[start + index]
+
+    def __eq__(self, other):
+        if isinstance(other, (ChargesView, list, tuple)):
+            return len(self) == len(other) and all( mine is theirs or \
+                mine == theirs for mine, theirs in zip(self, other) )
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ChargesView({list(self)!r})"
 
 class Charge_Collection:
-    '''This is a class for making and storing pending charges. A 
-    Pending_Charges instance stores charges in the _pending list structure, and 
+    '''This is a class for making and storing pending charges. A
+    Pending_Charges instance stores charges in the _pending list structure, and
     creates
-    this list on initilaization. Pending_Charges has a method add_charge for 
+    this list on initilaization. Pending_Charges has a method add_charge for
     adding another pending charge to the private list structure (takes the charge
-    to be added as a param). It also has a remove_charge method for removing a 
-    given charge (takes the charge to be removed as a param). It also has an 
-    is_in method for determining if a given charge is in the _pendings (takes 
-    a charge as a param). The instance.pending property returns a COPY of the 
-    _pendings.'''
+    to be added as a param). It also has a remove_charge method for removing a
+    given charge (takes the charge to be removed as a param). It also has an
+    is_in method for determining if a given charge is in the _pendings (takes
+    a charge as a param). The instance.charges property returns a read-only
+    view of the _charges.
 
-    def __init__(self):
+    The base collection keeps charges in the order they were added.
+    Subclasses set the order by overriding _sort_key.'''
+
+    def __init__(self, charges=()):
         self._reset_charges()
+        for charge in charges:
+            self.add_charge(charge)
 
     def _reset_charges(self):
-        '''This sets _charges as an empty list.'''
+        '''This sets _charges as an empty list, with the parallel sorted list
+        of their keys.'''
         self._charges = []
-    
+        self._keys = []
+        self._key_of = {}       # id(charge): its key, for identity lookups
+        self._added = 0         # breaks ties so equal dates keep add order
+        self._version = 0       # raised on every change; see ChargesView
+
+    def _sort_key(self, charge):
+        '''This returns the leading part of the key the collection is sorted
+        by. The base collection keeps the order of adding.'''
+        return ()
+
     def add_charge(self, charge):
-        '''This adds a pending charge after validating that it is a charge 
-        object.'''
-        if Charge == type(charge):
-            self._charges.append(charge)
+        '''This adds a charge in its sorted place after validating that it is
+        a charge object. Adding the same charge object twice raises a 
+        ValueError (a second count should be its own Charge).'''
+        if Charge == type(charge) and id(charge) in self._key_of:
+            raise ValueError("This charge is already in _charges.")
+        elif Charge == type(charge):
+            key = self._sort_key(charge) + (self._added,)
+            self._added += 1
+            index = bisect_left(self._keys, key)
+            self._keys.insert(index, key)
+            self._charges.insert(index, charge)
+            self._key_of[id(charge)] = key
+            self._version += 1
         else:
             raise ValueError("Only valid Charge objects may be added to a \
 Defendant's charges.")
 
     def remove_charge(self, index):
-        '''This deletes a charge from the charges by index. There is no remove 
-        by value because there can be multiple identical charges (same data 
-        fields) for a given defendant. IE: John Doe is charged with two counts 
-        of larceny on the same date, or Jane Doe is charged with resisting, 
-        delaying, and obstructing (or assaulting) two officers out of the 
+        '''This deletes a charge from the charges by index. There is no remove
+        by value because there can be multiple identical charges (same data
+        fields) for a given defendant. IE: John Doe is charged with two counts
+        of larceny on the same date, or Jane Doe is charged with resisting,
+        delaying, and obstructing (or assaulting) two officers out of the
         same incident.'''
         try:
-            del self._charges[index]
+            charge = self._charges.pop(index)
         except:
             raise ValueError("This charge is not in _charges.")
+        del self._keys[index]
+        del self._key_of[id(charge)]
+        self._version += 1
+        return charge
+
+    def index_of(self, charge):
+        '''This returns the index of this very charge object (not just a charge
+        with the same data) in the sorted charges, found by binary search. It
+        raises a ValueError if the charge is not in the collection.'''
+        if id(charge) not in self._key_of:
+            raise ValueError("This charge is not in _charges.")
+        return bisect_left(self._keys, self._key_of[id(charge)])
 
     def is_in(self, charge):
         '''This returns True if the charge is present in _charges, and \
 otherwise False.'''
-        if charge in self.charges:
-            return True
-        else:
-            return False
+        return id(charge) in self._key_of
+
+    def __len__(self):
+        return len(self._charges)
+
+    def __iter__(self):
+        return iter(self._charges)
 
     @property
     def charges(self):
-        '''This returns a COPY of the _charges list, and not the actual list 
-        structure.'''
-        return self._charges.copy()
+        '''This returns a read-only ChargesView of the _charges list, and not
+        the actual list structure.'''
+        return ChargesView(self)
+
+    def _view(self, low_key, high_key=None):
+        '''This returns a view of the charges whose keys fall from low_key
+        (inclusive) to high_key (exclusive). None means unbounded. The view
+        is good until the collection next changes.'''
+        start = 0 if low_key is None else bisect_left(self._keys, low_key)
+        stop = len(self._keys) if high_key is None else \
+            bisect_left(self._keys, high_key)
+        return ChargesView(self, start, max(start, stop))
 
 class Pending_Charges(Charge_Collection):
-    '''This is the custom collection model for a defendant's convictions'''
-    def __init__(self):
-        super().__init__(self):
+    '''This is the custom collection model for a defendant's pending charges,
+    kept sorted by offense date.'''
+
+    def _sort_key(self, charge):
+        return (charge.offense_date.toordinal(),)
 
     def sort_byoffensedate(self):
-        '''This sorts the collection by the conviction dates of the charges 
-        from earliest to latest.'''
-        return self.charges.sort(key=lambda x: x.offense_date) 
+        '''This returns the charges sorted by offense date from earliest to
+        latest (the collection is always kept in this order).'''
+        return self.charges
 
-class Charges_Convicted(Charge_Collection):
-    '''This is the custom collection model for a defendant's convictions'''
+    def offended_before(self, offense_date):
+        '''This returns a view of the pending charges with an offense date
+        before offense_date.'''
+        return self._view(None, (offense_date.toordinal(),))
+
+    def offended_after(self, offense_date):
+        '''This returns a view of the pending charges with an offense date
+        after offense_date.'''
+        return self._view((offense_date.toordinal() + 1,))
+
+class DateSummary:
+    '''This summarizes the convictions on one conviction date: how many 
+    there are, the highest crime class among them, the felony record points 
+    the date is worth (only the highest eligible conviction counts), and how 
+    many of them count for a misdemeanor record.'''
+    __slots__ = ( "count", "highest_class", "felony_points", 
+                  "misdemeanor_count" )
 
     def __init__(self):
-        super().__init__(self):
+        self.count = 0
+        self.highest_class = None
+        self.felony_points = 0
+        self.misdemeanor_count = 0
+
+    def add(self, charge):
+        '''This folds one more conviction into the summary.'''
+        self.count += 1
+        if self.highest_class is None or \
+            charge.classification.severity > self.highest_class.severity:
+            self.highest_class = charge.classification
+        self.felony_points = max(self.felony_points, 
+                                    charge.felony_record_points)
+        if charge.classification.counts_for_misdemeanor_record:
+            self.misdemeanor_count += 1
+
+class Charges_Convicted(Charge_Collection):
+    '''This is the custom collection model for a defendant's convictions, kept
+    sorted by conviction date and then by offense date, with a DateSummary for 
+    each conviction date.'''
+
+    def _reset_charges(self):
+        '''This also empties the conviction date index and its totals.'''
+        super()._reset_charges()
+        self._dates = []                # sorted conviction date ordinals
+        self._summaries = {}            # date ordinal: DateSummary
+        self._felony_points = 0
+        self._misdemeanor_points = 0
+
+    def _sort_key(self, charge):
+        return (charge.conviction_date.toordinal(),
+                charge.offense_date.toordinal())
+
+    def add_charge(self, charge):
+        '''This adds a conviction in its sorted place. A charge without a
+        conviction date is not a conviction and raises a ValueError.'''
+        if Charge == type(charge) and charge.conviction_date is None:
+            raise ValueError("Only charges with a conviction date may be \
+added to a Defendant's convictions.")
+        super().add_charge(charge)
+        day = charge.conviction_date.toordinal()
+        summary = self._summaries.get(day)
+        if summary is None:
+            summary = self._summaries[day] = DateSummary()
+            insort(self._dates, day)
+        self._retotal(summary, summary.add, charge)
+
+    def remove_charge(self, index):
+        '''This deletes a conviction by index and updates the summary of its 
+        conviction date (dropping the date if it was the last conviction on 
+        it).'''
+        charge = super().remove_charge(index)
+        day = charge.conviction_date.toordinal()
+        summary = self._summaries[day]
+        if summary.count == 1:
+            self._retotal(summary, summary.__init__)      # now empty
+            del self._summaries[day]
+            del self._dates[bisect_left(self._dates, day)]
+        else:
+            self._retotal(summary, self._resummarize, summary, day)
+        return charge
+
+    def _resummarize(self, summary, day):
+        '''This rebuilds the summary of a date from its convictions.'''
+        summary.__init__()
+        for charge in self._view((day,), (day + 1,)):
+            summary.add(charge)
+
+    def _retotal(self, summary, update, *args):
+        '''This runs update(*args) on a date summary and adjusts the running 
+        point totals by the change in that date's contribution.'''
+        felony_before = summary.felony_points
+        counted_before = summary.misdemeanor_count > 0
+        update(*args)
+        self._felony_points += summary.felony_points - felony_before
+        self._misdemeanor_points += (summary.misdemeanor_count > 0) - \
+            counted_before
 
     def sort_collection_byconviction(self):
-        '''This sorts the collection by the conviction dates of the charges 
-        from earliest to latest.'''
-        return copy( self.charges.sort(key=lambda x: x.conviction_date) )
+        '''This returns the convictions sorted by conviction date from
+        earliest to latest (the collection is always kept in this order).'''
+        return self.charges
+
+    def convicted_before(self, _date):
+        '''This returns a view of the convictions with a conviction date
+        before _date, IE: the prior convictions for an offense on _date.'''
+        return self._view(None, (_date.toordinal(),))
+
+    def convicted_between(self, start, stop):
+        '''This returns a view of the convictions with a conviction date on or
+        after start and before stop.'''
+        return self._view((start.toordinal(),), (stop.toordinal(),))
 
     def group_collection_byconvictiondate(self):
-        '''This groups the collection by the conviction dates of the charges 
-        from earliest to latest, returning a 2-d list, each inner list being 
+        '''This groups the collection by the conviction dates of the charges
+        from earliest to latest, returning a 2-d list, each inner list being
         all the convictions on a given day.'''
-        sorted_charges = self.sort_collection_byconviction()
-        unique_dates = []
-        for charge in sorted_charges:
-            if charge.conviction_date not in unique_dates:
-                unique_dates.append(charge.conviction_date)
-        empty_lists = [ [] for date in unique_dates ]
-        current_date = sorted_charges[0].conviction_date
-        index = 0
-        for charge in sorted_charges:
-            if charge.conviction_date != current_date:
-                current_date = charge.conviction_date
-                index += 1
-                empty_list[index].append(charge)
-            else:
-                empty_list[index].append(charge)
\ No newline at end of file
+        return [ list(self.convictions_on(day)) for day in self.conviction_dates ]
+
+    @property
+    def conviction_dates(self):
+        '''This returns the distinct conviction dates from earliest to 
+        latest.'''
+        return [ date.fromordinal(day) for day in self._dates ]
+
+    def convictions_on(self, _date):
+        '''This returns a view of the convictions on a conviction date.'''
+        day = _date.toordinal()
+        return self._view((day,), (day + 1,))
+
+    def date_summary(self, _date):
+        '''This returns the DateSummary for a conviction date, or None if 
+        there are no convictions on it.'''
+        return self._summaries.get(_date.toordinal())
+
+    @property
+    def felony_points(self):
+        '''This returns the felony record points of the convictions.'''
+        return self._felony_points
+
+    @property
+    def felony_level(self):
+        '''This returns the felony record level of the convictions.'''
+        return FelonyFinished.leveler(self._felony_points)
+
+    @property
+    def misdemeanor_points(self):
+        '''This returns the misdemeanor record points of the convictions (the 
+        number of conviction dates with a misdemeanor or felony).'''
+        return self._misdemeanor_points
+
+    @property
+    def misdemeanor_level(self):
+        '''This returns the misdemeanor record level of the convictions.'''
+        return misdemeanor_level(self._misdemeanor_points)
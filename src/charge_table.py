@@ -0,0 +1,134 @@
+'''
+This module has ChargeTable, a columnar (NumPy) store of the convictions of
+many defendants at once, for batch jobs that need the felony and misdemeanor
+record levels of thousands of defendants.
+
+Each row of the table is one charge, stored as:
+    (1) the defendant id (an int chosen by the caller),
+    (2) the severity ordinal of the crime class (see CrimeClass),
+    (3) the offense and conviction dates as day ordinals (date.toordinal();
+    a pending charge has a conviction ordinal of 0),
+    (4) the statute flags of the parsed statute (FELONY_RECORD_EXCLUDED and
+    HABITUAL_EXCLUDED; see src.statute).
+
+The kernels reproduce the record machines with a few NumPy group-by
+operations rather than one state machine per defendant:
+    felony_records()        screen, drop excluded statutes, group by
+                            (defendant, conviction date), keep the highest
+                            points per date, sum per defendant, and level.
+    misdemeanor_records()   count the distinct qualifying conviction dates
+                            per defendant, and level.
+
+NumPy is only needed for this module.
+'''
+from collections import namedtuple
+import numpy as np
+from src.crime_class import CrimeClass
+from src.statute import FELONY_RECORD_EXCLUDED
+
+# Lookup tables indexed by the severity ordinal of a crime class.
+_FELONY_POINTS = np.array([ c.felony_points for c in CrimeClass ],
+                            dtype=np.int64)
+_COUNTS_FOR_MISDEMEANOR = np.array([ c.counts_for_misdemeanor_record for c \
+    in CrimeClass ], dtype=bool)
+
+# The lowest point totals of levels 2 and up.
+_FELONY_THRESHOLDS = np.array([ 2, 6, 10, 14, 18 ])
+_MISDEMEANOR_THRESHOLDS = np.array([ 1, 5 ])
+
+RecordLevels = namedtuple("RecordLevels",
+                            [ "defendant_ids", "points", "levels" ])
+RecordLevels.__doc__ = '''Per-defendant results of a ChargeTable kernel, as
+three aligned arrays sorted by defendant id.'''
+
+class ChargeTable:
+    '''This stores charges as aligned NumPy columns. Build one with
+    ChargeTable.from_records() or directly from arrays.'''
+
+    def __init__(self, defendant_ids, class_ordinals, offense_dates,
+    conviction_dates, statute_flags):
+        self.defendant_ids = np.asarray(defendant_ids, dtype=np.int64)
+        self.class_ordinals = np.asarray(class_ordinals, dtype=np.int8)
+        self.offense_dates = np.asarray(offense_dates, dtype=np.int32)
+        self.conviction_dates = np.asarray(conviction_dates, dtype=np.int32)
+        self.statute_flags = np.asarray(statute_flags, dtype=np.uint8)
+        lengths = { len(column) for column in ( self.defendant_ids,
+                    self.class_ordinals, self.offense_dates,
+                    self.conviction_dates, self.statute_flags ) }
+        if len(lengths) != 1:
+            raise ValueError("All of the ChargeTable columns must have the \
+same length.")
+
+    @classmethod
+    def from_records(cls, records):
+        '''This takes an iterable of (defendant_id, charges) pairs, where
+        charges is a list of Charge objects, and returns a ChargeTable with one
+        row per charge.'''
+        ids, classes, offenses, convictions, flags = [], [], [], [], []
+        for defendant_id, charges in records:
+            for charge in charges:
+                ids.append(defendant_id)
+                classes.append(charge.class_ordinal)
+                offenses.append(charge.offense_date.toordinal())
+                if charge.conviction_date is None:
+                    convictions.append(0)
+                else:
+                    convictions.append(charge.conviction_date.toordinal())
+                flags.append(charge.parsed_statute.flags)
+        return cls(ids, classes, offenses, convictions, flags)
+
+    def __len__(self):
+        return len(self.defendant_ids)
+
+    def felony_records(self):
+        '''This returns RecordLevels with the felony record points and level of
+        every defendant in the table.'''
+        ids, defendants = np.unique(self.defendant_ids, return_inverse=True)
+        points = _FELONY_POINTS[self.class_ordinals]
+        mask = (points > 0) & (self.conviction_dates > 0) & \
+            ((self.statute_flags & FELONY_RECORD_EXCLUDED) == 0)
+        defendants, dates, points = self._sorted_by_date(mask, defendants,
+                                                            points)
+        totals = np.zeros(len(ids), dtype=np.int64)
+        if len(points) > 0:
+            starts = self._date_group_starts(defendants, dates)
+            highest = np.maximum.reduceat(points, starts)
+            np.add.at(totals, defendants[starts], highest)
+        levels = np.searchsorted(_FELONY_THRESHOLDS, totals, side="right") + 1
+        return RecordLevels(ids, totals, levels)
+
+    def misdemeanor_records(self):
+        '''This returns RecordLevels with the misdemeanor record points (the
+        number of distinct qualifying conviction dates) and level of every
+        defendant in the table.'''
+        ids, defendants = np.unique(self.defendant_ids, return_inverse=True)
+        mask = _COUNTS_FOR_MISDEMEANOR[self.class_ordinals] & \
+            (self.conviction_dates > 0)
+        defendants, dates, _ = self._sorted_by_date(mask, defendants)
+        totals = np.zeros(len(ids), dtype=np.int64)
+        if len(dates) > 0:
+            starts = self._date_group_starts(defendants, dates)
+            totals = np.bincount(defendants[starts], minlength=len(ids))
+        levels = np.searchsorted(_MISDEMEANOR_THRESHOLDS, totals,
+                                    side="right") + 1
+        return RecordLevels(ids, totals, levels)
+
+    def _sorted_by_date(self, mask, defendants, points=None):
+        '''This applies the mask and sorts the rows by defendant and then by
+        conviction date.'''
+        defendants = defendants[mask]
+        dates = self.conviction_dates[mask]
+        order = np.lexsort((dates, defendants))
+        if points is not None:
+            points = points[mask][order]
+        return defendants[order], dates[order], points
+
+    @staticmethod
+    def _date_group_starts(defendants, dates):
+        '''This returns the index of the first row of each (defendant,
+        conviction date) group in sorted columns.'''
+        new_group = np.empty(len(dates), dtype=bool)
+        new_group[0] = True
+        new_group[1:] = (defendants[1:] != defendants[:-1]) | \
+            (dates[1:] != dates[:-1])
+        return np.flatnonzero(new_group)
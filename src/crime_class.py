@@ -0,0 +1,75 @@
+'''
+This module has the CrimeClass enumeration, the single table of the crime
+classes in NC and the facts about each class that the record machines need:
+
+    (1) the severity ordinal (0 for an infraction up to 14 for a Class A
+    Felony; the highest ordinal is the most serious class),
+    (2) whether the class is a felony, a misdemeanor, or an infraction,
+    (3) the points a conviction of the class adds to a felony record (the
+    highest conviction on a given date counts),
+    (4) whether a conviction of the class counts toward a misdemeanor record.
+
+Felony record points:
+Class 1 and A1 misdemeanors     1 point
+Class H and I felonies          2 points
+Class E, F, and G felonies      4 points
+Class B2, C, and D felonies     6 points
+Class B1 felonies               9 points
+Class A felonies                10 points
+'''
+from enum import Enum
+
+class CrimeClass(Enum):
+    '''Each member carries its label (IE: "Class H Felony"), its severity
+    ordinal, and its felony record points. The remaining flags are derived
+    once when the member is created, so reading them is a plain attribute
+    lookup.'''
+    INFRACTION = ("Infraction", 0, 0)
+    CLASS_3_MISDEMEANOR = ("Class 3 Misdemeanor", 1, 0)
+    CLASS_2_MISDEMEANOR = ("Class 2 Misdemeanor", 2, 0)
+    CLASS_1_MISDEMEANOR = ("Class 1 Misdemeanor", 3, 1)
+    CLASS_A1_MISDEMEANOR = ("Class A1 Misdemeanor", 4, 1)
+    CLASS_I_FELONY = ("Class I Felony", 5, 2)
+    CLASS_H_FELONY = ("Class H Felony", 6, 2)
+    CLASS_G_FELONY = ("Class G Felony", 7, 4)
+    CLASS_F_FELONY = ("Class F Felony", 8, 4)
+    CLASS_E_FELONY = ("Class E Felony", 9, 4)
+    CLASS_D_FELONY = ("Class D Felony", 10, 6)
+    CLASS_C_FELONY = ("Class C Felony", 11, 6)
+    CLASS_B2_FELONY = ("Class B2 Felony", 12, 6)
+    CLASS_B1_FELONY = ("Class B1 Felony", 13, 9)
+    CLASS_A_FELONY = ("Class A Felony", 14, 10)
+
+    def __init__(self, label:str, severity:int, felony_points:int):
+        self.label = label
+        self.severity = severity
+        self.felony_points = felony_points
+        self.is_infraction = severity == 0
+        self.is_misdemeanor = 1 <= severity <= 4
+        self.is_felony = severity >= 5
+        self.counts_for_felony_record = felony_points > 0
+        self.counts_for_misdemeanor_record = severity >= 1
+
+    @classmethod
+    def from_label(cls, label:str):
+        '''This returns the member for a label such as "Class H Felony", or
+        raises a ValueError if the label is not a valid crime class.'''
+        if type(label) == str and label in _BY_LABEL:
+            return _BY_LABEL[label]
+        raise ValueError(_CLASS_ERROR)
+
+    def __str__(self):
+        return self.label
+
+_BY_LABEL = { member.label: member for member in CrimeClass }
+
+# The valid crime class labels, in the order they are listed to the user.
+CRIME_CLASSES = (   "Infraction", "Class 3 Misdemeanor", "Class 2 Misdemeanor",
+                    "Class 1 Misdemeanor", "Class A1 Misdemeanor",
+                    "Class I Felony", "Class H Felony", "Class G Felony",
+                    "Class F Felony", "Class E Felony", "Class D Felony",
+                    "Class C Felony", "Class B1 Felony", "Class B2 Felony",
+                    "Class A Felony" )
+
+_CLASS_ERROR = f"The crime class is not a valid crime class. Valid Crime \
+classes are {str(list(CRIME_CLASSES))}."
@@ -0,0 +1,124 @@
+'''
+This module reads convictions and pending charges from a CSV extract (IE: a
+court-data export) instead of the keyboard, for files far too big to load at
+once.
+
+The CSV needs a header row with these columns (in any order; other columns
+are ignored):
+    defendant_id, first, last, birthdate,
+    crime, crime_class, offense_date, conviction_date, conviction_loc, statute
+Dates are ISO dates (IE: 2019-01-31). A row with a blank conviction_date is a
+pending charge. The rows of a defendant must be next to each other (IE: the
+extract is sorted by defendant_id).
+
+Everything is a generator, so only one defendant's rows are held at a time:
+    read_rows       the CSV rows, with their line numbers,
+    read_cases      a CsvCase for each run of rows with the same defendant_id
+                    (its charges built with Charge.from_rows),
+    run_csv         a CsvResult of each case and its RecordReport, from
+                    RecordRunner.
+A bad row does not stop the file: it is left out of its case and reported in
+CsvCase.errors. A case with errors is not run (its report is None), since a
+record missing a row could come out at a lower level than it should.
+'''
+from collections import namedtuple
+import csv
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+from src.charge import Charge, FIELDS
+from src.defendant import Defendant
+from src.run_all_records import RecordRunner
+
+DEFENDANT_FIELDS = ( "defendant_id", "first", "last", "birthdate" )
+COLUMNS = DEFENDANT_FIELDS + FIELDS
+
+CsvCase = namedtuple("CsvCase", [ "defendant", "convictions", "pendings",
+                                    "errors" ])
+CsvCase.__doc__ = '''The charges of one defendant read from a CSV.
+convictions and pendings are lists of charges. defendant is None if the
+defendant columns are invalid.'''
+
+CsvResult = namedtuple("CsvResult", [ "case", "report" ])
+CsvResult.__doc__ = '''A CsvCase and its RecordReport, or None for a case with
+errors.'''
+
+CsvError = namedtuple("CsvError", [ "line", "field", "reason" ])
+CsvError.__doc__ = '''A bad row in a CSV: its line number in the file, the
+field that failed (or "defendant"), and why.'''
+
+def _parse_date(text:str):
+    '''This returns the date of an ISO date string, None for a blank, or the
+    text itself if it is not a date (for Charge.from_rows to report).'''
+    if text == "":
+        return None
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return text
+
+def read_rows(csv_file):
+    '''This takes an open CSV file (or any iterable of CSV lines) and yields
+    (line number, row) pairs, each row a tuple of values in COLUMNS order.'''
+    reader = csv.reader(csv_file)
+    header = next(reader, None)
+    if header is None:
+        return
+    missing = [ column for column in COLUMNS if column not in header ]
+    if missing:
+        raise ValueError(f"The CSV is missing the columns {missing}.")
+    pick = itemgetter(*[ header.index(column) for column in COLUMNS ])
+    width = len(header)
+    for row in reader:
+        if len(row) < width:            # a short row is padded with blanks
+            row += [ "" ] * (width - len(row))
+        if any(row):
+            yield reader.line_num, pick(row)
+
+def read_cases(csv_file):
+    '''This takes an open CSV file and yields a CsvCase for each defendant,
+    reading only that defendant's rows.'''
+    for defendant_id, group in groupby(read_rows(csv_file),
+        key=lambda numbered: numbered[1][0]):
+        yield _make_case(list(group))
+
+def _make_case(group):
+    '''This builds the CsvCase of one defendant's (line number, row) pairs.'''
+    first_line, first_row = group[0]
+    defendant_id, first, last, birthdate = first_row[:4]
+    errors = []
+    try:
+        defendant = Defendant(first, last, _parse_date(birthdate))
+    except ValueError as error:
+        defendant = None
+        errors.append(CsvError(first_line, "defendant", str(error)))
+    lines, rows = [], []
+    for line, row in group:
+        crime, crime_class, offense_date, conviction_date, conviction_loc, \
+            statute = row[4:]
+        lines.append(line)
+        rows.append(( crime, crime_class, _parse_date(offense_date),
+                    _parse_date(conviction_date), conviction_loc, statute ))
+    batch = Charge.from_rows(rows)
+    errors.extend( CsvError(lines[error.row], error.field, error.reason) \
+        for error in batch.errors )
+    convictions, pendings = [], []
+    for charge in batch.charges:
+        if charge.conviction_date is None:
+            pendings.append(charge)
+        else:
+            convictions.append(charge)
+    return CsvCase(defendant, convictions, pendings, errors)
+
+def run_csv(csv_file, runner=None):
+    '''This takes an open CSV file and yields a CsvResult for each defendant
+    in it. The report is None if any of the defendant's rows were bad (see
+    CsvCase.errors), rather than a report on the rows that were left. runner
+    is the RecordRunner to use (a new one by default).'''
+    runner = RecordRunner() if runner is None else runner
+    for case in read_cases(csv_file):
+        report = None
+        if case.errors == []:
+            report = runner.run(case.defendant, case.convictions,
+                                case.pendings)
+        yield CsvResult(case, report)
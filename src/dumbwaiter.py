@@ -9,9 +9,20 @@ Dumbwaiter also has dw.ran (bool--showing it ran successfully).
 Dumbwaiter has a bool hab_eligible if the defendant is habitual eligible, and a 
 date_eligible for the date at which they became eligible.
 Dumbwaiter also has a method taking a new conviction and returning whether it 
-is eligible to be raised to habitual status.
+is eligible to be raised to habitual status, and offense_dates_are_eligible 
+answers the same for a whole batch of offense dates (or pending charges).
 '''
 from datetime import date
+from src.charge import Charge
+
+def eighteenth_birthday(birthdate):
+    '''This returns the date a person born on birthdate turns 18. Someone 
+    born on February 29 turns 18 on March 1, since 18 years after a leap year 
+    is never a leap year.'''
+    try:
+        return birthdate.replace(year=birthdate.year + 18)
+    except ValueError:                  # February 29 in a common year
+        return date(birthdate.year + 18, 3, 1)
 
 class Dumbwaiter:
     '''This is a context object the HabitualMachine FSM passes around to its 
@@ -20,7 +31,13 @@ class Dumbwaiter:
     validated by the software as counting toward habitual status);
     (2) hab_eligible set as False (representing that the Defendant is not 
     eligible for habitual status;
-    (3) a birthdate, which is required and must be a datetime date object. '''
+    (3) a birthdate, which is required and must be a datetime date object. 
+    The 18th birthday is worked out once, as a day ordinal, whenever the 
+    birthdate is set. Dumbwaiter is slotted, since a batch run makes one 
+    for every defendant.'''
+    __slots__ = ( "habitual_convictions", "_hab_eligible", "_date_eligible", 
+                  "_birthdate", "_eighteenth_ordinal", "ran" )
+
     def __init__(self, birthdate):
         self.habitual_convictions = []
         self.set_hab_eligible(False)
@@ -33,6 +50,7 @@ class Dumbwaiter:
         date object.'''
         if (type(birthdate) == date):
             self._birthdate = birthdate
+            self._eighteenth_ordinal = eighteenth_birthday(birthdate).toordinal()
         else:
             raise ValueError("The defendant's birthdate is a prerequisite for \
 habitual felon analysis, and it must be a valid datetime 'date' object.")
@@ -68,17 +86,24 @@ habitual felon analysis, and it must be a valid datetime 'date' object.")
         if type(_date) != date:
             raise ValueError("The method over18_on_date() in Dumbwaiter \
 requires a datetime date as a parameter.")
-        if _date >= self.eighteenth_birthdate:
+        if _date.toordinal() >= self._eighteenth_ordinal:
             return True
         return False
 
+    def over18_on_dates(self, dates):
+        '''This is the batch version of over18_on_date. It takes dates and 
+        returns a list of bools in the same order. An array of day ordinals 
+        (anything with a dtype, IE: a NumPy array of date.toordinal() values) 
+        is screened in one vectorized step and returns an array of bools.'''
+        if hasattr(dates, "dtype"):
+            return dates >= self._eighteenth_ordinal
+        return [ self.over18_on_date(_date) for _date in dates ]
+
     @property
     def eighteenth_birthdate(self):
         '''This takes the _brithdate value and returns the eighteenth birthdate
         of the denfendat.'''
-        eighteenth = date(  self._birthdate.year + 18, self._birthdate.month, 
-                            self._birthdate.day)
-        return eighteenth
+        return date.fromordinal(self._eighteenth_ordinal)
 
     def set_date_eligible(self, conviction_date):
         '''This sets the date at which the defendant became habitual-eligible.
@@ -110,4 +135,20 @@ requires a datetime date as a parameter.")
         if self.hab_eligible and offense_date > self.date_eligible:
             return True
         else:
-            return False
\ No newline at end of file
+            return False
+
+    def offense_dates_are_eligible(self, offense_dates):
+        '''This is the batch version of offense_date_is_eligible. It takes 
+        offense dates, or pending Charge objects (their offense_date is used), 
+        and returns a list of bools in the same order. An array of day ordinals 
+        (anything with a dtype, IE: a NumPy array of date.toordinal() values) 
+        is compared in one vectorized step and returns an array of bools.'''
+        if hasattr(offense_dates, "dtype"):
+            eligible_after = self.date_eligible if self.hab_eligible else \
+                date.max                        # nothing is after date.max
+            return offense_dates > eligible_after.toordinal()
+        if not self.hab_eligible:
+            return [ False for offense_date in offense_dates ]
+        eligible_after = self.date_eligible
+        return [ (o.offense_date if type(o) == Charge else o) > eligible_after 
+                    for o in offense_dates ]
@@ -19,10 +19,14 @@ Levels:     Points:
 6           18+
 '''
 import typing
+from collections import namedtuple
+from src.charge import _UNCONVICTED_ERROR, _is_record
 #states: 
 
 class EligibleCrimes:
-    '''This class just carries the crimes eligible for felony record points.'''
+    '''This class just carries the crimes eligible for felony record points. 
+    The states themselves read CrimeClass.counts_for_felony_record and 
+    CrimeClass.felony_points instead of searching this list.'''
     crimes = [  "Class 1 Misdemeanor", "Class A1 Misdemeanor", "Class I Felony", 
                 "Class H Felony", "Class G Felony", "Class F Felony", 
                 "Class E Felony", "Class D Felony", "Class C Felony", 
@@ -52,9 +56,9 @@ class StartState(State):
     the next step, screening out the convictions which do not count for a 
     felony record analysis'''
     def on_event(self, convictions:list, points:int): 
-        if type(convictions) == list and len(convictions) == 0:     # no priors
+        if _is_record(convictions) and len(convictions) == 0:   # no priors
             return FinishedState().on_event(convictions, points)
-        elif type(convictions) == list and len(convictions) >= 1:   # priors
+        elif _is_record(convictions) and len(convictions) >= 1: # priors
             return ScreeningState().on_event(convictions, points)
         else:
             e = ErrorState()
@@ -67,11 +71,13 @@ class ScreeningState(State):
     '''This State screens out any convictions that cannot count in a felony 
     record. At that point, if there are no convictions left, the code should 
     transition to FinishedState . Ortherwise, transition to RescreeningState 
-    for further pre-processing steps.'''
+    for further pre-processing steps. A conviction with no conviction date 
+    raises a ValueError.'''
     def on_event(self, convictions:list, points:int): 
-        eligibles = EligibleCrimes().crimes
-        screened = [ conv for conv in convictions if conv.crime_class in \
-            eligibles ]
+        if any( conv.conviction_date is None for conv in convictions ):
+            raise ValueError(_UNCONVICTED_ERROR)
+        screened = [ conv for conv in convictions if \
+            conv.classification.counts_for_felony_record ]
         if screened == []:
             return FinishedState().on_event(screened, points)
         else:
@@ -84,10 +90,8 @@ class RescreeningState(State):
     committed on or after December 1, 1997, impaired driving [G.S. 20-138.1] 
     and commercial impaired driving [G.S. 20-138.2]. '''
     def on_event(self, convictions:list, points:int):
-        ineligibles = [ conv for conv in convictions if "20-" in conv.statute \
-            and not "20-141.4" in conv.statute and not "20-138.1" in \
-                conv.statute and not "138.2" in conv.statute ]
-        eligibles = list(set(convictions).difference(ineligibles))
+        eligibles = [ conv for conv in convictions if not \
+            conv.parsed_statute.excluded_from_felony_record ] # keeps order
         if eligibles == []:
             return FinishedState().on_event(eligibles, points)
         else:
@@ -108,11 +112,8 @@ class ZippingState(State):
     def make_list_of_unique_dates(self, convictions:list):
         '''This takes a list of convictions and returns a list of all the 
         unique conviction dates.'''
-        unique_dates = []
-        for conv in convictions:
-            if conv.conviction_date not in unique_dates:
-                unique_dates.append(conv.conviction_date)
-        return unique_dates
+        return list(dict.fromkeys( conv.conviction_date for conv in \
+            convictions ))             # first-seen order, no repeats
 
     def make_list_of_empties(self, unique_dates:list):
         '''This takes a list of unique dates and returns a 2-D list with an 
@@ -124,11 +125,15 @@ class ZippingState(State):
         '''This helper puts convictions with the same conviction_date value in 
         the same inner list of a 2-D list.'''
         grouped_convictions = empties
+        positions = { d: index for index, d in enumerate(unique_dates) }
         for c in convictions:
-            index_matchingdate = unique_dates.index(c.conviction_date)
-            grouped_convictions[ index_matchingdate ].append(c)
+            grouped_convictions[ positions[c.conviction_date] ].append(c)
         return grouped_convictions
 
+def _severity(conviction):
+    '''This returns the severity ordinal used to rank convictions on a date.'''
+    return conviction.classification.severity
+
 class ZippedState(State):
     '''This method takes a list of lists, each inner list being all the 
     convictions on a particular date. It creates a 1-dimensional list with the 
@@ -144,34 +149,25 @@ class ZippedState(State):
         convictions on a date and returns just the one with the highest class. 
         The rest are redundant in calculating a felony level because on a 
         given date only the highest counts.'''
-        _crimes = EligibleCrimes()
-        class_indices = _crimes.crimes      # hi index is the hi'st-lev crime
-        indices = [ class_indices.index(item.crime_class) for item in \
-            convictions_onsamedate ]  
-        highest = max(indices)              # highest crime from same date
-        idx = indices.index(highest)
-        conviction = convictions_onsamedate[idx]
-        return conviction
+        return max(convictions_onsamedate, key=_severity)
 
 class HubState(State):
     '''This state should cycle a list of the highest offense from each date and 
-    should start adding the points from them. Misdemeanors go to the 
-    misdemeanor state, and felonies should trickle through a chain of felony 
-    states from high to low until their points are allotted. Each time the 
-    HubState is called, if the list is non-empty, it pushes the first item 
-    through the rest of the FSM.'''
+    should add up the points from them, looking each class up in the 
+    CrimeClass table. It walks the list in one loop (rather than passing 
+    each conviction through MisdemeanorState or FelonyStartState and back), 
+    so a long record cannot exhaust the recursion limit.'''
     def on_event(self, convictions:list, points:int):
-        if convictions == []: # pull a conviction, when done, FinishedState()
-            return FinishedState().on_event(convictions, points)
-        elif "Misdemeanor" in convictions[0].crime_class:
-            return MisdemeanorState().on_event(convictions, points)
-        else:
-            return FelonyStartState().on_event(convictions, points)
+        for conviction in convictions:
+            points += conviction.classification.felony_points
+        return FinishedState().on_event([], points)
 
 class MisdemeanorState(State):
     '''An eligible misdemeanor (Class 1 or A1) is worth one point. Multiple 
     misdemeanors on the same conviction date are capped at 1 point per day. 
-    This state class should add a point to points and return to HubState.'''
+    This state class should add a point to points and return to HubState. 
+    HubState no longer steps through this state; it is kept for callers that 
+    score one conviction at a time.'''
     def on_event(self, convictions:list, points:int):
         sliced = convictions[1:] #pulling off the first element
         if sliced == []:    
@@ -180,45 +176,24 @@ class MisdemeanorState(State):
             return HubState().on_event(sliced, points + 1)
 
 class FelonyStartState(State):
-    '''Class H and I felonies are worth 2 points. This should either add 2 
-    points and return HubState or move to the next felony state 
-    (FelonyOverHState).'''
+    '''This adds the felony record points for the class of the felony (2 for 
+    H and I, 4 for E, F, and G, 6 for D, C, and B2, 9 for B1, and 10 for A) 
+    from the CrimeClass table and returns to HubState. Since the points come 
+    from the table, the subclasses below behave exactly as this state; they 
+    are kept for the callers that name them.'''
     def on_event(self, convictions:list, points:int):
-        if convictions[0].crime_class == "Class H Felony" or \
-            convictions[0].crime_class == "Class I Felony":
-            return HubState().on_event(convictions[1:], points + 2)
-        else:
-            return FelonyOverHState().on_event(convictions, points)
+        return HubState().on_event(convictions[1:], 
+                            points + convictions[0].classification.felony_points)
 
-class FelonyOverHState(State):
-    '''E, F, and G felonies are worth 4 points. This should either add 4 and 
-    return to HubState, or should return the next felony state, 
-    FelonyOverEState.'''
-    def on_event(self, convictions, points):
-        FourPt = { "Class G Felony", "Class F Felony", "Class E Felony" }
-        if convictions[0].crime_class in FourPt:
-            return HubState().on_event(convictions[1:], points + 4)
-        else:
-            return FelonyOverEState().on_event(convictions, points)
-        
-class FelonyOverEState(State):
-    '''D, C, and B2 felonies are worth 6 points. This should either add 6 and 
-    return to HubState or return the next highest state, FelonyOverB2State'''
-    def on_event(self, convictions, points):
-        SixPt = { "Class D Felony", "Class C Felony", "Class B2 Felony" }
-        if convictions[0].crime_class in SixPt:
-            return HubState().on_event(convictions[1:], points + 6)
-        else:
-            return FelonyOverB2State().on_event(convictions, points)
+class FelonyOverHState(FelonyStartState):
+    '''E, F, and G felonies are worth 4 points.'''
+
+class FelonyOverEState(FelonyStartState):
+    '''D, C, and B2 felonies are worth 6 points.'''
 
-class FelonyOverB2State(State):
+class FelonyOverB2State(FelonyStartState):
     '''B1 felonies are worth 9 points, and A felon(y) (IE: murder) is worth 
     10.'''
-    def on_event(self, convictions, points):
-        if convictions[0].crime_class == "Class B1 Felony":
-            return HubState().on_event(convictions[1:], points + 9)
-        if convictions[0].crime_class == "Class A Felony":         # murder
-            return HubState().on_event(convictions[1:], points + 10)    
 
 class FinishedState(State):
     '''This is the end of counting up the felonies'''
@@ -251,16 +226,59 @@ class ErrorState(State):
         self.points = "An error occured while caluclating the record."
         return self
 
+def felony_record_points(convictions):
+    '''This is the engine behind Felony_RecordMachine. In one loop over the 
+    convictions it keeps the highest felony record points seen on each 
+    conviction date (ineligible classes and excluded statutes are worth 0), 
+    then returns the sum. This gives the same points as the 
+    Screening -> Rescreening -> Zipping -> Zipped -> Hub chain, without 
+    building any intermediate lists or state objects. A conviction with no 
+    conviction date raises a ValueError.'''
+    highest = {}
+    for conviction in convictions:
+        day = conviction.conviction_date
+        if day is None:
+            raise ValueError(_UNCONVICTED_ERROR)
+        points = conviction.felony_record_points
+        if points and points > highest.get(day, 0):
+            highest[day] = points
+    return sum(highest.values())
+
+FelonyRecord = namedtuple("FelonyRecord", [ "points", "level" ])
+FelonyRecord.__doc__ = '''The felony record points and level of a record.'''
+
+def felony_record(convictions):
+    '''This returns the FelonyRecord (points and level) of the convictions, 
+    a list or other sequence of them. It is felony_record_points with the 
+    level added, so several threads can score records with it at once. 
+    Anything but a sequence raises a ValueError.'''
+    if not _is_record(convictions):
+        raise ValueError("The convictions must be a list (or other sequence) \
+of convictions.")
+    points = felony_record_points(convictions)
+    return FelonyRecord(points, FinishedState.leveler(points))
+
 #--------- The State Machine:-----------------
 class Felony_RecordMachine:
     '''This program calculates a defendant's felony record with the on_event 
     method, and determines the number of points and the level for felony 
-    sentencing.'''
+    sentencing. on_event returns the FelonyRecord of each record it is given. 
+    The points and level properties read self.state, which only holds the 
+    latest run.'''
     def __init__(self):
         self.state = StartState() # starting state set
     
     def on_event(self, convictions:list):
-        self.state = self.state.on_event(convictions, 0)
+        '''This runs felony_record_points over the convictions, leaves the 
+        FinishedState (or an ErrorState for invalid input) in self.state, and 
+        returns the FelonyRecord.'''
+        if _is_record(convictions):
+            state = FinishedState().on_event([], 
+                                            felony_record_points(convictions))
+        else:
+            state = StartState().on_event(convictions, 0)
+        self.state = state
+        return FelonyRecord(state.points, state.level)
 
     @property
     def points(self):
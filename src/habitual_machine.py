@@ -19,7 +19,9 @@ then Offense1 is convicted on Date2, and THEN (after that conviction) he
 commits Offense2 on Date3, and Offense2 is convicted on Date4.
 (2) No more than one of those can count if the Defendant was under 18.
 '''
+from collections import namedtuple
 from datetime import date, timedelta
+from src.charge import _UNCONVICTED_ERROR
 from src.dumbwaiter import Dumbwaiter
 
 # #------- Base State:------------------
@@ -38,6 +40,50 @@ class State:
     def __str__(self):
         return self.__class__.__name__
 
+# Felonies convicted before this date do not count toward habitual status
+_HABITUAL_CUTOFF = date(2004, 12, 1)
+
+def counts_for_habitual(con):
+    '''This returns True if a conviction can count toward habitual status: 
+    a felony, less the pedantic exceptions.'''
+    return con.classification.is_felony and \
+        con.conviction_date >= _HABITUAL_CUTOFF and not \
+        con.parsed_statute.excluded_from_habitual   # pedantic exceptions
+
+def strike_order(con):
+    '''This returns the key felonies are scanned for strikes in: by offense 
+    date, and felonies committed on the same date by conviction date. So the 
+    earliest conviction of the day is the one that can be a strike, whatever 
+    order the convictions were given in.'''
+    return con.offense_date, con.conviction_date
+
+def is_next_strike(felony, last_strike, dumbwaiter):
+    '''This returns True if the felony (scanned in strike_order) is the next 
+    strike after last_strike, the latest strike so far (None if there is 
+    none yet):
+        (1) with no strikes yet, the felony is strike one (it may be from 
+        before the Defendant turned 18);
+        (2) after that, it is the next strike if the Defendant was over 18 on 
+        its offense date and the offense came after the conviction date of 
+        last_strike.'''
+    return last_strike is None or (
+        dumbwaiter.over18_on_date(felony.offense_date) and
+        felony.offense_date > last_strike.conviction_date)
+
+def screen_felonies(convictions):
+    '''This returns a new list of the convictions that can count toward 
+    habitual status (felonies, less the pedantic exceptions), sorted by 
+    strike_order. A conviction with no conviction date raises a 
+    ValueError.'''
+    screened = []
+    for con in convictions:
+        if con.conviction_date is None:
+            raise ValueError(_UNCONVICTED_ERROR)
+        if counts_for_habitual(con):
+            screened.append(con)
+    screened.sort(key=strike_order)
+    return screened
+
 # #------- These are the concrete states:------------------
 class StartState(State):
     '''This is the starting state for a state machine made to determine if a 
@@ -47,25 +93,19 @@ class StartState(State):
     https://www.sog.unc.edu/sites/www.sog.unc.edu/files/reports/aojb0804.pdf).
     '''
     def on_event(self, convictions:list, dumbwaiter): 
-        screened = [ con for con in convictions if con.is_felony ] #ditch non-felonies
-        screened = [ con for con in screened if not "14-7.31" in con.statute and \
-            not con.conviction_date < date(2004, 12, 1) ]  # pedantic exception.
-        screened = [ con for con in screened if not "14-33.2" in con.statute and \
-            not con.conviction_date < date(2004, 12, 1) ]  # pedantic exception. 
-        screened.sort(key=lambda x: x.offense_date) # sort by offense date
+        screened = screen_felonies(convictions)
         if screened == []:
             return FinishedState().on_event(screened, dumbwaiter)
         return StrikeOne().on_event(screened, dumbwaiter)
 
 class StrikeOne(State):
     '''StrikeOne represents the first felony for which the Defendant is 
-    convicted. These should already be sorted in order of conviction date. Only 
+    convicted. These should already be sorted in order of offense date. Only 
     one conviction for felonies can count if the offense date happened before 
     the Defendant's 18th birthday.'''
     def on_event(self, convictions:list, dumbwaiter): 
-        # then add first to dw.habitual_convictions from convictions
-        dumbwaiter.habitual_convictions.append(convictions.pop(0))  
-        return StrikeTwo().on_event(convictions, dumbwaiter)
+        return FinishedState().on_event(
+                        run_strikes(convictions, dumbwaiter), dumbwaiter)
 
 class StrikeTwo(State): 
     '''StrikeTwo represents a defendant's second prior conviction eligible 
@@ -74,21 +114,8 @@ class StrikeTwo(State):
     the first felony to count. Only one felony can count for habitual 
     felon purposes from when the Defendant was under 18.'''
     def on_event(self, convictions:list, dumbwaiter):
-        adult_cons = [ c for c in convictions if dumbwaiter.over18_on_date( \
-            c.offense_date) ]    # sreen out remaining juvenile-aged offenses
-        if len(adult_cons) > 0 and adult_cons[0].offense_date > \
-            dumbwaiter.habitual_convictions[-1].conviction_date: 
-            # new offense is after prior conviction
-            dumbwaiter.habitual_convictions.append(adult_cons.pop(0))
-            return StrikeThree().on_event(adult_cons, dumbwaiter)
-        elif len(adult_cons) > 0 and adult_cons[0].offense_date <= \
-            dumbwaiter.habitual_convictions[-1].conviction_date: 
-            # new offense !after prior
-            adult_cons.pop(0)       # trash it because it overlaps
-            return StrikeTwo().on_event(adult_cons, dumbwaiter)   
-            # Calling itself recursively after ditching 1st felo (not eligible)
-        else:
-            return FinishedState().on_event(convictions, dumbwaiter)
+        return FinishedState().on_event(
+                        run_strikes(convictions, dumbwaiter), dumbwaiter)
 
 class StrikeThree(State):
     def on_event(self, convictions:list, dumbwaiter):
@@ -96,20 +123,28 @@ class StrikeThree(State):
         habitual felony status. This will run algorithms to confirm the offense 
         does qualify, and if so, will mark the status and date at which the 
         defendant qualifies in dumbwaiter for the statemachine.'''
-        if len(convictions) > 0 and convictions[-1].offense_date > \
-            dumbwaiter.habitual_convictions[-1].conviction_date:
-            dumbwaiter.habitual_convictions.append(convictions.pop(0))  
-            # add a conviction to habitual convictions and pop the 1st conv
-            dumbwaiter.hab_eligible = True
-            dumbwaiter.date_eligible = \
-                dumbwaiter.habitual_convictions[-1].conviction_date
-            return FinishedState().on_event(convictions, dumbwaiter)
-        elif len(convictions) > 0 and convictions[-1].offense_date <= \
-            dumbwaiter.habitual_convictions[-1].conviction_date:
-            convictions.pop(0)  # ditch the 1st conviction
-            return StrikeThree().on_event(convictions, dumbwaiter)
-        else:
-            return FinishedState().on_event(convictions, dumbwaiter)
+        return FinishedState().on_event(
+                        run_strikes(convictions, dumbwaiter), dumbwaiter)
+
+def run_strikes(felonies:list, dumbwaiter):
+    '''This is the engine behind the strike states. It scans the felonies 
+    (screened and sorted by strike_order) once with a cursor, picking up 
+    strikes from wherever dumbwaiter.habitual_convictions left off. A felony 
+    is added if is_next_strike says so, and passed over otherwise. On the 
+    third strike it marks the dumbwaiter hab_eligible as of that 
+    strike's conviction date. It returns the felonies it did not reach.'''
+    strikes = dumbwaiter.habitual_convictions
+    cursor = 0
+    while len(strikes) < 3 and cursor < len(felonies):
+        felony = felonies[cursor]
+        cursor += 1
+        if is_next_strike(felony, strikes[-1] if strikes else None, 
+            dumbwaiter):
+            strikes.append(felony)
+    if len(strikes) >= 3:
+        dumbwaiter.hab_eligible = True
+        dumbwaiter.date_eligible = strikes[2].conviction_date
+    return felonies[cursor:]
 
 class FinishedState(State):
     '''This represents the end of the processing. Here, all convictions have 
@@ -120,22 +155,77 @@ class FinishedState(State):
         self.dumbwaiter.ran = True
         return self
 
+def earliest_strike_chain(felonies:list, dumbwaiter):
+    '''This finds the chain of non-overlapping felonies (each offense after 
+    the conviction of the one before) that reaches three strikes on the 
+    earliest possible conviction date, which the greedy strike states can 
+    miss (IE: when the first felony by offense date sat pending for years). 
+    Only the first strike may be from before the Defendant turned 18.
+
+    Each strike is the eligible felony with the earliest conviction date: 
+    strike one from all the felonies, strike two from the adult felonies 
+    committed after strike one's conviction, and strike three from the adult 
+    felonies committed after strike two's. Any other valid chain's k-th strike 
+    is convicted no earlier than this one's (interval scheduling by earliest 
+    finish), so this chain is both the longest and the earliest. It takes one 
+    pass per strike over felonies sorted by offense date (O(n log n) with 
+    the sort). It returns the chain (up to three felonies).'''
+    chain = []
+    while len(chain) < 3:
+        best = None
+        for felony in felonies:
+            if chain and not (felony.offense_date > chain[-1].conviction_date \
+                and dumbwaiter.over18_on_date(felony.offense_date)):
+                continue
+            if best is None or felony.conviction_date < best.conviction_date:
+                best = felony
+        if best is None:
+            break
+        chain.append(best)
+    return chain
+
+HabitualRecord = namedtuple("HabitualRecord", [ "hab_eligible", 
+                                "date_eligible", "habitual_convictions" ])
+HabitualRecord.__doc__ = '''The habitual status of a record: whether it is 
+eligible, the date it became eligible (or None), and a tuple of the 
+strikes.'''
+
+def _habitual_record(dumbwaiter):
+    '''This returns the HabitualRecord of a dumbwaiter that has run.'''
+    return HabitualRecord(dumbwaiter.hab_eligible, dumbwaiter.date_eligible, 
+                            tuple(dumbwaiter.habitual_convictions))
+
+def habitual_record(convictions, defendant_birthdate):
+    '''This returns the HabitualRecord of the convictions for a Defendant 
+    born on defendant_birthdate, running the strike states on a fresh 
+    Dumbwaiter. Use it when only the answer is needed, not a machine to ask 
+    about pending charges afterwards.'''
+    dumbwaiter = Dumbwaiter(defendant_birthdate)
+    StartState().on_event(convictions, dumbwaiter)
+    return _habitual_record(dumbwaiter)
+
 #--------- The actual state machine itself:-----------------
 class HabitualMachine:
     '''HabitualMachine will allow a user to pass convictions to the on_event 
     method and determine whether the record is eligible for habitual status. 
     Once this is done, the user may pass a later criminal conviction into 
     conviction_is_eligible and the HabitualMachine instance will return whether 
-    the conviciton would be eligible for habitual status.'''
+    the conviciton would be eligible for habitual status.
+
+    on_event gives every record a new Dumbwaiter and StartState, and returns 
+    its HabitualRecord. The pending charge questions are answered from the 
+    dumbwaiter of the last record run.'''
     def __init__(self):
         self.state = StartState() 
 
     def on_event(self, convictions:list, defendant_birthdate):
         _dumbwaiter = Dumbwaiter(defendant_birthdate)
-        self.state = self.state.on_event(convictions, _dumbwaiter)
-        self.dumbwaiter = self.state.dumbwaiter
-        self.hab_eligible = self.state.dumbwaiter.hab_eligible
-        self.date_eligible = self.state.dumbwaiter.date_eligible
+        state = StartState().on_event(convictions, _dumbwaiter)
+        self.state = state
+        self.dumbwaiter = _dumbwaiter
+        self.hab_eligible = _dumbwaiter.hab_eligible
+        self.date_eligible = _dumbwaiter.date_eligible
+        return _habitual_record(_dumbwaiter)
 
     def offense_date_is_eligible(self, offense_date):
         '''After running a defendant's record, this takes a subsequent 
@@ -146,3 +236,57 @@ class HabitualMachine:
                 return self.state.dumbwaiter.offense_date_is_eligible(offense_date)
         except:
             raise ValueError("The record has not been successfully caluclated yet.")
+
+    def offense_dates_are_eligible(self, offense_dates):
+        '''After running a defendant's record, this takes many offense dates 
+        (or pending Charge objects) and returns whether each is eligible for 
+        habitual status, in one pass. See 
+        Dumbwaiter.offense_dates_are_eligible.'''
+        return self._ran_dumbwaiter().offense_dates_are_eligible(offense_dates)
+
+    def eligible_pending_charges(self, pendings):
+        '''After running a defendant's record, this takes the defendant's 
+        Pending_Charges and returns a view of the ones eligible for habitual 
+        status. Pending_Charges are sorted by offense date, so this is one 
+        binary search for date_eligible rather than a check of every charge. 
+        Like any range view, it is good until pendings next changes (see 
+        charge_collection.ChargesView).'''
+        dumbwaiter = self._ran_dumbwaiter()
+        if not dumbwaiter.hab_eligible:
+            return pendings.charges[0:0]
+        return pendings.offended_after(dumbwaiter.date_eligible)
+
+    def _ran_dumbwaiter(self):
+        '''This returns the dumbwaiter of the record that has been run.'''
+        try:
+            if self.dumbwaiter.ran == True:
+                return self.dumbwaiter
+        except:
+            pass
+        raise ValueError("The record has not been successfully caluclated yet.")
+
+
+class EarliestChainMachine(HabitualMachine):
+    '''EarliestChainMachine works like HabitualMachine, but it picks the 
+    strikes with earliest_strike_chain, so date_eligible is the earliest date 
+    the record made the Defendant eligible for habitual status. The chosen 
+    strikes are in chain (and dumbwaiter.habitual_convictions).'''
+    def on_event(self, convictions:list, defendant_birthdate):
+        _dumbwaiter = Dumbwaiter(defendant_birthdate)
+        screened = screen_felonies(convictions)
+        chain = earliest_strike_chain(screened, _dumbwaiter)
+        _dumbwaiter.habitual_convictions.extend(chain)
+        if len(chain) == 3:
+            _dumbwaiter.hab_eligible = True
+            _dumbwaiter.date_eligible = chain[-1].conviction_date
+        self.state = FinishedState().on_event(
+            [ con for con in screened if con not in chain ], _dumbwaiter)
+        self.dumbwaiter = _dumbwaiter
+        self.hab_eligible = _dumbwaiter.hab_eligible
+        self.date_eligible = _dumbwaiter.date_eligible
+        return _habitual_record(_dumbwaiter)
+
+    @property
+    def chain(self):
+        '''This returns the strikes chosen for habitual status.'''
+        return self.dumbwaiter.habitual_convictions
@@ -0,0 +1,119 @@
+'''
+This module has IncrementalRecord, a defendant's convictions that keep their
+misdemeanor, felony, and habitual results up to date as convictions are added
+and removed one at a time (IE: when a pending charge becomes a conviction),
+instead of running every machine over the whole record again.
+
+IncrementalRecord is a Charges_Convicted, so:
+    (1) the felony points change only by the difference in the points of the
+    conviction date that was touched (see DateSummary),
+    (2) the misdemeanor points change only when a conviction date appears or
+    disappears.
+For habitual status it also keeps the felonies that can count toward it (see
+habitual_machine.counts_for_habitual) in strike_order, and the strikes
+the strike states would pick from them. A strike depends only on the strikes
+before it and the felonies after them, so when a felony is added or removed
+at some position, the strikes before that position stand and the chain is
+scanned again from that position only. A change after the third strike does
+not scan at all.
+
+Finding the place of a change is a binary search (O(log n) comparisons), as
+in the other collections. The results are the same as running the record
+(IE: with record_kernel.run_record) over the charges view from scratch.
+'''
+from bisect import bisect_left
+from src.charge_collection import Charges_Convicted
+from src.dumbwaiter import Dumbwaiter
+from src.habitual_machine import counts_for_habitual, is_next_strike
+from src.record_kernel import RecordResult
+
+class IncrementalRecord(Charges_Convicted):
+    '''This is a defendant's convictions with running record results. It
+    takes the defendant's birthdate (a datetime date object), and any
+    convictions to start with.'''
+
+    def __init__(self, birthdate, charges=()):
+        self._dumbwaiter = Dumbwaiter(birthdate)      # validates the birthdate
+        super().__init__(charges)
+
+    def _reset_charges(self):
+        '''This also empties the habitual felonies and strikes.'''
+        super()._reset_charges()
+        self._felony_keys = []          # sorted (offense ordinal,) + sort key
+        self._felonies = []             # the felonies, in the same order
+        self._strike_keys = []          # the keys of the strikes, in order
+
+    def add_charge(self, charge):
+        '''This adds a conviction and brings the results up to date.'''
+        super().add_charge(charge)
+        if counts_for_habitual(charge):
+            key = (charge.offense_date.toordinal(),) + self._key_of[id(charge)]
+            position = bisect_left(self._felony_keys, key)
+            self._felony_keys.insert(position, key)
+            self._felonies.insert(position, charge)
+            self._rescan(key)
+
+    def remove_charge(self, index):
+        '''This deletes a conviction by index, brings the results up to date,
+        and returns the conviction.'''
+        if not -len(self._keys) <= index < len(self._keys):
+            raise ValueError("This charge is not in _charges.")
+        sort_key = self._keys[index]
+        charge = super().remove_charge(index)
+        if counts_for_habitual(charge):
+            key = (charge.offense_date.toordinal(),) + sort_key
+            position = bisect_left(self._felony_keys, key)
+            del self._felony_keys[position]
+            del self._felonies[position]
+            self._rescan(key)
+        return charge
+
+    def _rescan(self, changed_key):
+        '''This keeps the strikes before the felony that was added or removed
+        and picks the rest again, scanning from where it was.'''
+        kept = bisect_left(self._strike_keys, changed_key)
+        if kept == len(self._strike_keys) == 3:
+            return                      # the change came after the 3rd strike
+        del self._strike_keys[kept:]
+        position = bisect_left(self._felony_keys, changed_key)
+        while len(self._strike_keys) < 3 and position < len(self._felonies):
+            felony = self._felonies[position]
+            last_strike = self._last_strike() if self._strike_keys else None
+            if is_next_strike(felony, last_strike, self._dumbwaiter):
+                self._strike_keys.append(self._felony_keys[position])
+            position += 1
+
+    def _last_strike(self):
+        return self._felonies[bisect_left(self._felony_keys,
+                                            self._strike_keys[-1])]
+
+    @property
+    def birthdate(self):
+        return self._dumbwaiter.birthdate
+
+    @property
+    def habitual_convictions(self):
+        '''This returns the strikes counting toward habitual status.'''
+        return [ self._felonies[bisect_left(self._felony_keys, key)] \
+            for key in self._strike_keys ]
+
+    @property
+    def hab_eligible(self):
+        '''This returns True if the record makes the Defendant eligible for
+        habitual status.'''
+        return len(self._strike_keys) == 3
+
+    @property
+    def date_eligible(self):
+        '''This returns the date the Defendant became eligible for habitual
+        status (the conviction date of the third strike), or None.'''
+        if not self.hab_eligible:
+            return None
+        return self._last_strike().conviction_date
+
+    def result(self):
+        '''This returns the results as a RecordResult, as run_record would.'''
+        return RecordResult(self.misdemeanor_points, self.misdemeanor_level,
+                            self.felony_points, self.felony_level,
+                            self.hab_eligible, self.date_eligible,
+                            tuple(self.habitual_convictions))
@@ -0,0 +1,144 @@
+'''
+This module is a JSON Lines interface for calculating records, for shell
+pipelines and other services rather than the prompts of the CLI.
+
+Each input line is one defendant:
+    {"id": 17, "first": "John", "last": "Doe", "birthdate": "1999-01-01",
+     "convictions": [ {"crime": "PSG", "crime_class": "Class H Felony",
+                       "offense_date": "2014-01-01",
+                       "conviction_date": "2015-02-02",
+                       "conviction_loc": "Randolph County",
+                       "statute": "14-72"}, ... ],
+     "pendings": [ ... the same, with "conviction_date": null ... ]}
+"id" is optional and is passed through to the output untouched. Each output
+line is the result for the input line in the same place:
+    {"id": 17, "misdemeanor_points": 3, "misdemeanor_level": 2,
+     "felony_points": 8, "felony_level": 3, "hab_eligible": true,
+     "date_eligible": "2018-01-03", "habitual_pendings": [0]}
+habitual_pendings are the positions in "pendings" of the pending charges
+eligible for habitual status. A line that cannot be run gives
+{"id": ..., "line": n, "error": "..."} instead, and the run goes on.
+
+The input is read a line at a time, and the output is written (and flushed)
+batch_size lines at a time. Run it with:
+    python -m src.jsonl_interface [--batch-size N] [input [output]]
+(standard input and output by default).
+'''
+import argparse
+import json
+import sys
+from src.charge import Charge, FIELDS
+from src.csv_ingest import _parse_date
+from src.defendant import Defendant
+from src.run_all_records import RecordRunner
+
+def _date(value):
+    '''This returns the date of an ISO date string. Anything else is 
+    returned as it is, for the validation to report.'''
+    return _parse_date(value) if type(value) == str else value
+
+def _charges(values:list, name:str, convicted:bool=False):
+    '''This builds the charges of a list of JSON objects, raising a ValueError
+    for the first bad one. If convicted, a charge with no conviction date is
+    bad too.'''
+    if type(values) != list:
+        raise ValueError(f"{name} must be a list.")
+    rows = []
+    for value in values:
+        if type(value) != dict:
+            raise ValueError(f"Each of the {name} must be an object.")
+        row = [ value.get(field) for field in FIELDS ]
+        row[2], row[3] = _date(row[2]), _date(row[3])   # the dates
+        rows.append(row)
+    batch = Charge.from_rows(rows)
+    if batch.errors:
+        error = batch.errors[0]
+        raise ValueError(f"{name}[{error.row}].{error.field}: {error.reason}")
+    for row, charge in enumerate(batch.charges):
+        if convicted and charge.conviction_date is None:
+            raise ValueError(f"{name}[{row}].conviction_date: A conviction \
+must have a conviction date.")
+    return batch.charges
+
+def run_line(line:str, runner:RecordRunner):
+    '''This runs the defendant of one JSON line and returns the result as a
+    dict. It raises a ValueError if the line is invalid.'''
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"The line is not valid JSON: {error}")
+    if type(record) != dict:
+        raise ValueError("The line must be a JSON object.")
+    defendant = Defendant(record.get("first"), record.get("last"),
+                            _date(record.get("birthdate")))
+    pendings = _charges(record.get("pendings", []), "pendings")
+    report = runner.run(defendant,
+                        _charges(record.get("convictions", []), "convictions",
+                                    convicted=True),
+                        pendings)
+    positions = { id(pending): i for i, pending in enumerate(pendings) }
+    return { "id": record.get("id"),
+        "misdemeanor_points": report.misdemeanor_points,
+        "misdemeanor_level": report.misdemeanor_level,
+        "felony_points": report.felony_points,
+        "felony_level": report.felony_level,
+        "hab_eligible": report.hab_eligible,
+        "date_eligible": report.date_eligible.isoformat() if \
+            report.date_eligible else None,
+        "habitual_pendings": [ positions[id(pending)] for pending in \
+            report.habitual_pendings ] }
+
+def _error(line:str, number:int, reason:str):
+    '''This returns the output dict of a line that could not be run.'''
+    try:
+        record = json.loads(line)
+        record_id = record.get("id") if type(record) == dict else None
+    except json.JSONDecodeError:
+        record_id = None
+    return { "id": record_id, "line": number, "error": reason }
+
+def run_jsonl(lines, output, batch_size:int=1000, runner=None):
+    '''This reads defendants from lines (IE: an open file), one JSON object a
+    line, and writes one JSON result line for each to output, batch_size
+    lines at a time. Blank lines are skipped. It returns the number of
+    results written.'''
+    if type(batch_size) != int or batch_size < 1:
+        raise ValueError("The batch_size must be a positive int.")
+    runner = RecordRunner() if runner is None else runner
+    buffered = []
+    written = 0
+    for number, line in enumerate(lines, 1):
+        if line.strip() == "":
+            continue
+        try:
+            result = run_line(line, runner)
+        except ValueError as error:
+            result = _error(line, number, str(error))
+        buffered.append(json.dumps(result, separators=(",", ":")) + "\n")
+        if len(buffered) == batch_size:
+            written += _flush(buffered, output)
+    return written + _flush(buffered, output)
+
+def _flush(buffered:list, output):
+    '''This writes out and empties the buffered lines, returning how many
+    there were.'''
+    count = len(buffered)
+    if count:
+        output.write("".join(buffered))
+        output.flush()
+        buffered.clear()
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate the records of \
+defendants given as JSON Lines.")
+    parser.add_argument("input", nargs="?", type=argparse.FileType("r"),
+                        default=sys.stdin)
+    parser.add_argument("output", nargs="?", type=argparse.FileType("w"),
+                        default=sys.stdout)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    run_jsonl(args.input, args.output, args.batch_size)
+
+if __name__ == "__main__":
+    main()
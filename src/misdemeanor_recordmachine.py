@@ -6,6 +6,10 @@ should take a list of convictions and return:
     (3) a list of qualified convictions, 
     (4) the date the Defendant qualifies as a record level 2 and/or 3 (if so).
 '''
+from collections import namedtuple
+import heapq
+from datetime import date
+from src.charge import _UNCONVICTED_ERROR, _is_record
 
 class State:
     '''This is the base state for a misdemeanor record. Misdemeanor records 
@@ -27,6 +31,17 @@ class State:
     def __str__(self):
         return self.__class__.__name__
 
+def misdemeanor_level(points:int):
+    '''This returns the misdemeanor record level for a number of points. 0 
+    points returns level 1; 1-4 points returns level 2; and 5+ points returns 
+    level 3.'''
+    if points < 1:
+        return 1
+    elif points < 5:
+        return 2
+    else:
+        return 3
+
 #------- These are the concrete states:------------------
 class StartState(State):
     '''This represents the beginning of an statemachine analyzing a criminal 
@@ -35,22 +50,25 @@ class StartState(State):
     up the next step, screening out the convictions which do not count for a 
     misdemeanot record.'''
     def on_event(self, convictions:list, points:int): 
-        if convictions == []:     # there are no priors
-            return FinishedState().on_event(convictions, points)
-        elif type(convictions) == list and len(convictions) >= 1:   # priors
-            return ScreeningState().on_event(convictions, points)
-        else:
+        if not _is_record(convictions):
             raise ValueError("There was an exception in the StartState. \
 The parameter values are likely invalid.")
+        elif len(convictions) == 0:     # there are no priors
+            return FinishedState().on_event([], points)
+        else:                           # priors
+            return ScreeningState().on_event(convictions, points)
 
 class ScreeningState(State):
     '''This State screens out any convictions that cannot count in a misdemeanor
     record. At that point, if there are no convictions left, the code should 
     transition to FinishedState . Ortherwise, transition to RescreeningState 
-    for further pre-processing steps.'''
+    for further pre-processing steps. A conviction with no conviction date 
+    raises a ValueError.'''
     def on_event(self, convictions:list, points:int): 
-        screened = [ conv for conv in convictions if conv.is_felony or \
-            conv.is_misdemeanor ]    # either counts for misdemeanor records
+        if any( conv.conviction_date is None for conv in convictions ):
+            raise ValueError(_UNCONVICTED_ERROR)
+        screened = [ conv for conv in convictions if \
+            conv.classification.counts_for_misdemeanor_record ]
         if screened == []:
             return FinishedState().on_event(screened, points)
         else:
@@ -71,9 +89,7 @@ class ZippingState(State):
     def make_list_of_unique_dates(self, convictions:list):
         '''This takes a list of convictions and returns a list of all the unique
         conviction dates.'''
-        all_dates = [ c.conviction_date for c in convictions ]
-        uniques = list(set(all_dates))
-        return uniques   # should return dt dates in chron order (early->late)
+        return sorted({ c.conviction_date for c in convictions }) # early->late
 
     def make_list_of_empties(self, unique_dates:list):
         '''This takes a list of unique dates and returns a 2-D list with an 
@@ -86,34 +102,43 @@ class ZippingState(State):
         '''This helper puts convictions with the same conviction_date value in 
         the same inner list of a 2-D list.'''
         convictions_grouped_bydate = empties
+        positions = { d: index for index, d in enumerate(unique_dates) }
         for c in convictions:
-            index_matchingdate = unique_dates.index(c.conviction_date)
-            convictions_grouped_bydate[ index_matchingdate ].append(c)
+            convictions_grouped_bydate[ positions[c.conviction_date] ].append(c)
         return convictions_grouped_bydate
 
 class FinishedState(State):
-    '''This is the end state and hanles calculating the points.'''
+    '''This is the end state and hanles calculating the points. It also has 
+    level2_date and level3_date: the conviction dates on which the record 
+    reached level 2 (the first qualifying date) and level 3 (the fifth), or 
+    None if it has not.'''
     def on_event(self, convictions_grouped_bydate:list, points:int):
         '''This mehtod takes a list of lists. Each inner list represents all the
         convictions on a given date, having screened out the non-qualified 
         offenses for misdemeanor sentencing (ie: infractions). Each separate 
         conviction date counts as 1 point. 0 points returns level 1; 1-4 points
         returns level 2; and  5+ points returns level 3.'''
-        self.points = len(convictions_grouped_bydate)
+        dates = sorted( group[0].conviction_date for group in \
+            convictions_grouped_bydate )
+        return self.finish( self.flattener(convictions_grouped_bydate), 
+                            len(dates), dates[0] if dates else None, 
+                            dates[4] if len(dates) >= 5 else None )
+
+    def finish(self, convictions:list, points:int, level2_date, level3_date):
+        '''This sets the results worked out by an engine (IE: 
+        tally_misdemeanor_record) and returns the finished state.'''
+        self.points = points
         self.level = self.leveler()
-        self.convictions = self.flattener(convictions_grouped_bydate)
+        self.convictions = convictions
+        self.level2_date = level2_date
+        self.level3_date = level3_date
         return self
 
     def leveler(self):
         '''This simply takes the misdemeanor points for a record and returns the
         appropriate level for the number of points. 0 points returns level 1; 
         1-4 points returns level 2; and 5+ points returns level 3.'''
-        if self.points < 1:
-            return 1
-        elif 1 <= self.points < 5:
-            return 2
-        else:
-            return 3
+        return misdemeanor_level(self.points)
     
     def flattener(self, convictions_grouped_bydate:list):
         '''This flattens out a 2-D list (lists of convictions grouped by date.'''
@@ -122,6 +147,61 @@ class FinishedState(State):
             convictions.extend(_list)
         return convictions
 
+def tally_misdemeanor_record(convictions):
+    '''This is the engine behind MisdemeanorRecordMachine. In one pass over 
+    the convictions it returns a tuple of:
+        (1) the qualifying convictions (misdemeanors and felonies), in order,
+        (2) the points (the number of distinct qualifying conviction dates, 
+        counted with a set),
+        (3) the date the record reached level 2 (the earliest qualifying 
+        conviction date), or None,
+        (4) the date the record reached level 3 (the fifth-earliest qualifying 
+        conviction date), or None.
+    The five earliest dates are kept in a heap of at most five entries, so the 
+    convictions never need sorting. A conviction with no conviction date 
+    raises a ValueError.'''
+    qualified = []
+    seen = set()
+    earliest = []           # max-heap (negated ordinals) of the 5 earliest
+    for conviction in convictions:
+        day = conviction.conviction_date
+        if day is None:
+            raise ValueError(_UNCONVICTED_ERROR)
+        if not conviction.classification.counts_for_misdemeanor_record:
+            continue
+        qualified.append(conviction)
+        if day in seen:
+            continue
+        seen.add(day)
+        if len(earliest) < 5:
+            heapq.heappush(earliest, -day.toordinal())
+        elif day.toordinal() < -earliest[0]:
+            heapq.heapreplace(earliest, -day.toordinal())
+    level2_date = level3_date = None
+    if earliest:
+        level2_date = date.fromordinal(-max(earliest))
+    if len(earliest) == 5:
+        level3_date = date.fromordinal(-earliest[0])
+    return qualified, len(seen), level2_date, level3_date
+
+MisdemeanorRecord = namedtuple("MisdemeanorRecord", [ "points", "level", 
+                                "convictions", "level2_date", "level3_date" ])
+MisdemeanorRecord.__doc__ = '''The misdemeanor record of a record: the points, 
+the level, a tuple of the qualifying convictions, and the dates the record 
+reached levels 2 and 3 (or None).'''
+
+def misdemeanor_record(convictions):
+    '''This returns the MisdemeanorRecord of the convictions (a list or other 
+    sequence of them) straight from tally_misdemeanor_record, with no state 
+    object in between. Anything but a sequence raises a ValueError.'''
+    if not _is_record(convictions):
+        raise ValueError("The convictions must be a list (or other sequence) \
+of convictions.")
+    qualified, points, level2_date, level3_date = \
+        tally_misdemeanor_record(convictions)
+    return MisdemeanorRecord(points, misdemeanor_level(points), 
+                            tuple(qualified), level2_date, level3_date)
+
 #--------- The State Machine:-----------------
 class MisdemeanorRecordMachine:
     '''MisdmeanorRecordMachine calculates a defendant's misdemeanor record from 
@@ -133,14 +213,27 @@ class MisdemeanorRecordMachine:
     (2) the record level,   
     (3) a list of qualified convictions, 
     (4) the date the Defendant qualifies as a record level 2 and/or 3 (if so).
+
+    Each call to on_event tallies its record from nothing and returns the 
+    MisdemeanorRecord. The properties above are read from the FinishedState 
+    of the most recent call.
 '''
     def __init__(self):
         self.state = StartState() # starting state set
     
     def on_event(self, convictions:list):
         '''This method takes a list of convictions and runs the logic of 
-        determining the level and points. '''
-        self.state = self.state.on_event(convictions, 0)
+        determining the level and points with tally_misdemeanor_record, and 
+        returns the MisdemeanorRecord.'''
+        if _is_record(convictions):
+            state = FinishedState().finish(
+                                    *tally_misdemeanor_record(convictions))
+        else:
+            state = StartState().on_event(convictions, 0)
+        self.state = state
+        return MisdemeanorRecord(state.points, state.level, 
+                                tuple(state.convictions), state.level2_date, 
+                                state.level3_date)
 
     @property
     def points(self):
@@ -156,4 +249,28 @@ on_event() method has run with the record.")
             return self.state.level
         else:
             raise Exception("The level cannot be determined until the \
-on_event() method has run with the record.")
\ No newline at end of file
+on_event() method has run with the record.")
+
+    @property
+    def convictions(self):
+        '''This returns the convictions that qualify for the misdemeanor 
+        record.'''
+        return self._finished("convictions").convictions
+
+    @property
+    def level2_date(self):
+        '''This returns the conviction date on which the record reached level 
+        2, or None.'''
+        return self._finished("level 2 date").level2_date
+
+    @property
+    def level3_date(self):
+        '''This returns the conviction date on which the record reached level 
+        3, or None.'''
+        return self._finished("level 3 date").level3_date
+
+    def _finished(self, name:str):
+        if FinishedState == type(self.state):
+            return self.state
+        raise Exception(f"The {name} cannot be determined until the \
+on_event() method has run with the record.")
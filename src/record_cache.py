@@ -0,0 +1,143 @@
+'''
+This module has RecordCache, a cache of record results, for records that are
+run again and again (IE: once for every new pending charge or hearing).
+
+A result is looked up by a fingerprint of the record: the sha256 of the rule
+set version, the birthdate, and the values (Charge.key()) of the convictions
+in sorted order. So the same record gives the same fingerprint however its
+convictions are ordered, whichever Charge objects hold them, and in any
+process. Pending charges do not change the result, so they are not part of
+it. RULESET_VERSION must be raised whenever the rules change (IE: the points
+of a class or the statute rules), so old results are never used.
+
+There are two tiers:
+    (1) an in-memory LRU of up to maxsize results,
+    (2) optionally, a SQLite file at path, which keeps the results between
+    sessions (and is shared by every RecordCache opened on it).
+A result is stored as its figures plus the positions of the habitual
+convictions in the sorted record, so a hit hands back the caller's own
+Charge objects. hits, disk_hits, and misses count the lookups.
+
+The engines scan felonies in strike_order (see habitual_machine), so a
+result does not depend on the order of the convictions, and a cached result is
+the one run_record would give. A miss runs the convictions in their sorted
+order all the same, so the stored positions mean the same thing to every
+caller with that fingerprint.
+'''
+from collections import OrderedDict, namedtuple
+from datetime import date
+import hashlib
+import json
+import sqlite3
+from src.dumbwaiter import Dumbwaiter
+from src.record_kernel import RecordResult, run_record
+
+RULESET_VERSION = 1
+
+CacheStats = namedtuple("CacheStats", [ "hits", "disk_hits", "misses",
+                                        "size" ])
+CacheStats.__doc__ = '''The counters of a RecordCache: lookups answered from
+memory, from disk, and not at all, and the number of results in memory.'''
+
+def _key(charge):
+    '''This returns the values of a charge as strings, for sorting and
+    fingerprinting.'''
+    return tuple( "" if value is None else str(value) for value in \
+        charge.key() )
+
+def fingerprint(convictions, birthdate:date):
+    '''This returns the fingerprint (a hex sha256) of a record, and the order
+    that sorts its convictions (a list of positions).'''
+    keys = [ _key(conviction) for conviction in convictions ]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    digest = hashlib.sha256(repr(( RULESET_VERSION, birthdate.isoformat(),
+                            [ keys[i] for i in order ] )).encode("utf-8"))
+    return digest.hexdigest(), order
+
+class RecordCache:
+    '''RecordCache keeps the results of run_record. Use its run_record in
+    place of record_kernel.run_record (or pass it to RecordRunner).'''
+
+    def __init__(self, maxsize:int=1024, path=None):
+        if type(maxsize) != int or maxsize < 1:
+            raise ValueError("The maxsize must be a positive int.")
+        self.maxsize = maxsize
+        self._memory = OrderedDict()    # fingerprint: stored value, LRU last
+        self._disk = None
+        if path is not None:
+            self._disk = sqlite3.connect(path)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS results \
+(fingerprint TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        '''This closes the on-disk tier, if there is one.'''
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    @property
+    def stats(self):
+        '''This returns the CacheStats of the cache.'''
+        return CacheStats(self.hits, self.disk_hits, self.misses,
+                            len(self._memory))
+
+    def run_record(self, convictions, birthdate:date):
+        '''This returns the RecordResult of the record, from the cache if it
+        has been run before, and otherwise from record_kernel.run_record.'''
+        Dumbwaiter(birthdate)           # validates the birthdate
+        convictions = tuple(convictions)
+        key, order = fingerprint(convictions, birthdate)
+        stored = self._memory.get(key)
+        if stored is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+        else:
+            stored = self._load(key)
+            if stored is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                stored = self._store(key, convictions, order, run_record(
+                    [ convictions[i] for i in order ], birthdate))
+            self._remember(key, stored)
+        figures, positions = stored
+        return RecordResult(*figures,
+                    tuple( convictions[order[i]] for i in positions ))
+
+    def _store(self, key:str, convictions:tuple, order:list, 
+    result:RecordResult):
+        '''This turns a result into its stored value, and saves it to disk 
+        too if there is an on-disk tier.'''
+        rank = { id(convictions[j]): i for i, j in enumerate(order) }
+        figures = tuple(result[:6])
+        positions = tuple( rank[id(conviction)] for conviction in \
+            result.habitual_convictions )
+        if self._disk is not None:
+            value = list(figures)
+            if value[5] is not None:
+                value[5] = value[5].isoformat()         # date_eligible
+            with self._disk:
+                self._disk.execute("INSERT OR REPLACE INTO results \
+(fingerprint, value) VALUES (?, ?)", (key, json.dumps([ value, positions ])))
+        return figures, positions
+
+    def _remember(self, key:str, stored):
+        '''This puts a stored value in the LRU, dropping the least recently
+        used if it is full.'''
+        self._memory[key] = stored
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _load(self, key:str):
+        '''This returns the stored value for key from disk, or None.'''
+        if self._disk is None:
+            return None
+        row = self._disk.execute("SELECT value FROM results WHERE \
+fingerprint = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        figures, positions = json.loads(row[0])
+        if figures[5] is not None:
+            figures[5] = date.fromisoformat(figures[5])
+        return tuple(figures), tuple(positions)
@@ -0,0 +1,68 @@
+'''
+This module has run_record, a fused engine that works out a defendant's whole
+record in one go: the misdemeanor points and level, the felony record points
+and level, and habitual felon eligibility (with the date the Defendant became
+eligible).
+
+Runner used to run MisdemeanorRecordMachine, Felony_RecordMachine, and
+HabitualMachine one after another, and each of them screened and grouped the
+same convictions again. run_record walks the convictions once, keeping one
+dictionary of conviction date: highest felony record points. Every date in it
+is a misdemeanor record point (it has a misdemeanor or felony), and the sum of
+its values is the felony record points. On the same walk it collects the
+felonies that can count toward habitual status. Those are then sorted by
+strike_order (offense date, then conviction date), which is the only sort, and
+scanned for strikes. The habitual rules themselves (counts_for_habitual and
+is_next_strike) come from the habitual machine, so the engines cannot drift.
+
+The results match the three machines (see test/test_record_kernel.py).
+'''
+from collections import namedtuple
+from src.charge import _UNCONVICTED_ERROR
+from src.dumbwaiter import Dumbwaiter
+from src.felony_record_statemachine import FinishedState as FelonyFinished
+from src.habitual_machine import counts_for_habitual, is_next_strike, \
+    strike_order
+from src.misdemeanor_recordmachine import misdemeanor_level
+
+RecordResult = namedtuple("RecordResult", [ "misdemeanor_points",
+    "misdemeanor_level", "felony_points", "felony_level", "hab_eligible",
+    "date_eligible", "habitual_convictions" ])
+RecordResult.__doc__ = '''The results of run_record. habitual_convictions is a
+tuple of the strikes counted toward habitual status.'''
+
+def run_record(convictions, birthdate):
+    '''This takes a defendant's convictions (any iterable; it is not changed)
+    and birthdate and returns a RecordResult. The birthdate must be a datetime
+    date object, as for HabitualMachine. A conviction with no conviction date 
+    raises a ValueError, as in the machines.'''
+    dumbwaiter = Dumbwaiter(birthdate)
+    highest = {}                        # conviction date: highest points
+    felonies = []
+    for conviction in convictions:
+        day = conviction.conviction_date
+        if day is None:
+            raise ValueError(_UNCONVICTED_ERROR)
+        classification = conviction.classification
+        if not classification.counts_for_misdemeanor_record:
+            continue                    # infractions count for nothing
+        points = conviction.felony_record_points
+        if points > highest.get(day, -1):
+            highest[day] = points
+        # is_felony is checked here too only to skip the call for misdemeanors
+        if classification.is_felony and counts_for_habitual(conviction):
+            felonies.append(conviction)
+    felonies.sort(key=strike_order)
+    strikes = dumbwaiter.habitual_convictions
+    for felony in felonies:
+        if is_next_strike(felony, strikes[-1] if strikes else None, 
+            dumbwaiter):
+            strikes.append(felony)
+            if len(strikes) == 3:
+                dumbwaiter.hab_eligible = True
+                dumbwaiter.date_eligible = felony.conviction_date
+                break
+    points = sum(highest.values())
+    return RecordResult(len(highest), misdemeanor_level(len(highest)), points,
+                        FelonyFinished.leveler(points), dumbwaiter.hab_eligible,
+                        dumbwaiter.date_eligible, tuple(strikes))
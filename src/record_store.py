@@ -0,0 +1,172 @@
+'''
+This module has RecordStore, a local SQLite store of defendants and their
+charges, so a record entered or parsed once can be run again (IE: every
+night) without reloading the whole extract.
+
+The store has two tables:
+    defendants  id, first, last, birthdate
+    charges     id, defendant_id, crime, crime_class, offense_date,
+                conviction_date (NULL for a pending charge), conviction_loc,
+                statute
+Dates are stored as day ordinals (date.toordinal()), and charges are indexed
+by defendant, by conviction date, and by crime class.
+
+Records are added in bulk inside one transaction (add_records), and read back
+by a streaming cursor (records), which yields a StoredRecord, ready for
+RecordRunner.run, for one defendant at a time. The charges were validated when
+they were stored, so they are rebuilt with Charge.from_rows(trusted=True).
+'''
+from collections import namedtuple
+from datetime import date
+from itertools import groupby, islice
+import sqlite3
+from src.charge import Charge
+from src.defendant import Defendant
+
+StoredRecord = namedtuple("StoredRecord", [ "defendant_id", "defendant",
+                                            "convictions", "pendings" ])
+StoredRecord.__doc__ = '''A defendant read from a RecordStore, with their
+convictions and pending charges as lists of charges.'''
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS defendants (
+    id INTEGER PRIMARY KEY,
+    first TEXT NOT NULL,
+    last TEXT NOT NULL,
+    birthdate INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS charges (
+    id INTEGER PRIMARY KEY,
+    defendant_id INTEGER NOT NULL REFERENCES defendants (id),
+    crime TEXT NOT NULL,
+    crime_class TEXT NOT NULL,
+    offense_date INTEGER NOT NULL,
+    conviction_date INTEGER,
+    conviction_loc TEXT NOT NULL,
+    statute TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS charges_by_defendant ON charges (defendant_id);
+CREATE INDEX IF NOT EXISTS charges_by_conviction_date
+    ON charges (conviction_date);
+CREATE INDEX IF NOT EXISTS charges_by_crime_class ON charges (crime_class);
+'''
+
+_SELECT = '''SELECT d.id, d.first, d.last, d.birthdate, c.crime, c.crime_class,
+    c.offense_date, c.conviction_date, c.conviction_loc, c.statute
+    FROM defendants d LEFT JOIN charges c ON c.defendant_id = d.id'''
+
+_INSERT_CHARGE = '''INSERT INTO charges (defendant_id, crime, crime_class,
+    offense_date, conviction_date, conviction_loc, statute)
+    VALUES (?, ?, ?, ?, ?, ?, ?)'''
+
+def _charge_values(crime, crime_class, offense, convicted, location, statute):
+    '''This turns the charge columns of a row back into Charge values.'''
+    return ( crime, crime_class, date.fromordinal(offense), 
+            date.fromordinal(convicted) if convicted else None, location, 
+            statute )
+
+class RecordStore:
+    '''RecordStore keeps defendants and their charges in a SQLite database at
+    path (":memory:" for a store that is not saved). It can be used as a
+    context manager, which closes it.'''
+
+    def __init__(self, path=":memory:"):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        '''This returns the number of defendants in the store.'''
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM defendants").fetchone()[0]
+
+    def add_records(self, records):
+        '''This takes an iterable of (defendant, convictions, pendings) and
+        stores them all in one transaction (nothing is stored if any fails).
+        It returns the list of the new defendant ids.'''
+        ids = []
+        with self._connection:
+            for defendant, convictions, pendings in records:
+                ids.append(self._insert(defendant, list(convictions) +
+                                        list(pendings)))
+        return ids
+
+    def add_record(self, defendant:Defendant, convictions, pendings=()):
+        '''This stores one defendant and their charges, and returns the new
+        defendant id.'''
+        return self.add_records([ (defendant, convictions, pendings) ])[0]
+
+    def _insert(self, defendant:Defendant, charges:list):
+        '''This inserts a defendant and their charges (in the transaction of
+        the caller).'''
+        if Defendant != type(defendant):
+            raise ValueError("Only valid Defendant objects may be stored.")
+        if not all( Charge == type(charge) for charge in charges ):
+            raise ValueError("Only valid Charge objects may be stored.")
+        defendant_id = self._connection.execute( "INSERT INTO defendants \
+(first, last, birthdate) VALUES (?, ?, ?)", (defendant.first, defendant.last,
+            defendant.birthdate.toordinal()) ).lastrowid
+        self._connection.executemany(_INSERT_CHARGE, [ (defendant_id,
+            charge.crime, charge.crime_class, charge.offense_date.toordinal(),
+            charge.conviction_date.toordinal() if charge.conviction_date \
+            else None, charge.conviction_loc, charge.statute) \
+            for charge in charges ])
+        return defendant_id
+
+    def records(self, defendant_ids=None, batch_size:int=500):
+        '''This yields a StoredRecord for each defendant in defendant_ids (or
+        every defendant, by id), reading the rows from a cursor rather than
+        all at once. Ids not in the store are skipped. The ids are looked up
+        batch_size at a time.'''
+        if defendant_ids is None:
+            yield from self._read(self._connection.execute(
+                                    _SELECT + " ORDER BY d.id, c.id"))
+            return
+        ids = iter(defendant_ids)
+        batch = list(islice(ids, batch_size))
+        while batch:
+            marks = ", ".join("?" * len(batch))
+            found = { record.defendant_id: record for record in self._read(
+                self._connection.execute(_SELECT + f" WHERE d.id IN ({marks}) \
+ORDER BY d.id, c.id", batch)) }
+            yield from ( found[i] for i in batch if i in found )
+            batch = list(islice(ids, batch_size))
+
+    def record(self, defendant_id:int):
+        '''This returns the StoredRecord of a defendant, or None.'''
+        return next(self.records([ defendant_id ]), None)
+
+    def _read(self, cursor):
+        '''This groups the rows of a cursor (sorted by defendant) into
+        StoredRecords.'''
+        for defendant_id, rows in groupby(cursor, key=lambda row: row[0]):
+            rows = list(rows)
+            first, last, birthdate = rows[0][1:4]
+            charges = Charge.from_rows([ _charge_values(*row[4:]) for row \
+                in rows if row[4] is not None ], trusted=True).charges
+            yield StoredRecord(defendant_id, Defendant(first, last,
+                date.fromordinal(birthdate)),
+                [ c for c in charges if c.conviction_date is not None ],
+                [ c for c in charges if c.conviction_date is None ])
+
+    def convicted_between(self, start:date, stop:date):
+        '''This returns the sorted ids of the defendants with a conviction
+        dated on or after start and before stop.'''
+        return [ row[0] for row in self._connection.execute( "SELECT DISTINCT \
+defendant_id FROM charges WHERE conviction_date >= ? AND conviction_date < ? \
+ORDER BY defendant_id", (start.toordinal(), stop.toordinal())) ]
+
+    def charged_with_class(self, crime_class:str):
+        '''This returns the sorted ids of the defendants with a charge of the
+        crime class (IE: "Class H Felony").'''
+        return [ row[0] for row in self._connection.execute( "SELECT DISTINCT \
+defendant_id FROM charges WHERE crime_class = ? ORDER BY defendant_id",
+            (crime_class,)) ]
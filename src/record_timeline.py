@@ -0,0 +1,90 @@
+'''
+This module has RecordTimeline, which answers what a defendant's record was
+as of any date: IE: the prior record for a pending charge's offense date, or
+the date a client reached each felony or misdemeanor level.
+
+It is built once per record. The convictions are grouped by conviction date
+(the highest felony record points on each date, and whether the date counts
+for a misdemeanor record), and running totals (prefix sums) of both are kept
+for the sorted dates. So:
+    as_of(date)     the points and levels from the convictions dated before
+                    the date, by one binary search (O(log n)),
+    as_of_each      the same for many dates or pending charges at once,
+    felony_level_dates, misdemeanor_level_dates
+                    the conviction date on which each level was first
+                    reached (level 1 is held from the start, so its date is
+                    None). A level that was skipped (IE: from 1 straight to 3)
+                    was reached on the same date as the next.
+The totals match the record machines (FinishedState.leveler and
+misdemeanor_level) for the convictions before each date.
+'''
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import date
+from src.charge import Charge, _UNCONVICTED_ERROR
+from src.felony_record_statemachine import FinishedState as FelonyFinished
+from src.misdemeanor_recordmachine import misdemeanor_level
+
+RecordAsOf = namedtuple("RecordAsOf", [ "felony_points", "felony_level",
+                                        "misdemeanor_points",
+                                        "misdemeanor_level" ])
+RecordAsOf.__doc__ = '''A record as of a date: the felony and misdemeanor
+points and levels from the convictions dated before it.'''
+
+class RecordTimeline:
+    '''RecordTimeline takes a defendant's convictions (any iterable) and
+    answers their record as of any date. A conviction with no conviction 
+    date raises a ValueError.'''
+
+    def __init__(self, convictions):
+        highest = {}                    # conviction ordinal: highest points
+        for conviction in convictions:
+            if conviction.conviction_date is None:
+                raise ValueError(_UNCONVICTED_ERROR)
+            if not conviction.classification.counts_for_misdemeanor_record:
+                continue                # infractions count for nothing
+            day = conviction.conviction_date.toordinal()
+            highest[day] = max(highest.get(day, 0),
+                                conviction.felony_record_points)
+        self._dates = sorted(highest)
+        self._felony_totals = [ 0 ]     # the totals before each date, and all
+        for day in self._dates:
+            self._felony_totals.append(self._felony_totals[-1] + highest[day])
+        self.felony_level_dates = self._level_dates(self._felony_totals,
+                                                    FelonyFinished.leveler)
+        self.misdemeanor_level_dates = self._level_dates(
+            range(len(self._dates) + 1), misdemeanor_level)
+
+    def _level_dates(self, totals, leveler):
+        '''This returns a dict of each level reached: the date it was first
+        reached (None for level 1).'''
+        reached = { 1: None }
+        level = 1
+        for i, total in enumerate(totals):
+            while leveler(total) > level:
+                level += 1
+                reached[level] = date.fromordinal(self._dates[i - 1])
+        return reached
+
+    def as_of(self, _date):
+        '''This returns the RecordAsOf from the convictions dated before
+        _date (a datetime date object).'''
+        if type(_date) != date:
+            raise ValueError("The method as_of() in RecordTimeline requires a \
+datetime date as a parameter.")
+        before = bisect_left(self._dates, _date.toordinal())
+        felony_points = self._felony_totals[before]
+        return RecordAsOf(felony_points, FelonyFinished.leveler(felony_points),
+                            before, misdemeanor_level(before))
+
+    def as_of_each(self, dates):
+        '''This takes dates, or pending Charge objects (their offense_date is
+        used), and returns the RecordAsOf for each, in the same order.'''
+        return [ self.as_of(d.offense_date if type(d) == Charge else d) \
+            for d in dates ]
+
+    @property
+    def conviction_dates(self):
+        '''This returns the distinct conviction dates that count for a record,
+        from earliest to latest.'''
+        return [ date.fromordinal(day) for day in self._dates ]
@@ -8,73 +8,105 @@ Responsibility:
 (2) run felonyrecordmachine
 (3) run habitual_machine
 (4) run dwi_factormachine
+
+RecordRunner does the work without any I/O: RecordRunner().run(defendant, 
+convictions, pendings) returns a RecordReport. Runner is the interactive CLI 
+around it, prompting for the record and printing the report.
 '''
+from collections import namedtuple
 from src.charge import Charge
 from src.defendant import Defendant
-from src.felony_record_statemachine import Felony_RecordMachine
-from src.habitual_machine import HabitualMachine
-from src.misdemeanor_recordmachine import MisdemeanorRecordMachine
+from src.record_kernel import run_record
 from src.defendant_maker import DefendantMaker
 from src.record_maker import RecordMaker
 from src.pending_maker import PendingMaker
 import typing
-import copy
+
+RecordReport = namedtuple("RecordReport", [ "defendant", "convictions", 
+    "pendings", "misdemeanor_points", "misdemeanor_level", "felony_points", 
+    "felony_level", "hab_eligible", "date_eligible", "habitual_convictions", 
+    "habitual_pendings" ])
+RecordReport.__doc__ = '''The results of RecordRunner.run for one defendant. 
+convictions, pendings, habitual_convictions, and habitual_pendings (the 
+pending charges eligible for habitual status) are tuples.'''
+
+class RecordRunner:
+    '''RecordRunner works out a defendant's records without prompting or 
+    printing, so it can be driven by other code (IE: batch jobs). If it is 
+    given a RecordCache, records that have been run before are answered from 
+    the cache.'''
+
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def run(self, defendant:Defendant, convictions, pendings=()):
+        '''This takes the defendant, the convictions, and the pending charges 
+        and returns a RecordReport. The convictions and pendings are not 
+        changed.'''
+        convictions = tuple(convictions)
+        pendings = tuple(pendings)
+        if self.cache is None:
+            result = run_record(convictions, defendant.birthdate)
+        else:
+            result = self.cache.run_record(convictions, defendant.birthdate)
+        habitual_pendings = ()
+        if result.hab_eligible:
+            habitual_pendings = tuple( pending for pending in pendings if \
+                pending.offense_date > result.date_eligible )
+        return RecordReport(defendant, convictions, pendings, 
+                            *result, habitual_pendings)
 
 class Runner:
     '''This class runs the record.'''
 
     def __init__(self):
-        '''This method takes the defendant and the convictions and runs 
-        the records.'''
-        self._defendant = DefendantMaker()._defendant
-        self._convictions = RecordMaker()._convictions
-        self._pendings = PendingMaker()._pendings
-        self._misdemeanor_recordmachine = MisdemeanorRecordMachine()
-        self._misdemeanor_recordmachine.on_event(copy.copy(self._convictions))
-        self._felony_recordmachine = Felony_RecordMachine()
-        self._felony_recordmachine.on_event(copy.copy(self._convictions))
-        self._habitualmachine = HabitualMachine()
-        self._habitualmachine.on_event( \
-            copy.copy(self._convictions), self._defendant.birthdate)
+        '''This method prompts for the defendant, the convictions, and the 
+        pending charges, runs the records with RecordRunner, and prints the 
+        report.'''
+        defendant = DefendantMaker()._defendant
+        convictions = RecordMaker()._convictions
+        pendings = PendingMaker()._pendings
+        self.report = RecordRunner().run(defendant, convictions, pendings)
         self.get_printout()
 
     @property
     def is_habitual(self):
         '''This returns True if the Defendant is habitual eligible, or else 
         false.'''
-        return self._habitualmachine.hab_eligible
+        return self.report.hab_eligible
 
     @property
     def date_eligible(self):
         '''This returns the date at which the Defendant became eligible for 
         habitual status.'''
-        return self._habitualmachine.date_eligible
+        return self.report.date_eligible
 
     @property
     def misdemeanorpoints(self):
         '''This returns the number of misdmenaor record points.'''
-        return self._misdemeanor_recordmachine.points
+        return self.report.misdemeanor_points
 
     @property
     def misdemeanorlevel(self):
         '''This returns the misdmenaor record level.'''
-        return self._misdemeanor_recordmachine.level
+        return self.report.misdemeanor_level
 
     @property
     def felonypoints(self):
         '''This returns the number of felony record points.'''
-        return self._felony_recordmachine.points
+        return self.report.felony_points
 
     @property
     def felonylevel(self):
         '''This returns the felony record level.'''
-        return self._felony_recordmachine.level
+        return self.report.felony_level
 
     def get_printout(self):
         '''This prints out the takeaway information.'''
-        print(f"{self._defendant.first} {self._defendant.last}, \
-born {self._defendant.birthdate.isoformat()}:")
-        print(f"Convictions:\t{str(self._convictions)}")
+        defendant = self.report.defendant
+        print(f"{defendant.first} {defendant.last}, \
+born {defendant.birthdate.isoformat()}:")
+        print(f"Convictions:\t{str(list(self.report.convictions))}")
         print(f"Misdemeanor points:\t{self.misdemeanorpoints}")
         print(f"Misdemeanor level:\t{self.misdemeanorlevel}")
         print(f"Felony points:\t\t{self.felonypoints}")
@@ -82,4 +114,4 @@ born {self._defendant.birthdate.isoformat()}:")
         print(f"Habitual Felony Eligible:\t{self.is_habitual}")
         print(f"Habitual Eligible as of:\t{self.date_eligible}")
         print()
-        print(f"Pending Charges:\t{str(self._pendings)}")
\ No newline at end of file
+        print(f"Pending Charges:\t{str(list(self.report.pendings))}")
\ No newline at end of file
@@ -0,0 +1,77 @@
+'''
+This module parses the statute of a charge (IE: "NCGS 20-141.4(a2)") once into
+a Statute with its chapter ("20"), section ("141.4"), and subsection ("(a2)"),
+and classifies it against the statute rules the record machines apply:
+
+    FELONY_RECORD_EXCLUDED  Chapter 20 (motor vehicle) offenses do not count
+                            for felony record points, except misdemeanor death
+                            by vehicle (20-141.4) and impaired driving
+                            (20-138.1 and 20-138.2).
+    HABITUAL_EXCLUDED       Habitual breaking and entering (14-7.31) and
+                            habitual misdemeanor assault (14-33.2) are screened
+                            out of the habitual felon analysis.
+
+The rules are compiled into a two-level table (chapter, then section), so
+classifying a statute is two dictionary lookups rather than substring scans
+(which misfire, IE: "20-" is a substring of "14-120-1"). parse_statute() keeps
+the most recently used statutes (up to STATUTE_CACHE_SIZE distinct texts), so
+the statutes a batch of records repeats are parsed and classified only once,
+while a long-running process cannot grow the cache without bound.
+'''
+import re
+from functools import lru_cache
+
+FELONY_RECORD_EXCLUDED = 1
+HABITUAL_EXCLUDED = 2
+
+# The most distinct statute texts parse_statute() keeps parsed at once
+STATUTE_CACHE_SIZE = 4096
+
+# chapter: (flags for any section of the chapter, { section: flags instead })
+_RULES = {
+    "20": ( FELONY_RECORD_EXCLUDED, { "141.4": 0, "138.1": 0, "138.2": 0 } ),
+    "14": ( 0, { "7.31": HABITUAL_EXCLUDED, "33.2": HABITUAL_EXCLUDED } ),
+}
+
+_CITATION = re.compile(r"(\d+[A-Z]*)-(\d+(?:\.\d+)*[A-Z]*)(.*)")
+
+class Statute:
+    '''This is a parsed statute. chapter, section, and subsection are None if
+    the text does not contain a citation such as "14-72" (IE: free text).'''
+    __slots__ = ( "text", "chapter", "section", "subsection", "flags" )
+
+    def __init__(self, text:str):
+        self.text = text
+        match = _CITATION.search(text)
+        if match:
+            self.chapter, self.section, subsection = match.groups()
+            self.subsection = subsection.strip()
+            chapter_flags, section_flags = _RULES.get(self.chapter, (0, {}))
+            self.flags = section_flags.get(self.section, chapter_flags)
+        else:
+            self.chapter = self.section = self.subsection = None
+            self.flags = 0
+
+    @property
+    def excluded_from_felony_record(self):
+        '''This returns True if a conviction under the statute never counts for
+        felony record points.'''
+        return bool(self.flags & FELONY_RECORD_EXCLUDED)
+
+    @property
+    def excluded_from_habitual(self):
+        '''This returns True if a conviction under the statute is screened out
+        of the habitual felon analysis.'''
+        return bool(self.flags & HABITUAL_EXCLUDED)
+
+    def __repr__(self):
+        return f"Statute({self.text!r})"
+
+    def __str__(self):
+        return self.text
+
+@lru_cache(maxsize=STATUTE_CACHE_SIZE)
+def parse_statute(text:str):
+    '''This returns the Statute for the text, parsing it only if the text is
+    not among the STATUTE_CACHE_SIZE most recently used.'''
+    return Statute(text)
@@ -0,0 +1,19 @@
+from src.charge import Charge
+import pytest
+from datetime import date
+
+@pytest.fixture
+def three_striker():
+    '''FOR USE WITH a defendant born 1/1/99. Three strikes, the first before turning 18, and a misdemeanor convicted with the third.'''
+    con1 = Charge("PSG", "Class H Felony", date(2014,1, 1), date(2015,2, 2), "Randolph County", "14-72")         # -- StrikeOne
+    con2 = Charge("PSG", "Class H Felony", date(2017,2, 1), date(2017,3, 1), "Randolph County", "14-72")         # -- StrikeTwo
+    con3 = Charge("PSG", "Class E Felony", date(2017,4, 1), date(2018,1, 3), "Randolph County", "14-72")         # -- StrikeThree
+    con4 = Charge("PSG", "Class 1 Misdemeanor", date(2017,4, 1), date(2018,1, 3), "Randolph County", "14-72")
+    return [ con1, con2, con3, con4 ]
+
+@pytest.fixture
+def pendings():
+    '''These are pending charges, one committed before and one after the three_striker record made the Defendant eligible.'''
+    pending1 = Charge("PSG", "Class H Felony", date(2018,1, 2), None, "Randolph County", "14-72")
+    pending2 = Charge("PSG", "Class H Felony", date(2019,1, 2), None, "Randolph County", "14-72")
+    return [ pending1, pending2 ]
@@ -0,0 +1,21 @@
+'''
+This is a helper for the differential tests: it makes random (but valid) 
+records so the faster engines can be checked against the record machines.
+'''
+from src.charge import Charge
+from src.crime_class import CRIME_CLASSES
+from datetime import date, timedelta
+import random
+
+STATUTES = [ "14-72", "14-33", "14-39", "14-87", "14-7.31", "14-33.2", "90-95(d)(2)", "20-138.1", "20-138.2", "20-141.4(a2)", "20-28(a1)",
+             "20-141", "14-120-1" ]
+
+def random_record(rng:random.Random, size:int, start=date(2000, 1, 1), span_days=8000):
+    '''This returns a list of size random convictions. Conviction dates are drawn from a small pool so that several convictions share a date.'''
+    pool = [ start + timedelta(days=rng.randrange(span_days)) for i in range(max(1, size // 2)) ]
+    record = []
+    for i in range(size):
+        convicted = rng.choice(pool)
+        offense = convicted - timedelta(days=rng.randrange(0, 700))
+        record.append(Charge("Crime", rng.choice(CRIME_CLASSES), offense, convicted, "Randolph County", rng.choice(STATUTES)))
+    return record
@@ -0,0 +1,67 @@
+from src.batch_runner import BatchRunner, BatchStats, _chunks
+from src.run_all_records import RecordRunner
+from src.defendant import Defendant
+from src.charge import Charge
+from test.random_records import random_record
+import pytest
+from datetime import date
+import random
+
+@pytest.fixture
+def cases():
+    '''These are 60 random cases of (defendant, convictions, pendings), each with its own defendant.'''
+    rng = random.Random(18)
+    return [ (Defendant("John", f"Doe{i}", date(1985, 1, 1)), random_record(rng, rng.randrange(20), start=date(2003, 1, 1)),
+        [ Charge("PSG", "Class H Felony", date(2010 + i % 15, 1, 1), None, "Randolph County", "14-72") ]) for i in range(60) ]
+
+def test_chunks():
+    '''The cases are split into chunks of chunksize, the last one shorter.'''
+    assert [ [0, 1, 2], [3, 4, 5], [6] ] == list(_chunks(iter(range(7)), 3))
+    assert [] == list(_chunks([], 3))
+
+def test_batch_runner_ordered(cases):
+    '''The reports come back in the order of the cases and match RecordRunner.'''
+    runner = BatchRunner(workers=2, chunksize=7)
+    reports = runner.run_all(cases)
+    expected = [ RecordRunner().run(*case) for case in cases ]
+    assert expected == reports
+    assert any( report.habitual_pendings for report in reports )
+    assert BatchStats == type(runner.stats)
+    assert 60 == runner.stats.defendants
+    assert sum( len(case[1]) for case in cases ) == runner.stats.convictions
+    assert runner.stats.per_second > 0
+
+def test_batch_runner_as_completed(cases):
+    '''Unordered, every case still gets its report.'''
+    runner = BatchRunner(workers=2, chunksize=5, ordered=False, statutes=[ "14-72" ])
+    reports = runner.run_all(cases)
+    assert 60 == len(reports)
+    reports = { id(report.defendant): report for report in reports }
+    assert [ RecordRunner().run(*case) for case in cases ] == [ reports[id(case[0])] for case in cases ]
+
+def test_batch_runner_streams(cases):
+    '''The cases are read a window at a time: the first report comes back before most cases are read.'''
+    read = []
+    def feed():
+        for case in cases:
+            read.append(case)
+            yield case
+    runner = BatchRunner(workers=1, chunksize=5)
+    reports = runner.run(feed())
+    first = next(reports)
+    assert RecordRunner().run(*cases[0]) == first
+    assert 10 == len(read)          # two chunks in flight for one worker
+    assert [ RecordRunner().run(*case) for case in cases[1:] ] == list(reports)
+    assert 60 == len(read)
+
+def test_batch_stats():
+    '''BatchStats gives the defendants run per second.'''
+    assert 50.0 == BatchStats(100, 400, 2.0).per_second
+    assert 0.0 == BatchStats(0, 0, 0.0).per_second
+
+def test_batch_runner_validation():
+    '''The workers and chunksize must be positive ints.'''
+    with pytest.raises(ValueError):
+        BatchRunner(workers=0)
+    with pytest.raises(ValueError):
+        BatchRunner(chunksize="10")
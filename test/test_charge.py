@@ -1,7 +1,9 @@
-from src.charge import Charge
+from src.charge import Charge, ChargeBatch, ChargeKey, CRIME_CLASSES
+from src.crime_class import CrimeClass
 import pytest
 from datetime import date, datetime, timedelta
 import typing
+from collections import Counter
 
 @pytest.fixture
 def charge1():
@@ -212,3 +214,84 @@ def conviction_date_none():
     charge1.set_convictiondate_date(None)
     assert None == charge1.conviction_date
     assert None == charge1._conviction_date
+
+def test_compact_layout(charge1):
+    '''Charges are slotted and store the crime class as its shared CrimeClass member; class_ordinal is its severity, not its place in CRIME_CLASSES.'''
+    assert not hasattr(charge1, "__dict__")
+    with pytest.raises(AttributeError):
+        charge1.unexpected = "no __dict__ to hold this"
+    assert CrimeClass.from_label("Class 2 Misdemeanor").severity == charge1.class_ordinal
+    assert "Class 2 Misdemeanor" == charge1.crime_class
+    charge1.crime_class = "Class B1 Felony"
+    assert 13 == charge1.class_ordinal
+    assert CRIME_CLASSES.index("Class B1 Felony") != charge1.class_ordinal     # the list puts B1 before B2
+    charge1.crime_class = "Class A Felony"
+    assert 14 == charge1.class_ordinal
+    assert True == charge1.is_felony
+    assert False == charge1.is_misdemeanor
+    assert False == charge1.is_infraction
+
+def test_set_crime_class_unhashable(charge1):
+    '''An unhashable crime class should still raise the ValueError rather than a TypeError from the lookup.'''
+    with pytest.raises(ValueError):
+        charge1.crime_class = ["Class 1 Misdemeanor"]
+    assert "Class 2 Misdemeanor" == charge1.crime_class
+
+def test_from_rows():
+    '''This tests bulk construction: valid rows become charges and each bad field is reported by row without raising.'''
+    rows = [    ("Simple Assault", "Class 2 Misdemeanor", date(2009,1, 1), date(2010,1, 1), "Randolph", "NCGS 14-33"),
+                ("Larceny", "bad class", date(2009,1, 1), date(2010,1, 1), "Randolph", "14-72"),
+                ("", "Class H Felony", "2009-01-01", None, "Randolph", "14-72"),
+                ("Larceny", "Class H Felony", date(2009,1, 1), None, "Randolph", "14-72"),
+                ("too short",) ]
+    batch = Charge.from_rows(rows)
+    assert ChargeBatch == type(batch)
+    assert False == batch.ok
+    assert [ 0, 3 ] == batch.rows
+    assert 2 == len(batch)
+    assert [ "Simple Assault", "Larceny" ] == [ charge.crime for charge in batch ]
+    assert None == batch.charges[1].conviction_date
+    assert "Class H Felony" == batch.charges[1].crime_class
+    assert [ (1, "crime_class"), (2, "crime"), (2, "offense_date"), (4, "row") ] == [ (e.row, e.field) for e in batch.errors ]
+    assert "The crime class is not a valid crime class. Valid Crime classes are" in batch.errors[0].reason
+    assert "A crime should be a string of non-zero length (up to 50 chars)." == batch.errors[1].reason
+
+def test_from_rows_not_a_row():
+    '''A row that is not a sequence of values (IE: None) should be reported as a bad row rather than raise.'''
+    batch = Charge.from_rows([ None, 7 ])
+    assert [ (0, "row"), (1, "row") ] == [ (e.row, e.field) for e in batch.errors ]
+    assert "A row should have 6 values." == batch.errors[0].reason
+    assert 0 == len(batch)
+
+def test_from_rows_matches_constructor():
+    '''Charges from from_rows (validated or trusted) should hold the same values as ones from Charge().'''
+    row = ("a" * 60, "Class 1 Misdemeanor", date(2009,1, 1), date(2010,1, 1), "b" * 60, "c" * 60)
+    built = Charge(*row)
+    for trusted in (False, True):
+        charge = Charge.from_rows([ row ], trusted=trusted).charges[0]
+        assert (built.crime, built.crime_class, built.offense_date, built.conviction_date, built.conviction_loc, built.statute) == \
+            (charge.crime, charge.crime_class, charge.offense_date, charge.conviction_date, charge.conviction_loc, charge.statute)
+
+def test_from_rows_trusted():
+    '''The trusted mode skips validation, so every row becomes a charge and no errors are reported.'''
+    rows = ( ("Larceny", "Class H Felony", date(2009,1, 1), None, "Randolph", "14-72") for i in range(3) )
+    batch = Charge.from_rows(rows, trusted=True)
+    assert True == batch.ok
+    assert [ 0, 1, 2 ] == batch.rows
+    assert 3 == len(batch)
+    assert Charge.from_rows([]).ok
+
+def test_key():
+    '''Two counts with identical data are separate charges but share a value key, so they can be counted or used as dictionary keys.'''
+    count1 = Charge("Larceny", "Class 1 Misdemeanor", date(2009,1, 1), date(2010,1, 1), "Randolph", "14-72")
+    count2 = Charge("Larceny", "Class 1 Misdemeanor", date(2009,1, 1), date(2010,1, 1), "Randolph", "14-72")
+    other = Charge("Larceny", "Class 1 Misdemeanor", date(2009,1, 2), date(2010,1, 1), "Randolph", "14-72")
+    assert count1 != count2
+    assert count1.key() == count2.key()
+    assert hash(count1.key()) == hash(count2.key())
+    assert count1.key() != other.key()
+    assert ChargeKey("Larceny", "Class 1 Misdemeanor", date(2009,1, 1), date(2010,1, 1), "Randolph", "14-72") == count1.key()
+    assert 2 == Counter(c.key() for c in [ count1, count2, other ])[count1.key()]
+    assert 2 == len({ count1.key(): count1, count2.key(): count2, other.key(): other })
+    count2.crime_class = "Class H Felony"
+    assert count1.key() != count2.key()
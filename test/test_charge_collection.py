@@ -0,0 +1,184 @@
+from src.charge_collection import Charge_Collection, Pending_Charges, Charges_Convicted, ChargesView
+from src.felony_record_statemachine import Felony_RecordMachine
+from src.misdemeanor_recordmachine import MisdemeanorRecordMachine
+from src.habitual_machine import HabitualMachine
+from src.charge import Charge
+from src.crime_class import CrimeClass
+from src.felony_record_statemachine import ZippingState
+from test.random_records import random_record
+import random
+import pytest
+from datetime import date
+
+@pytest.fixture
+def convictions():
+    '''These are convictions added out of order. con3 and con4 are identical counts on the same date.'''
+    con1 = Charge("PSG", "Class 1 Misdemeanor", date(2014,1, 1), date(2015,1, 1), "Randolph County", "14-72")
+    con2 = Charge("PSG", "Class H Felony", date(2014,6, 1), date(2015,2, 2), "Randolph County", "14-72")
+    con3 = Charge("Larceny", "Class 1 Misdemeanor", date(2013,1, 1), date(2015,2, 2), "Randolph County", "14-72")
+    con4 = Charge("Larceny", "Class 1 Misdemeanor", date(2013,1, 1), date(2015,2, 2), "Randolph County", "14-72")
+    con5 = Charge("Second Degree Kidnapping", "Class E Felony", date(2016,1, 1), date(2016,5, 5), "Randolph County", "14-39")
+    convictions = [ con5, con2, con1, con3, con4 ]
+    return convictions
+
+@pytest.fixture
+def pendings():
+    '''These are pending charges added out of order.'''
+    pen1 = Charge("Larceny", "Class H Felony", date(2020,3, 1), None, "Randolph County", "14-72")
+    pen2 = Charge("PSG", "Class H Felony", date(2019,1, 1), None, "Randolph County", "14-72")
+    pen3 = Charge("Assault", "Class 2 Misdemeanor", date(2020,1, 1), None, "Randolph County", "14-33")
+    pendings = [ pen1, pen2, pen3 ]
+    return pendings
+
+def test_base_collection_keeps_add_order(convictions):
+    '''The base collection keeps charges in the order they were added.'''
+    collection = Charge_Collection(convictions)
+    assert convictions == collection.charges
+    assert 5 == len(collection)
+    with pytest.raises(ValueError):
+        collection.add_charge("not a charge")
+    with pytest.raises(ValueError):
+        collection.add_charge(convictions[0])     # already in
+
+def test_convicted_sorted(convictions):
+    '''Convictions are kept sorted by conviction date, then offense date, then the order they were added.'''
+    con5, con2, con1, con3, con4 = convictions
+    collection = Charges_Convicted(convictions)
+    assert [ con1, con3, con4, con2, con5 ] == collection.charges
+    assert [ con1, con3, con4, con2, con5 ] == list(collection)
+    assert [ con1, con3, con4, con2, con5 ] == collection.sort_collection_byconviction()
+    assert [ [con1], [con3, con4, con2], [con5] ] == collection.group_collection_byconvictiondate()
+    assert 2 == collection.index_of(con4)
+    assert True == collection.is_in(con4)
+
+def test_convicted_requires_conviction_date(pendings):
+    '''A pending charge is not a conviction.'''
+    with pytest.raises(ValueError):
+        Charges_Convicted().add_charge(pendings[0])
+
+def test_remove_charge(convictions):
+    '''Removing by index keeps the rest sorted, and an identical count stays in the collection.'''
+    con5, con2, con1, con3, con4 = convictions
+    collection = Charges_Convicted(convictions)
+    assert con3 == collection.remove_charge(1)
+    assert False == collection.is_in(con3)
+    assert True == collection.is_in(con4)
+    assert [ con1, con4, con2, con5 ] == collection.charges
+    with pytest.raises(Exception) as exc_info:
+        collection.remove_charge(10)
+    assert type(ValueError()) == type(exc_info.value)
+    assert "This charge is not in _charges." in str(exc_info.__dict__)
+    with pytest.raises(ValueError):
+        collection.index_of(con3)
+
+def test_range_queries(convictions):
+    '''This tests the date-range queries on convictions.'''
+    con5, con2, con1, con3, con4 = convictions
+    collection = Charges_Convicted(convictions)
+    assert [ con1, con3, con4, con2 ] == collection.convicted_before(date(2016,5, 5))
+    assert [] == collection.convicted_before(date(2015,1, 1))
+    assert [ con3, con4, con2 ] == collection.convicted_between(date(2015,2, 2), date(2016,5, 5))
+    assert [] == collection.convicted_between(date(2017,1, 1), date(2016,1, 1))
+
+def test_pending_sorted(pendings):
+    '''Pending charges are kept sorted by offense date and support before/after queries.'''
+    pen1, pen2, pen3 = pendings
+    collection = Pending_Charges(pendings)
+    assert [ pen2, pen3, pen1 ] == collection.sort_byoffensedate()
+    assert [ pen2 ] == collection.offended_before(date(2020,1, 1))
+    assert [ pen1 ] == collection.offended_after(date(2020,1, 1))
+    assert [ pen3, pen1 ] == collection.offended_after(date(2019,1, 1))
+
+def test_view_is_read_only(convictions):
+    '''A view reflects the collection without copying it and cannot be changed.'''
+    collection = Charges_Convicted(convictions)
+    view = collection.charges
+    assert ChargesView == type(view)
+    with pytest.raises(TypeError):
+        view[0] = convictions[0]
+    assert not hasattr(view, "append")
+    assert convictions[0] == view[-1]
+    assert list(view)[1:3] == view[1:3]
+    assert ChargesView == type(view[1:3])
+    assert [ view[0], view[2], view[4] ] == view[::2]
+    with pytest.raises(IndexError):
+        view[5]
+    collection.remove_charge(0)
+    assert 4 == len(view)
+
+def test_range_view_goes_stale(convictions):
+    '''A range view raises once its collection changes, rather than shifting to other charges.'''
+    con5, con2, con1, con3, con4 = convictions
+    collection = Charges_Convicted(convictions)
+    view = collection.convicted_before(date(2016,1, 1))
+    window = collection.charges[1:3]
+    assert [ con1, con3, con4, con2 ] == view
+    copied = list(view)
+    collection.add_charge(Charge("RDO", "Class 2 Misdemeanor", date(2000,1, 1), date(2000,2, 2), "Randolph County", "14-223"))
+    for stale in (view, window):
+        with pytest.raises(ValueError):
+            len(stale)
+        with pytest.raises(ValueError):
+            list(stale)
+        with pytest.raises(ValueError):
+            stale[0]
+    assert [ con1, con3, con4, con2 ] == copied
+    assert 5 == len(collection.convicted_before(date(2016,1, 1)))
+    collection.remove_charge(0)
+    assert 4 == len(collection.charges[1:])
+
+def test_machines_consume_views(convictions):
+    '''The record machines take a view straight from the collection.'''
+    collection = Charges_Convicted(convictions)
+    felony = Felony_RecordMachine()
+    felony.on_event(collection.charges)
+    assert 7 == felony.points
+    misdemeanor = MisdemeanorRecordMachine()
+    misdemeanor.on_event(collection.convicted_before(date(2016,1, 1)))
+    assert 2 == misdemeanor.points
+    habitual = HabitualMachine()
+    habitual.on_event(collection.charges, date(1990,1, 1))
+    assert 2 == len(habitual.dumbwaiter.habitual_convictions)
+
+def test_date_index(convictions):
+    '''The conviction date index and its summaries follow adds and removes.'''
+    con5, con2, con1, con3, con4 = convictions
+    collection = Charges_Convicted(convictions)
+    assert [ date(2015,1, 1), date(2015,2, 2), date(2016,5, 5) ] == collection.conviction_dates
+    assert [ con3, con4, con2 ] == collection.convictions_on(date(2015,2, 2))
+    summary = collection.date_summary(date(2015,2, 2))
+    assert 3 == summary.count
+    assert CrimeClass.CLASS_H_FELONY == summary.highest_class
+    assert 2 == summary.felony_points
+    assert 3 == summary.misdemeanor_count
+    assert None == collection.date_summary(date(2000,1, 1))
+    assert (7, 3, 3, 2) == (collection.felony_points, collection.felony_level, collection.misdemeanor_points, collection.misdemeanor_level)
+    collection.remove_charge(collection.index_of(con2))        # the H felony: the date drops to a misdemeanor
+    assert 1 == collection.date_summary(date(2015,2, 2)).felony_points
+    assert CrimeClass.CLASS_1_MISDEMEANOR == collection.date_summary(date(2015,2, 2)).highest_class
+    assert (6, 3) == (collection.felony_points, collection.misdemeanor_points)
+    collection.remove_charge(collection.index_of(con5))        # the only conviction on its date
+    assert [ date(2015,1, 1), date(2015,2, 2) ] == collection.conviction_dates
+    assert (2, 2) == (collection.felony_points, collection.misdemeanor_points)
+    collection.add_charge(con5)
+    assert (6, 3) == (collection.felony_points, collection.misdemeanor_points)
+
+def test_date_index_matches_machines():
+    '''The running totals should always match the record machines, through random adds and removes.'''
+    rng = random.Random(8)
+    record = random_record(rng, 200)
+    collection = Charges_Convicted()
+    for step in range(400):
+        if len(collection) and rng.random() < 0.4:
+            collection.remove_charge(rng.randrange(len(collection)))
+        else:
+            charge = rng.choice(record)
+            if not collection.is_in(charge):
+                collection.add_charge(charge)
+        felony = Felony_RecordMachine()
+        felony.on_event(collection.charges)
+        misdemeanor = MisdemeanorRecordMachine()
+        misdemeanor.on_event(collection.charges)
+        assert (felony.points, misdemeanor.points) == (collection.felony_points, collection.misdemeanor_points)
+        assert [ list(group) for group in ZippingState().fill_empties(collection.charges, collection.conviction_dates,
+            [ [] for d in collection.conviction_dates ]) ] == collection.group_collection_byconvictiondate()
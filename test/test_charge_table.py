@@ -0,0 +1,61 @@
+import pytest
+np = pytest.importorskip("numpy")
+from src.charge_table import ChargeTable, FELONY_RECORD_EXCLUDED
+from src.felony_record_statemachine import Felony_RecordMachine
+from src.misdemeanor_recordmachine import MisdemeanorRecordMachine
+from src.charge import Charge
+from test.random_records import random_record
+from datetime import date
+import random
+
+@pytest.fixture
+def records():
+    '''This is a batch of random records keyed by defendant id, including an empty record and a record of only a pending charge.'''
+    rng = random.Random(20201)
+    records = [ (defendant_id, random_record(rng, rng.randrange(1, 30))) for defendant_id in range(200) ]
+    records.append((500, []))
+    pending = Charge("Larceny", "Class H Felony", date(2020,1, 1), None, "Randolph County", "14-72")
+    records.append((501, [ pending ]))
+    return records
+
+def test_from_records(records):
+    '''This tests the columns built from Charge objects.'''
+    con1 = Charge("DWLR/I", "Class 1 Misdemeanor", date(2009,1, 1), date(2015,4, 4), "Randolph County", "20-28(a1)")
+    con2 = Charge("Larceny", "Class H Felony", date(2020,1, 1), None, "Randolph County", "14-72")
+    table = ChargeTable.from_records([ (7, [ con1, con2 ]) ])
+    assert 2 == len(table)
+    assert [ 7, 7 ] == table.defendant_ids.tolist()
+    assert [ con1.class_ordinal, con2.class_ordinal ] == table.class_ordinals.tolist()
+    assert [ date(2009,1, 1).toordinal(), date(2020,1, 1).toordinal() ] == table.offense_dates.tolist()
+    assert [ date(2015,4, 4).toordinal(), 0 ] == table.conviction_dates.tolist()
+    assert [ FELONY_RECORD_EXCLUDED, 0 ] == table.statute_flags.tolist()
+
+def test_column_lengths():
+    '''Columns of different lengths should raise a ValueError.'''
+    with pytest.raises(ValueError):
+        ChargeTable([ 1, 2 ], [ 3 ], [ 1 ], [ 1 ], [ 0 ])
+
+def test_felony_records_match_machine(records):
+    '''The vectorized felony kernel should return the same points and levels as Felony_RecordMachine for every defendant.'''
+    result = ChargeTable.from_records(records).felony_records()
+    by_id = dict(records)
+    assert sorted(i for i, charges in records if charges) == result.defendant_ids.tolist()   # no rows, no result
+    for defendant_id, points, level in zip(*result):
+        machine = Felony_RecordMachine()
+        machine.on_event([ c for c in by_id[defendant_id] if c.conviction_date is not None ])
+        assert (machine.points, machine.level) == (points, level)
+
+def test_misdemeanor_records_match_machine(records):
+    '''The vectorized misdemeanor kernel should return the same points and levels as MisdemeanorRecordMachine for every defendant.'''
+    result = ChargeTable.from_records(records).misdemeanor_records()
+    by_id = dict(records)
+    for defendant_id, points, level in zip(*result):
+        machine = MisdemeanorRecordMachine()
+        machine.on_event([ c for c in by_id[defendant_id] if c.conviction_date is not None ])
+        assert (machine.points, machine.level) == (points, level)
+
+def test_empty_table():
+    '''An empty table should return empty results.'''
+    table = ChargeTable.from_records([])
+    assert 0 == len(table.felony_records().defendant_ids)
+    assert 0 == len(table.misdemeanor_records().points)
@@ -0,0 +1,42 @@
+from src.crime_class import CrimeClass, CRIME_CLASSES
+import pytest
+
+def test_labels():
+    '''Every valid crime class label should map to exactly one member.'''
+    assert len(CRIME_CLASSES) == len(CrimeClass)
+    for label in CRIME_CLASSES:
+        assert label == CrimeClass.from_label(label).label
+        assert label == str(CrimeClass.from_label(label))
+
+def test_from_label_error():
+    '''An invalid label (or a non-string) should raise the same ValueError Charge has always raised.'''
+    with pytest.raises(Exception) as exc_info:
+        CrimeClass.from_label("bad data")
+    assert type(ValueError()) == type(exc_info.value)
+    assert "The crime class is not a valid crime class. Valid Crime classes are" in str(exc_info.__dict__)
+    with pytest.raises(ValueError):
+        CrimeClass.from_label(["Class H Felony"])
+
+def test_severity_order():
+    '''The severity ordinals run from the infraction (0) to the Class A felony (14), with B1 above B2.'''
+    severities = [ member.severity for member in CrimeClass ]
+    assert list(range(15)) == severities
+    assert CrimeClass.CLASS_B1_FELONY.severity > CrimeClass.CLASS_B2_FELONY.severity
+
+def test_flags():
+    '''This tests the felony/misdemeanor/infraction flags and the record eligibility flags.'''
+    assert CrimeClass.INFRACTION.is_infraction
+    assert not CrimeClass.INFRACTION.counts_for_misdemeanor_record
+    assert not CrimeClass.INFRACTION.counts_for_felony_record
+    assert CrimeClass.CLASS_3_MISDEMEANOR.is_misdemeanor
+    assert CrimeClass.CLASS_3_MISDEMEANOR.counts_for_misdemeanor_record
+    assert not CrimeClass.CLASS_3_MISDEMEANOR.counts_for_felony_record
+    assert CrimeClass.CLASS_A1_MISDEMEANOR.counts_for_felony_record
+    assert CrimeClass.CLASS_I_FELONY.is_felony
+    assert not CrimeClass.CLASS_I_FELONY.is_misdemeanor
+    assert CrimeClass.CLASS_I_FELONY.counts_for_misdemeanor_record
+
+def test_felony_points():
+    '''This tests the felony record points for each class.'''
+    expected = [ 0, 0, 0, 1, 1, 2, 2, 4, 4, 4, 6, 6, 6, 9, 10 ]
+    assert expected == [ member.felony_points for member in CrimeClass ]
@@ -0,0 +1,91 @@
+from src.csv_ingest import COLUMNS, CsvCase, CsvError, CsvResult, read_rows, read_cases, run_csv
+from src.run_all_records import RecordReport
+import pytest
+from datetime import date
+import io
+
+HEADER = "defendant_id,first,last,birthdate,crime,crime_class,offense_date,conviction_date,conviction_loc,statute\n"
+
+@pytest.fixture
+def extract():
+    '''This is a small CSV extract: a three-strike defendant with a pending charge, and a defendant with one bad row.'''
+    return io.StringIO(HEADER +
+        "1,John,Doe,1999-01-01,PSG,Class H Felony,2014-01-01,2015-02-02,Randolph County,14-72\n"
+        "1,John,Doe,1999-01-01,PSG,Class H Felony,2017-02-01,2017-03-01,Randolph County,14-72\n"
+        "1,John,Doe,1999-01-01,PSG,Class E Felony,2017-04-01,2018-01-03,Randolph County,14-72\n"
+        "1,John,Doe,1999-01-01,PSG,Class H Felony,2019-01-02,,Randolph County,14-72\n"
+        "2,Jane,Roe,1990-05-05,Larceny,Class 1 Misdemeanor,2010-01-01,2010-02-01,Guilford County,14-72\n"
+        "2,Jane,Roe,1990-05-05,Larceny,Class Z Misdemeanor,2010-01-01,2010-02-01,Guilford County,14-72\n"
+        "2,Jane,Roe,1990-05-05,Larceny,Class 1 Misdemeanor,2011-13-01,2012-02-01,Guilford County,14-72\n")
+
+def test_read_rows(extract):
+    '''The rows come back with their line numbers, in COLUMNS order.'''
+    rows = list(read_rows(extract))
+    assert 7 == len(rows)
+    assert 2 == rows[0][0]
+    assert len(COLUMNS) == len(rows[0][1])
+    assert "2015-02-02" == rows[0][1][COLUMNS.index("conviction_date")]
+
+def test_read_rows_column_order():
+    '''The columns may come in any order, and extra columns are ignored.'''
+    csv_file = io.StringIO("statute,extra,crime,crime_class,offense_date,conviction_date,conviction_loc,birthdate,last,first,defendant_id\n"
+        "14-72,x,PSG,Class H Felony,2014-01-01,2015-02-02,Randolph County,1999-01-01,Doe,John,1\n")
+    line, row = next(read_rows(csv_file))
+    assert ("1", "John", "Doe", "1999-01-01", "PSG", "Class H Felony", "2014-01-01", "2015-02-02", "Randolph County", "14-72") == row
+
+def test_read_rows_missing_column():
+    '''A CSV missing a column raises a ValueError.'''
+    with pytest.raises(ValueError):
+        list(read_rows(io.StringIO("defendant_id,first\n1,John\n")))
+
+def test_read_cases(extract):
+    '''Each defendant's rows become a CsvCase, with the bad rows reported by line number.'''
+    john, jane = list(read_cases(extract))
+    assert CsvCase == type(john)
+    assert "Doe" == john.defendant.last
+    assert date(1999, 1, 1) == john.defendant.birthdate
+    assert 3 == len(john.convictions)
+    assert 1 == len(john.pendings)
+    assert None == john.pendings[0].conviction_date
+    assert [] == john.errors
+    assert 1 == len(jane.convictions)
+    assert [ 7, 8 ] == [ error.line for error in jane.errors ]
+    assert [ "crime_class", "offense_date" ] == [ error.field for error in jane.errors ]
+
+def test_read_cases_bad_defendant():
+    '''A defendant with invalid columns is reported, and run_csv does not run them.'''
+    csv_file = HEADER + "1,John,Doe,01/01/1999,PSG,Class H Felony,2014-01-01,2015-02-02,Randolph County,14-72\n"
+    case, = read_cases(io.StringIO(csv_file))
+    assert None == case.defendant
+    assert [ CsvError(2, "defendant", "The birthdate must be a datetime date object.") ] == case.errors
+    result, = run_csv(io.StringIO(csv_file))
+    assert case.errors == result.case.errors
+    assert None == result.report
+
+def test_run_csv(extract):
+    '''run_csv yields every case with its RecordRunner report, and no report for a case with bad rows.'''
+    john, jane = list(run_csv(extract))
+    assert CsvResult == type(john)
+    assert [] == john.case.errors
+    assert RecordReport == type(john.report)
+    assert True == john.report.hab_eligible
+    assert date(2018, 1, 3) == john.report.date_eligible
+    assert 1 == len(john.report.habitual_pendings)
+    assert [ 7, 8 ] == [ error.line for error in jane.case.errors ]
+    assert None == jane.report
+
+def test_read_cases_streams():
+    '''Only one defendant's rows are read ahead of the case being yielded.'''
+    read = []
+    def lines():
+        yield HEADER
+        for defendant in range(1000):
+            for count in range(3):
+                read.append(defendant)
+                yield f"{defendant},John,Doe,1999-01-01,PSG,Class H Felony,2014-01-01,2015-02-02,Randolph County,14-72\n"
+    cases = read_cases(lines())
+    for defendant in range(5):
+        case = next(cases)
+        assert 3 == len(case.convictions)
+        assert defendant + 1 == read[-1]        # just the first row of the next defendant
+    assert 3 * 5 + 1 == len(read)
@@ -77,4 +77,52 @@ def test_offense_date_is_eligible():
     assert True == dw.hab_eligible
     dw.date_eligible = date(2021, 1, 1)
     assert True == dw.offense_date_is_eligible(date(2021, 1, 2))
-    assert False == dw.offense_date_is_eligible(date(2020, 12, 31))
\ No newline at end of file
+    assert False == dw.offense_date_is_eligible(date(2020, 12, 31))
+
+def test_offense_dates_are_eligible():
+    '''The batch check answers like offense_date_is_eligible, for dates and pending charges alike.'''
+    dw = Dumbwaiter(date(1999, 1, 1))
+    dates = [ date(2019, 1, 1), date(2020, 1, 1), date(2020, 1, 2), date(2024, 5, 5) ]
+    assert [ False, False, False, False ] == dw.offense_dates_are_eligible(dates)
+    dw.hab_eligible = True
+    dw.date_eligible = date(2020, 1, 1)
+    assert [ False, False, True, True ] == dw.offense_dates_are_eligible(dates)
+    assert [ dw.offense_date_is_eligible(d) for d in dates ] == dw.offense_dates_are_eligible(dates)
+    pending = Charge("PSG", "Class H Felony", date(2021, 1, 1), None, "Randolph County", "14-72")
+    assert [ True, False ] == dw.offense_dates_are_eligible([ pending, date(2019, 1, 1) ])
+    assert [] == dw.offense_dates_are_eligible([])
+
+def test_offense_dates_are_eligible_array():
+    '''An array of day ordinals is checked in one vectorized step.'''
+    np = pytest.importorskip("numpy")
+    dw = Dumbwaiter(date(1999, 1, 1))
+    ordinals = np.array([ date(2019, 1, 1).toordinal(), date(2020, 1, 2).toordinal() ])
+    assert [ False, False ] == dw.offense_dates_are_eligible(ordinals).tolist()
+    dw.hab_eligible = True
+    dw.date_eligible = date(2020, 1, 1)
+    assert [ False, True ] == dw.offense_dates_are_eligible(ordinals).tolist()
+
+def test_leap_day_birthdate():
+    '''A Defendant born on February 29 turns 18 on March 1.'''
+    dw = Dumbwaiter(date(2000, 2, 29))
+    assert date(2018, 3, 1) == dw.eighteenth_birthdate
+    assert False == dw.over18_on_date(date(2018, 2, 28))
+    assert True == dw.over18_on_date(date(2018, 3, 1))
+    dw.birthdate = date(1998, 2, 28)
+    assert date(2016, 2, 28) == dw.eighteenth_birthdate
+    dw.birthdate = date(1982, 2, 28)
+    assert date(2000, 2, 28) == dw.eighteenth_birthdate
+
+def test_over18_on_dates():
+    '''The batch screen answers like over18_on_date, for a list of dates or an array of day ordinals.'''
+    dw = Dumbwaiter(date(1999, 1, 1))
+    dates = [ date(2016, 12, 31), date(2017, 1, 1), date(2020, 5, 5) ]
+    assert [ False, True, True ] == dw.over18_on_dates(dates)
+    np = pytest.importorskip("numpy")
+    assert [ False, True, True ] == dw.over18_on_dates(np.array([ d.toordinal() for d in dates ])).tolist()
+
+def test_dumbwaiter_is_slotted():
+    '''Dumbwaiter has no instance __dict__.'''
+    dw = Dumbwaiter(date(1999, 1, 1))
+    with pytest.raises(AttributeError):
+        dw.unknown = 1
@@ -1,10 +1,13 @@
 from src.felony_record_statemachine import EligibleCrimes, State, StartState, ScreeningState, RescreeningState, ZippingState, ZippedState, HubState, \
-    MisdemeanorState, FelonyStartState, FelonyOverHState, FelonyOverEState, FelonyOverB2State, FinishedState, ErrorState, Felony_RecordMachine
+    MisdemeanorState, FelonyStartState, FelonyOverHState, FelonyOverEState, FelonyOverB2State, FinishedState, ErrorState, Felony_RecordMachine, \
+    felony_record_points
 from src.charge import Charge
 from src.defendant import Defendant
 import pytest
 from datetime import date, datetime, timedelta
 import typing
+import random
+from test.random_records import random_record
 
 @pytest.fixture
 def eligibles():
@@ -422,3 +425,47 @@ def test_rescreening_transitiontofinished():
     finished = start.on_event([], 0)
     assert "FinishedState" == repr(finished)
     assert "FinishedState" == str(finished)
+
+def test_b1_outranks_b2_on_same_date():
+    '''A B1 felony (9 points) and a B2 felony (6 points) on the same conviction date should count as the B1.'''
+    con1 = Charge("Murder in the 2nd", "Class B2 Felony", date(2009,1, 1), date(2015,3, 3), "Randolph County", "14-17(c)")
+    con2 = Charge("Murder in the 2nd", "Class B1 Felony", date(2009,1, 1), date(2015,3, 3), "Randolph County", "14-17(b)")
+    recordmachine = Felony_RecordMachine()
+    recordmachine.on_event([ con1, con2 ])
+    assert 9 == recordmachine.points
+    assert 3 == recordmachine.level
+
+def test_rescreening_keeps_order(rescreening:list, monkeypatch):
+    '''The rescreening should drop the ineligible Chapter 20 conviction and pass the rest on in their input order.'''
+    passed = []
+    monkeypatch.setattr(ZippingState, "on_event", lambda self, convictions, points: passed.append(convictions))
+    RescreeningState().on_event(rescreening, 0)
+    assert [ rescreening[:3] ] == passed
+
+def test_chapter14_statute_with_20_in_it():
+    '''A Chapter 14 statute such as 14-120-1 only looks like Chapter 20 to a substring test. It should count.'''
+    con1 = Charge("Forgery", "Class I Felony", date(2009,1, 1), date(2015,3, 3), "Randolph County", "14-120-1")
+    recordmachine = Felony_RecordMachine()
+    recordmachine.on_event([ con1 ])
+    assert 2 == recordmachine.points
+
+def test_long_record_no_recursion():
+    '''A record with thousands of distinct conviction dates should not hit the recursion limit, through the machine or the states.'''
+    record = [ Charge("PSG", "Class 1 Misdemeanor", date(1990,1, 1), date(1990,1, 1) + timedelta(days=i), "Randolph County", "14-72") \
+        for i in range(5000) ]
+    recordmachine = Felony_RecordMachine()
+    recordmachine.on_event(record)
+    assert 5000 == recordmachine.points
+    assert 6 == recordmachine.level
+    assert 5000 == StartState().on_event(record, 0).points
+
+def test_engine_matches_state_chain():
+    '''The one-loop engine behind Felony_RecordMachine should score random records exactly as the state chain does.'''
+    rng = random.Random(9)
+    for i in range(300):
+        record = random_record(rng, rng.randrange(0, 40))
+        recordmachine = Felony_RecordMachine()
+        recordmachine.on_event(record)
+        finished = StartState().on_event(record, 0)
+        assert (finished.points, finished.level) == (recordmachine.points, recordmachine.level)
+        assert finished.points == felony_record_points(tuple(record))
@@ -1,7 +1,12 @@
-from src.habitual_machine import State, StartState, StrikeOne, StrikeTwo, StrikeThree, FinishedState, HabitualMachine
+from src.habitual_machine import State, StartState, StrikeOne, StrikeTwo, StrikeThree, FinishedState, HabitualMachine, EarliestChainMachine, \
+    earliest_strike_chain, screen_felonies, is_next_strike
+from test.random_records import random_record
+from itertools import permutations
+import random
 from src.dumbwaiter import Dumbwaiter
 from src.charge import Charge
 from src.defendant import Defendant
+from src.charge_collection import Pending_Charges
 import pytest
 from datetime import date, datetime, timedelta
 import typing
@@ -312,3 +317,124 @@ def test_machine_offense_date_is_eligible_error(three_striker, conviction1):
     exception_raised = exc_info.value
     assert type(ValueError()) == type(exception_raised)
     assert "The record has not been successfully caluclated yet." in str(exc_info.__dict__)
+
+def test_thousands_of_passed_over_felonies():
+    '''Thousands of overlapping felonies should be passed over in one scan, without hitting the recursion limit.'''
+    strike1 = Charge("PSG", "Class H Felony", date(2017,1, 1), date(2030,1, 1), "Randolph County", "14-72")
+    overlapping = [ Charge("PSG", "Class H Felony", date(2017,1, 2) + timedelta(days=i % 4000), date(2030,1, 1), "Randolph County", "14-72") \
+        for i in range(6000) ]
+    strike2 = Charge("PSG", "Class H Felony", date(2030,1, 2), date(2030,2, 1), "Randolph County", "14-72")
+    strike3 = Charge("PSG", "Class H Felony", date(2030,2, 2), date(2030,3, 1), "Randolph County", "14-72")
+    machine = HabitualMachine()
+    machine.on_event([ strike3, strike2 ] + overlapping + [ strike1 ], date(1999,1,1))
+    assert [ strike1, strike2, strike3 ] == machine.dumbwaiter.habitual_convictions
+    assert True == machine.hab_eligible
+    assert date(2030,3, 1) == machine.date_eligible
+
+def test_is_next_strike():
+    '''Any felony is strike one; after that a felony must be committed as an adult and after the last strike's conviction.'''
+    dumbwaiter = Dumbwaiter(date(1999,1,1))
+    juvenile = Charge("PSG", "Class H Felony", date(2016,2, 1), date(2017,3, 1), "Randolph County", "14-72")
+    overlapping = Charge("PSG", "Class H Felony", date(2017,2, 1), date(2017,4, 1), "Randolph County", "14-72")
+    later = Charge("PSG", "Class H Felony", date(2017,3, 2), date(2017,5, 1), "Randolph County", "14-72")
+    assert True == is_next_strike(juvenile, None, dumbwaiter)
+    assert False == is_next_strike(juvenile, overlapping, dumbwaiter)
+    assert False == is_next_strike(overlapping, juvenile, dumbwaiter)
+    assert True == is_next_strike(later, juvenile, dumbwaiter)
+
+def test_strike_three_must_follow_strike_two():
+    '''A felony committed before strike two's conviction cannot be strike three, even when a later felony is on the record.'''
+    con1 = Charge("PSG", "Class H Felony", date(2017,2, 1), date(2017,3, 1), "Randolph County", "14-72")                      # -- StrikeOne
+    con2 = Charge("PSG", "Class H Felony", date(2017,4, 1), date(2018,6, 1), "Randolph County", "14-72")                      # -- StrikeTwo
+    con3 = Charge("PSG", "Class H Felony", date(2018,1, 1), date(2018,7, 1), "Randolph County", "14-72")                      # -- overlaps two
+    con4 = Charge("PSG", "Class H Felony", date(2018,8, 1), date(2018,9, 1), "Randolph County", "14-72")                      # -- StrikeThree
+    machine = HabitualMachine()
+    machine.on_event([ con1, con2, con3, con4 ], date(1999,1,1))
+    assert [ con1, con2, con4 ] == machine.dumbwaiter.habitual_convictions
+    assert date(2018,9, 1) == machine.date_eligible
+
+def test_strike_states_resume(three_striker):
+    '''The strike states pick up from the strikes already in the dumbwaiter.'''
+    dumbwaiter = Dumbwaiter(date(1999,1,1))
+    dumbwaiter.habitual_convictions.append(three_striker[1])
+    finished = StrikeTwo().on_event([ three_striker[4], three_striker[5] ], dumbwaiter)
+    assert FinishedState == type(finished)
+    assert [ three_striker[1], three_striker[4], three_striker[5] ] == dumbwaiter.habitual_convictions
+    assert True == dumbwaiter.hab_eligible
+    assert [] == finished.convictions
+
+def test_earliest_chain_beats_greedy():
+    '''The first felony by offense date sat pending until 2030, so the greedy scan finds one strike, but three other felonies make a chain by 2019.'''
+    slow = Charge("PSG", "Class H Felony", date(2017,1, 1), date(2030,1, 1), "Randolph County", "14-72")
+    con1 = Charge("PSG", "Class H Felony", date(2017,2, 1), date(2017,3, 1), "Randolph County", "14-72")                      # -- StrikeOne
+    con2 = Charge("PSG", "Class H Felony", date(2017,4, 1), date(2018,6, 1), "Randolph County", "14-72")                      # -- StrikeTwo
+    con3 = Charge("PSG", "Class H Felony", date(2018,8, 1), date(2019,1, 1), "Randolph County", "14-72")                      # -- StrikeThree
+    greedy = HabitualMachine()
+    greedy.on_event([ slow, con1, con2, con3 ], date(1999,1,1))
+    assert False == greedy.hab_eligible
+    machine = EarliestChainMachine()
+    machine.on_event([ slow, con1, con2, con3 ], date(1999,1,1))
+    assert FinishedState == type(machine.state)
+    assert True == machine.dumbwaiter.ran
+    assert [ con1, con2, con3 ] == machine.chain
+    assert True == machine.hab_eligible
+    assert date(2019,1, 1) == machine.date_eligible
+    assert [ slow ] == machine.state.convictions
+
+def test_earliest_chain_one_juvenile_strike(one_strike_because18, three_striker):
+    '''Only the first strike of the chain may be from before the Defendant turned 18.'''
+    machine = EarliestChainMachine()
+    machine.on_event(one_strike_because18, date(1999,1,1))
+    assert 1 == len(machine.chain)
+    assert False == machine.hab_eligible
+    machine.on_event(three_striker, date(1999,1,1))
+    assert True == machine.hab_eligible
+    assert date(2018,1, 3) == machine.date_eligible
+
+def _brute_force_date(felonies, dumbwaiter):
+    '''This tries every ordered triple of felonies and returns the earliest date a valid chain reached three strikes, or None.'''
+    dates = [ c.conviction_date for a, b, c in permutations(felonies, 3) if b.offense_date > a.conviction_date and \
+        c.offense_date > b.conviction_date and dumbwaiter.over18_on_date(b.offense_date) and dumbwaiter.over18_on_date(c.offense_date) ]
+    return min(dates, default=None)
+
+def test_earliest_chain_matches_brute_force():
+    '''On random records the chain is valid, reaches three strikes exactly when some chain does, and is never later than any chain (or the greedy scan).'''
+    rng = random.Random(12)
+    for i in range(300):
+        record = random_record(rng, rng.randrange(0, 12), start=date(2004, 1, 1))
+        birthdate = date(1984 + rng.randrange(6), 3, 1)
+        dumbwaiter = Dumbwaiter(birthdate)
+        felonies = screen_felonies(record)
+        chain = earliest_strike_chain(felonies, dumbwaiter)
+        for before, after in zip(chain, chain[1:]):
+            assert after.offense_date > before.conviction_date
+            assert dumbwaiter.over18_on_date(after.offense_date)
+        expected = _brute_force_date(felonies, dumbwaiter)
+        assert expected == (chain[2].conviction_date if len(chain) == 3 else None)
+        greedy = HabitualMachine()
+        greedy.on_event(record, birthdate)
+        if greedy.hab_eligible:
+            assert expected <= greedy.date_eligible
+
+def test_machine_batch_eligibility(three_striker):
+    '''The batch checks answer for every pending charge at once, and raise like offense_date_is_eligible before the record has run.'''
+    pendings = Pending_Charges([ Charge("PSG", "Class H Felony", date(2018,1, d), None, "Randolph County", "14-72") for d in (5, 1, 3, 2, 4) ])
+    machine = HabitualMachine()
+    with pytest.raises(ValueError):
+        machine.offense_dates_are_eligible(pendings)
+    with pytest.raises(ValueError):
+        machine.eligible_pending_charges(pendings)
+    machine.on_event(three_striker, date(1999,1,1))
+    assert date(2018,1,3) == machine.date_eligible
+    expected = [ machine.offense_date_is_eligible(p.offense_date) for p in pendings ]
+    assert expected == machine.offense_dates_are_eligible(pendings)
+    assert [ False, False, False, True, True ] == machine.offense_dates_are_eligible(pendings)
+    assert [ p for p in pendings if p.offense_date > date(2018,1,3) ] == machine.eligible_pending_charges(pendings)
+
+def test_machine_batch_not_eligible(two_strikes):
+    '''No pending charge is eligible when the record is not.'''
+    pendings = Pending_Charges([ Charge("PSG", "Class H Felony", date(2030,1, 1), None, "Randolph County", "14-72") ])
+    machine = HabitualMachine()
+    machine.on_event(two_strikes, date(1999,1,1))
+    assert [ False ] == machine.offense_dates_are_eligible(pendings)
+    assert [] == machine.eligible_pending_charges(pendings)
@@ -0,0 +1,66 @@
+from src.incremental_record import IncrementalRecord
+from src.record_kernel import RecordResult, run_record
+from src.habitual_machine import HabitualMachine
+from src.charge import Charge
+from test.random_records import random_record
+import pytest
+from datetime import date
+import random
+
+def test_incremental_record(three_striker):
+    '''The results follow each conviction added and removed.'''
+    record = IncrementalRecord(date(1999,1,1))
+    assert RecordResult(0, 1, 0, 1, False, None, ()) == record.result()
+    for conviction in three_striker:
+        record.add_charge(conviction)
+    assert RecordResult(3, 2, 8, 3, True, date(2018,1, 3), tuple(three_striker[:3])) == record.result()
+    removed = record.remove_charge(record.index_of(three_striker[1]))
+    assert three_striker[1] is removed
+    assert (2, 6, False, None) == (record.misdemeanor_points, record.felony_points, record.hab_eligible, record.date_eligible)
+    assert [ three_striker[0], three_striker[2] ] == record.habitual_convictions
+
+def test_change_after_third_strike(three_striker):
+    '''A felony after the third strike leaves the chain as it was.'''
+    record = IncrementalRecord(date(1999,1,1), three_striker)
+    later = Charge("PSG", "Class H Felony", date(2019,1, 1), date(2019,6, 1), "Randolph County", "14-72")
+    record.add_charge(later)
+    assert three_striker[:3] == record.habitual_convictions
+    record.remove_charge(record.index_of(later))
+    assert date(2018,1, 3) == record.date_eligible
+
+def test_earlier_felony_restarts_chain(three_striker):
+    '''A felony before strike one becomes strike one, and the chain is picked again after it.'''
+    record = IncrementalRecord(date(1999,1,1), three_striker)
+    earlier = Charge("PSG", "Class H Felony", date(2013,1, 1), date(2017,3, 15), "Randolph County", "14-72")
+    record.add_charge(earlier)
+    assert [ earlier, three_striker[2] ] == record.habitual_convictions
+    assert False == record.hab_eligible
+
+def test_validation(three_striker):
+    '''The birthdate must be a date, and only convictions in the record can be removed.'''
+    with pytest.raises(ValueError):
+        IncrementalRecord("1/1/99")
+    record = IncrementalRecord(date(1999,1,1), three_striker)
+    with pytest.raises(ValueError):
+        record.remove_charge(4)
+    assert 4 == len(record)
+
+def test_matches_full_recompute():
+    '''After every random add and remove, the results are the same as running the whole record again.'''
+    rng = random.Random(23)
+    for trial in range(20):
+        birthdate = date(1984 + rng.randrange(4), 6, 1)
+        record = IncrementalRecord(birthdate)
+        pool = random_record(rng, 30, start=date(2003, 1, 1))
+        for step in range(60):
+            if len(record) and rng.random() < 0.4:
+                record.remove_charge(rng.randrange(len(record)))
+            else:
+                charge = rng.choice(pool)
+                if not record.is_in(charge):
+                    record.add_charge(charge)
+            convictions = list(record.charges)
+            assert run_record(convictions, birthdate) == record.result()
+            machine = HabitualMachine()
+            machine.on_event(convictions, birthdate)
+            assert machine.dumbwaiter.habitual_convictions == record.habitual_convictions
@@ -0,0 +1,82 @@
+from src.jsonl_interface import run_line, run_jsonl, main
+from src.run_all_records import RecordRunner
+import pytest
+import io
+import json
+
+def charge(crime_class, offense_date, conviction_date):
+    return { "crime": "PSG", "crime_class": crime_class, "offense_date": offense_date, "conviction_date": conviction_date,
+             "conviction_loc": "Randolph County", "statute": "14-72" }
+
+def as_json(charge):
+    '''This returns a Charge as the JSON object a line holds.'''
+    return { field: value.isoformat() if hasattr(value, "isoformat") else value for field, value in charge.key()._asdict().items() }
+
+@pytest.fixture
+def three_striker_line(three_striker, pendings):
+    '''This is a JSON line for a defendant born 1/1/99 with the three_striker record and two pending charges.'''
+    return json.dumps({ "id": 17, "first": "John", "last": "Doe", "birthdate": "1999-01-01",
+        "convictions": [ as_json(c) for c in three_striker ], "pendings": [ as_json(p) for p in pendings ] })
+
+def test_run_line(three_striker_line):
+    '''A line gives the misdemeanor, felony, and habitual results.'''
+    assert { "id": 17, "misdemeanor_points": 3, "misdemeanor_level": 2, "felony_points": 8, "felony_level": 3, "hab_eligible": True,
+             "date_eligible": "2018-01-03", "habitual_pendings": [ 1 ] } == run_line(three_striker_line, RecordRunner())
+
+def test_run_line_clean_record():
+    '''A defendant with no convictions or pendings is level 1 and not habitual.'''
+    result = run_line('{"first": "Jane", "last": "Roe", "birthdate": "1990-05-05"}', RecordRunner())
+    assert None == result["id"]
+    assert (0, 1, False, None, []) == (result["felony_points"], result["felony_level"], result["hab_eligible"],
+                                        result["date_eligible"], result["habitual_pendings"])
+
+@pytest.mark.parametrize("line", [ "not json", "[1, 2]", '{"first": "Jane", "last": "Roe", "birthdate": 1990}',
+    '{"first": "Jane", "last": "Roe", "birthdate": "1990-05-05", "convictions": {}}',
+    '{"first": "Jane", "last": "Roe", "birthdate": "1990-05-05", "convictions": [{"crime": "PSG"}]}' ])
+def test_run_line_errors(line):
+    '''A bad line raises a ValueError.'''
+    with pytest.raises(ValueError):
+        run_line(line, RecordRunner())
+
+@pytest.mark.parametrize("crime_class", [ "Class H Felony", "Class 1 Misdemeanor" ])
+def test_conviction_without_date(three_striker_line, crime_class):
+    '''A conviction with a null conviction date is a bad line, and the run goes on past it.'''
+    record = json.loads(three_striker_line)
+    record["convictions"].append(charge(crime_class, "2016-01-01", None))
+    bad = json.dumps(record)
+    with pytest.raises(ValueError, match=r"convictions\[4\]\.conviction_date"):
+        run_line(bad, RecordRunner())
+    output = io.StringIO()
+    assert 2 == run_jsonl(io.StringIO(bad + "\n" + three_striker_line + "\n"), output)
+    results = [ json.loads(line) for line in output.getvalue().splitlines() ]
+    assert 1 == results[0]["line"]
+    assert "error" in results[0]
+    assert 8 == results[1]["felony_points"]
+
+def test_run_jsonl(three_striker_line):
+    '''Each input line gives an output line in the same place, errors included, written in batches.'''
+    class Output(io.StringIO):
+        flushes = 0
+        def flush(self):
+            self.flushes += 1
+    lines = io.StringIO("\n".join([ three_striker_line, "", '{"id": "x", "first": "Jane"}', three_striker_line ]) + "\n")
+    output = Output()
+    assert 3 == run_jsonl(lines, output, batch_size=2)
+    results = [ json.loads(line) for line in output.getvalue().splitlines() ]
+    assert [ 17, "x", 17 ] == [ result["id"] for result in results ]
+    assert 3 == results[1]["line"]
+    assert "error" in results[1]
+    assert results[0] == results[2]
+    assert 2 == output.flushes
+
+def test_run_jsonl_batch_size():
+    '''The batch_size must be a positive int.'''
+    with pytest.raises(ValueError):
+        run_jsonl([], io.StringIO(), batch_size=0)
+
+def test_main(three_striker_line, tmp_path):
+    '''main reads and writes the files it is given.'''
+    source, target = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    source.write_text(three_striker_line + "\n")
+    main([ str(source), str(target), "--batch-size", "10" ])
+    assert True == json.loads(target.read_text())["hab_eligible"]
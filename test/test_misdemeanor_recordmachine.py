@@ -4,6 +4,8 @@ from src.defendant import Defendant
 import pytest
 from datetime import date, datetime, timedelta
 import typing
+import random
+from test.random_records import random_record
 
 @pytest.fixture
 def level1_record():
@@ -171,3 +173,41 @@ def test_level3_fivepoint(level3_fivepoint):
     assert 5 == machine.points 
     assert 3 == machine.level
     assert FinishedState == type(machine.state)
+
+def test_level_dates(level3_fivepoint):
+    '''The machine should report the dates the record reached level 2 and level 3, whatever order the convictions come in.'''
+    machine = MisdemeanorRecordMachine()
+    machine.on_event(list(reversed(level3_fivepoint)))
+    assert 5 == machine.points
+    assert date(2015,1, 1) == machine.level2_date
+    assert date(2017,1, 2) == machine.level3_date
+    assert 5 == len(machine.convictions)        # the infraction does not qualify
+
+def test_level_dates_not_reached(level2_fourpoint, level1_justinfractions):
+    '''A level 2 record has no level 3 date, and a level 1 record has neither.'''
+    machine = MisdemeanorRecordMachine()
+    machine.on_event(level2_fourpoint)
+    assert date(2015,1, 1) == machine.level2_date
+    assert None == machine.level3_date
+    machine = MisdemeanorRecordMachine()
+    machine.on_event(tuple(level1_justinfractions))
+    assert None == machine.level2_date
+    assert None == machine.level3_date
+    assert [] == machine.convictions
+    with pytest.raises(Exception) as exc_info:
+        MisdemeanorRecordMachine().level2_date
+    assert "The level 2 date cannot be determined until the on_event() method has run with the record." in str(exc_info.__dict__)
+
+def test_engine_matches_state_chain():
+    '''The one-pass engine should agree with the grouping state chain on random records.'''
+    rng = random.Random(10)
+    for i in range(300):
+        record = random_record(rng, rng.randrange(0, 40))
+        machine = MisdemeanorRecordMachine()
+        machine.on_event(record)
+        finished = StartState().on_event(record, 0)
+        assert (finished.points, finished.level, finished.level2_date, finished.level3_date) == \
+            (machine.points, machine.level, machine.level2_date, machine.level3_date)
+        assert sorted(map(id, finished.convictions)) == sorted(map(id, machine.convictions))
+        dates = sorted({ c.conviction_date for c in machine.convictions })
+        assert (dates[0] if dates else None, dates[4] if len(dates) >= 5 else None) == (machine.level2_date, machine.level3_date)
@@ -0,0 +1,104 @@
+from src.record_cache import RecordCache, CacheStats, fingerprint
+from src.record_kernel import run_record
+from src.run_all_records import RecordRunner
+from src.charge import Charge
+from src.defendant import Defendant
+from test.random_records import random_record
+import pytest
+from datetime import date
+import random
+
+def copies(record):
+    '''This returns new Charge objects with the same values.'''
+    return [ Charge(*charge.key()) for charge in record ]
+
+def test_fingerprint(three_striker):
+    '''The fingerprint depends on the values of the record, not the order or the objects.'''
+    key, order = fingerprint(three_striker, date(1999,1,1))
+    assert key == fingerprint(copies(three_striker)[::-1], date(1999,1,1))[0]
+    assert key != fingerprint(three_striker, date(1999,1,2))[0]
+    assert key != fingerprint(three_striker[:3], date(1999,1,1))[0]
+    assert sorted(order) == [ 0, 1, 2, 3 ]
+
+def test_hits_and_misses(three_striker):
+    '''A record run again (even as other objects in another order) is a hit, with the caller's own charges.'''
+    cache = RecordCache()
+    first = cache.run_record(three_striker, date(1999,1,1))
+    assert run_record(three_striker, date(1999,1,1)) == first
+    again = copies(three_striker)[::-1]
+    second = cache.run_record(again, date(1999,1,1))
+    assert first[:6] == second[:6]
+    assert (again[3], again[2], again[1]) == second.habitual_convictions
+    assert CacheStats(1, 0, 1, 1) == cache.stats
+
+def test_lru_eviction(three_striker):
+    '''The least recently used result is dropped when the cache is full.'''
+    cache = RecordCache(maxsize=2)
+    for birthdate in (date(1999,1,1), date(1999,1,2), date(1999,1,1), date(1999,1,3), date(1999,1,1), date(1999,1,2)):
+        cache.run_record(three_striker, birthdate)
+    assert CacheStats(2, 0, 4, 2) == cache.stats
+
+def test_disk_tier(three_striker, tmp_path):
+    '''Results on disk outlive the cache that stored them.'''
+    path = tmp_path / "results.db"
+    cache = RecordCache(path=path)
+    stored = cache.run_record(three_striker, date(1999,1,1))
+    cache.close()
+    cache = RecordCache(path=path)
+    assert stored == cache.run_record(three_striker, date(1999,1,1))
+    assert stored == cache.run_record(three_striker, date(1999,1,1))
+    assert CacheStats(1, 1, 0, 1) == cache.stats
+    cache.close()
+
+def test_matches_kernel():
+    '''On random records a cached result is the kernel's result for the sorted record.'''
+    rng = random.Random(22)
+    cache = RecordCache(maxsize=50)
+    for i in range(200):
+        record = random_record(rng, rng.randrange(15), start=date(2003, 1, 1))
+        birthdate = date(1984 + rng.randrange(4), 1, 1)
+        key, order = fingerprint(record, birthdate)
+        expected = run_record([ record[i] for i in order ], birthdate)
+        assert expected == cache.run_record(record, birthdate)
+        assert expected[:6] == cache.run_record(copies(record), birthdate)[:6]
+        assert expected[:6] == run_record(record, birthdate)[:6]
+    assert 400 == cache.stats.hits + cache.stats.misses
+    assert 200 <= cache.stats.hits
+
+def test_tied_offense_dates():
+    '''Felonies sharing an offense date give the same result with or without the cache, in any order.'''
+    f1 = Charge("B Larceny", "Class H Felony", date(2005,1, 1), date(2005,6, 1), "Randolph County", "14-72")
+    f2 = Charge("A Larceny", "Class H Felony", date(2005,1, 1), date(2007,1, 1), "Randolph County", "14-72")
+    f3 = Charge("PSG", "Class H Felony", date(2006,1, 1), date(2006,6, 1), "Randolph County", "14-72")
+    f4 = Charge("PSG", "Class H Felony", date(2006,7, 1), date(2006,12, 1), "Randolph County", "14-72")
+    defendant = Defendant("John", "Doe", date(1980, 1, 1))
+    for record in ([ f1, f2, f3, f4 ], [ f2, f1, f3, f4 ]):
+        uncached = RecordRunner().run(defendant, record)
+        assert (True, date(2006,12, 1)) == (uncached.hab_eligible, uncached.date_eligible)
+        assert (f1, f3, f4) == uncached.habitual_convictions
+        assert uncached == RecordRunner(cache=RecordCache()).run(defendant, record)
+    rng = random.Random(222)
+    cache = RecordCache()
+    for i in range(200):
+        record = random_record(rng, rng.randrange(15), start=date(2003, 1, 1))
+        shuffled = list(record)
+        rng.shuffle(shuffled)
+        expected = run_record(record, date(1984, 1, 1))[:6]
+        assert expected == run_record(shuffled, date(1984, 1, 1))[:6]
+        assert expected == cache.run_record(shuffled, date(1984, 1, 1))[:6]
+
+def test_validation():
+    '''The maxsize must be a positive int, and the birthdate a date.'''
+    with pytest.raises(ValueError):
+        RecordCache(maxsize=0)
+    with pytest.raises(ValueError):
+        RecordCache().run_record([], "1/1/99")
+
+def test_record_runner_cache(three_striker):
+    '''RecordRunner answers from its cache and gives the same report as without one.'''
+    defendant = Defendant("John", "Doe", date(1999, 1, 1))
+    pending = Charge("PSG", "Class H Felony", date(2019,1, 2), None, "Randolph County", "14-72")
+    runner = RecordRunner(cache=RecordCache())
+    for i in range(3):
+        assert RecordRunner().run(defendant, three_striker, [ pending ]) == runner.run(defendant, three_striker, [ pending ])
+    assert CacheStats(2, 0, 1, 1) == runner.cache.stats
@@ -0,0 +1,128 @@
+from src.record_kernel import RecordResult, run_record
+from src.misdemeanor_recordmachine import MisdemeanorRecordMachine, misdemeanor_record, StartState as MisdemeanorStart
+from src.felony_record_statemachine import Felony_RecordMachine, felony_record, StartState as FelonyStart
+from src.habitual_machine import HabitualMachine, EarliestChainMachine, habitual_record
+from src.record_timeline import RecordTimeline
+from concurrent.futures import ThreadPoolExecutor
+from src.charge import Charge
+from test.random_records import random_record
+import pytest
+from datetime import date
+import random
+
+def test_run_record(three_striker):
+    '''This is a basic test of the fused kernel on a three-strike record.'''
+    result = run_record(reversed(three_striker), date(1999,1,1))
+    assert RecordResult == type(result)
+    assert 3 == result.misdemeanor_points
+    assert 2 == result.misdemeanor_level
+    assert 8 == result.felony_points
+    assert 3 == result.felony_level
+    assert True == result.hab_eligible
+    assert date(2018,1, 3) == result.date_eligible
+    assert tuple(three_striker[:3]) == result.habitual_convictions
+
+def test_run_record_empty():
+    '''A clean record is level 1 for both and not habitual eligible.'''
+    assert RecordResult(0, 1, 0, 1, False, None, ()) == run_record((), date(1999,1,1))
+
+def test_run_record_bad_birthdate(three_striker):
+    '''The birthdate is validated like the habitual machine's.'''
+    with pytest.raises(ValueError):
+        run_record(three_striker, "1/1/99")
+
+@pytest.mark.parametrize("crime_class", [ "Class H Felony", "Class 1 Misdemeanor", "Class 3 Misdemeanor", "Infraction" ])
+def test_unconvicted_charge_is_rejected(three_striker, crime_class):
+    '''A charge with no conviction date raises a ValueError from every engine, whatever its class.'''
+    record = three_striker + [ Charge("PSG", crime_class, date(2016,1, 1), None, "Randolph County", "14-72") ]
+    engines = [ lambda: run_record(record, date(1999,1,1)), lambda: felony_record(record),
+                lambda: misdemeanor_record(record), lambda: habitual_record(record, date(1999,1,1)),
+                lambda: Felony_RecordMachine().on_event(record), lambda: MisdemeanorRecordMachine().on_event(record),
+                lambda: HabitualMachine().on_event(record, date(1999,1,1)), lambda: RecordTimeline(record) ]
+    for engine in engines:
+        with pytest.raises(ValueError):
+            engine()
+
+def test_run_record_matches_machines():
+    '''On random records the kernel gives the same results as the three record machines.'''
+    rng = random.Random(16)
+    for i in range(400):
+        record = tuple(random_record(rng, rng.randrange(0, 25), start=date(2003, 1, 1)))
+        birthdate = date(1984 + rng.randrange(6), rng.randrange(1, 13), 1)
+        misdemeanor, felony, habitual = MisdemeanorRecordMachine(), Felony_RecordMachine(), HabitualMachine()
+        misdemeanor.on_event(record)
+        felony.on_event(record)
+        habitual.on_event(record, birthdate)
+        result = run_record(record, birthdate)
+        assert misdemeanor.points == result.misdemeanor_points
+        assert misdemeanor.level == result.misdemeanor_level
+        assert felony.points == result.felony_points
+        assert felony.level == result.felony_level
+        assert habitual.hab_eligible == result.hab_eligible
+        assert habitual.date_eligible == result.date_eligible
+        assert tuple(habitual.dumbwaiter.habitual_convictions) == result.habitual_convictions
+
+def test_shared_machines_in_threads():
+    '''One instance of each machine, and the engine functions, serve many records at once from a thread pool.'''
+    rng = random.Random(25)
+    cases = [ (tuple(random_record(rng, rng.randrange(25), start=date(2003, 1, 1))), date(1984 + rng.randrange(6), 1, 1)) for i in range(200) ]
+    misdemeanor, felony, habitual = MisdemeanorRecordMachine(), Felony_RecordMachine(), HabitualMachine()
+    def run(case):
+        record, birthdate = case
+        return (misdemeanor.on_event(record), felony.on_event(record), habitual.on_event(record, birthdate),
+                misdemeanor_record(record), felony_record(record), habitual_record(record, birthdate), run_record(record, birthdate))
+    expected = [ (misdemeanor_record(record), felony_record(record), habitual_record(record, birthdate)) for record, birthdate in cases ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(run, cases))
+    for (misdemeanors, felonies, habituals), result in zip(expected, results):
+        assert (misdemeanors, felonies, habituals) * 2 == result[:6]
+        assert (misdemeanors.points, felonies.points, habituals.date_eligible) == (result[6].misdemeanor_points, result[6].felony_points, result[6].date_eligible)
+
+BIRTHDATE = date(1984, 1, 1)
+
+# machine type, how to run it on a record, the engine giving the same result, and the state chain's points (or None)
+MACHINES = {
+    "felony": (Felony_RecordMachine, lambda machine, record: machine.on_event(record), felony_record,
+               lambda record: FelonyStart().on_event(record, 0).points),
+    "misdemeanor": (MisdemeanorRecordMachine, lambda machine, record: machine.on_event(record), misdemeanor_record,
+                    lambda record: MisdemeanorStart().on_event(record, 0).points),
+    "habitual": (HabitualMachine, lambda machine, record: machine.on_event(record, BIRTHDATE),
+                 lambda record: habitual_record(record, BIRTHDATE), None),
+    "earliest chain": (EarliestChainMachine, lambda machine, record: machine.on_event(record, BIRTHDATE),
+                       lambda record: EarliestChainMachine().on_event(record, BIRTHDATE), None) }
+
+@pytest.mark.parametrize("name", MACHINES)
+def test_machine_reuse(name):
+    '''One machine runs record after record: each on_event starts over and returns the result of that record, as its engine does.'''
+    machine_type, run, engine, chain = MACHINES[name]
+    rng = random.Random(25)
+    machine = machine_type()
+    records = [ random_record(rng, rng.randrange(12), start=date(2004, 1, 1)) for i in range(50) ]
+    first = run(machine, records[0])
+    for record in records:
+        assert engine(record) == run(machine, record)
+        if chain is not None:
+            assert chain(tuple(record)) == run(machine, record).points
+    assert first == run(machine, records[0])
+
+@pytest.mark.parametrize("name", MACHINES)
+def test_machine_does_not_mutate_record(name):
+    '''A machine takes a shared, read-only record (a tuple works) and leaves a list record as it was.'''
+    machine_type, run, engine, chain = MACHINES[name]
+    rng = random.Random(15)
+    for i in range(50):
+        record = random_record(rng, 10, start=date(2004, 1, 1))
+        before = list(record)
+        from_list = run(machine_type(), record)
+        assert before == record
+        assert from_list == run(machine_type(), tuple(record))
+        if chain is not None:
+            chain(record)
+            assert before == record
+
+@pytest.mark.parametrize("engine", [ felony_record, misdemeanor_record ])
+@pytest.mark.parametrize("convictions", [ None, "not a record", 7 ])
+def test_engine_needs_a_sequence(engine, convictions):
+    '''The engine functions raise a ValueError for anything but a sequence of convictions.'''
+    with pytest.raises(ValueError):
+        engine(convictions)
@@ -0,0 +1,70 @@
+from src.record_store import RecordStore, StoredRecord
+from src.run_all_records import RecordRunner
+from src.charge import Charge
+from src.defendant import Defendant
+from test.random_records import random_record
+import pytest
+from datetime import date
+import random
+
+@pytest.fixture
+def stored_striker(three_striker, pendings):
+    '''This is a (defendant, convictions, pendings) record with three strikes and two pending charges.'''
+    return Defendant("John", "Doe", date(1999, 1, 1)), three_striker, pendings
+
+def test_round_trip(stored_striker):
+    '''A stored record comes back with the same values, ready to run.'''
+    with RecordStore() as store:
+        defendant_id = store.add_record(*stored_striker)
+        assert 1 == len(store)
+        stored = store.record(defendant_id)
+    defendant, convictions, pendings = stored_striker
+    assert StoredRecord == type(stored)
+    assert defendant_id == stored.defendant_id
+    assert (defendant.first, defendant.last, defendant.birthdate) == (stored.defendant.first, stored.defendant.last, stored.defendant.birthdate)
+    assert [ c.key() for c in convictions ] == [ c.key() for c in stored.convictions ]
+    assert [ p.key() for p in pendings ] == [ p.key() for p in stored.pendings ]
+    report = RecordRunner().run(*stored[1:])
+    assert True == report.hab_eligible
+    assert date(2018,1, 3) == report.date_eligible
+
+def test_missing_defendant():
+    '''A defendant not in the store is None, or skipped.'''
+    with RecordStore() as store:
+        assert None == store.record(5)
+        assert [] == list(store.records([ 5, 6 ]))
+
+def test_bulk_records(tmp_path):
+    '''Many records go in in one transaction and stream back in id order, or in the order asked for, from a saved store.'''
+    rng = random.Random(21)
+    records = [ (Defendant("John", f"Doe{i}", date(1985, 1, 1)), random_record(rng, rng.randrange(6)), []) for i in range(40) ]
+    path = tmp_path / "records.db"
+    with RecordStore(path) as store:
+        ids = store.add_records(records)
+    with RecordStore(path) as store:
+        assert 40 == len(store)
+        stored = list(store.records())
+        assert ids == [ record.defendant_id for record in stored ]
+        assert [ [ c.key() for c in record[1] ] for record in records ] == [ [ c.key() for c in record.convictions ] for record in stored ]
+        wanted = [ ids[30], ids[2], ids[17] ]
+        assert wanted == [ record.defendant_id for record in store.records(wanted, batch_size=2) ]
+
+def test_add_records_is_one_transaction(stored_striker):
+    '''If any record is invalid, none of them are stored.'''
+    with RecordStore() as store:
+        with pytest.raises(ValueError):
+            store.add_records([ stored_striker, ("John Doe", [], []) ])
+        assert 0 == len(store)
+
+def test_indexed_queries(stored_striker):
+    '''The defendants can be found by conviction date and by crime class.'''
+    with RecordStore() as store:
+        first = store.add_record(*stored_striker)
+        second = store.add_record(Defendant("Jane", "Roe", date(1990, 5, 5)),
+            [ Charge("Larceny", "Class 1 Misdemeanor", date(2017,1, 1), date(2017,3, 1), "Guilford County", "14-72") ])
+        assert [ first, second ] == store.convicted_between(date(2017,3, 1), date(2017,3, 2))
+        assert [ first ] == store.convicted_between(date(2018,1, 1), date(2019,1, 1))
+        assert [ first ] == store.charged_with_class("Class E Felony")
+        assert [ first, second ] == store.charged_with_class("Class 1 Misdemeanor")
+        assert [ first ] == store.charged_with_class("Class H Felony")
+        assert [] == store.convicted_between(date(2019,1, 1), date(2030,1, 1))    # a pending charge has no conviction date
@@ -0,0 +1,58 @@
+from src.record_timeline import RecordTimeline, RecordAsOf
+from src.felony_record_statemachine import Felony_RecordMachine
+from src.misdemeanor_recordmachine import MisdemeanorRecordMachine
+from src.charge import Charge
+from test.random_records import random_record
+import pytest
+from datetime import date, timedelta
+import random
+
+@pytest.fixture
+def record():
+    '''This is a record reaching felony level 2 on 2015-02-02 and level 3 on 2018-01-03.'''
+    con1 = Charge("PSG", "Class H Felony", date(2014,1, 1), date(2015,2, 2), "Randolph County", "14-72")
+    con2 = Charge("Speeding", "Infraction", date(2016,1, 1), date(2016,3, 1), "Randolph County", "20-141")
+    con3 = Charge("Larceny", "Class 1 Misdemeanor", date(2017,2, 1), date(2017,3, 1), "Randolph County", "14-72")
+    con4 = Charge("PSG", "Class C Felony", date(2017,4, 1), date(2018,1, 3), "Randolph County", "14-72")
+    con5 = Charge("PSG", "Class E Felony", date(2017,4, 1), date(2018,1, 3), "Randolph County", "14-72")
+    return [ con5, con4, con3, con2, con1 ]
+
+def test_as_of(record):
+    '''The record as of a date counts only the convictions dated before it.'''
+    timeline = RecordTimeline(record)
+    assert RecordAsOf(0, 1, 0, 1) == timeline.as_of(date(2015,2, 2))
+    assert RecordAsOf(2, 2, 1, 2) == timeline.as_of(date(2015,2, 3))
+    assert RecordAsOf(3, 2, 2, 2) == timeline.as_of(date(2018,1, 3))
+    assert RecordAsOf(9, 3, 3, 2) == timeline.as_of(date(2030,1, 1))
+    assert [ date(2015,2, 2), date(2017,3, 1), date(2018,1, 3) ] == timeline.conviction_dates
+
+def test_level_dates(record):
+    '''Each level reached has the date it was first reached; a skipped level shares the date of the next.'''
+    timeline = RecordTimeline(record + [ Charge("Murder", "Class A Felony", date(2018,5, 1), date(2019,1, 1), "Randolph County", "14-17") ])
+    assert { 1: None, 2: date(2015,2, 2), 3: date(2018,1, 3), 4: date(2019,1, 1), 5: date(2019,1, 1), 6: date(2019,1, 1) } == timeline.felony_level_dates
+    assert { 1: None, 2: date(2015,2, 2) } == timeline.misdemeanor_level_dates
+    assert { 1: None } == RecordTimeline([]).felony_level_dates
+
+def test_as_of_each(record):
+    '''Many dates or pending charges are answered at once.'''
+    timeline = RecordTimeline(record)
+    pending = Charge("PSG", "Class H Felony", date(2017,3, 2), None, "Randolph County", "14-72")
+    assert [ timeline.as_of(date(2017,3, 2)), timeline.as_of(date(2000,1, 1)) ] == timeline.as_of_each([ pending, date(2000,1, 1) ])
+    with pytest.raises(ValueError):
+        timeline.as_of("2017-03-02")
+
+def test_matches_machines():
+    '''On random records, the record as of a date matches the machines run over the convictions before it.'''
+    rng = random.Random(24)
+    for i in range(60):
+        record = random_record(rng, rng.randrange(25))
+        timeline = RecordTimeline(record)
+        for day in [ date(2000,1, 1) + timedelta(days=rng.randrange(8500)) for j in range(5) ]:
+            prior = [ c for c in record if c.conviction_date < day ]
+            felony, misdemeanor = Felony_RecordMachine(), MisdemeanorRecordMachine()
+            felony.on_event(prior)
+            misdemeanor.on_event(prior)
+            assert (felony.points, felony.level, misdemeanor.points, misdemeanor.level) == tuple(timeline.as_of(day))
+        for level, reached in timeline.felony_level_dates.items():
+            if reached is not None:
+                assert timeline.as_of(reached).felony_level < level <= timeline.as_of(reached + timedelta(days=1)).felony_level
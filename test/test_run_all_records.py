@@ -0,0 +1,48 @@
+from src.run_all_records import RecordRunner, RecordReport, Runner
+from src.defendant import Defendant
+import src.run_all_records as run_all_records
+import pytest
+from datetime import date
+
+@pytest.fixture
+def defendant1():
+    '''This is a test defendant.'''
+    return Defendant("John", "Doe", date(1999, 1, 1))
+
+def test_record_runner(defendant1, three_striker, pendings, capsys):
+    '''RecordRunner returns the report without printing anything.'''
+    report = RecordRunner().run(defendant1, three_striker, pendings)
+    assert RecordReport == type(report)
+    assert defendant1 is report.defendant
+    assert tuple(three_striker) == report.convictions
+    assert tuple(pendings) == report.pendings
+    assert 3 == report.misdemeanor_points
+    assert 2 == report.misdemeanor_level
+    assert 8 == report.felony_points
+    assert 3 == report.felony_level
+    assert True == report.hab_eligible
+    assert date(2018,1, 3) == report.date_eligible
+    assert tuple(three_striker[:3]) == report.habitual_convictions
+    assert (pendings[1],) == report.habitual_pendings
+    assert ("", "") == tuple(capsys.readouterr())
+
+def test_record_runner_clean_record(defendant1, pendings):
+    '''A clean record has no habitual pendings.'''
+    report = RecordRunner().run(defendant1, [], pendings)
+    assert (0, 1, 0, 1, False, None, (), ()) == report[3:]
+
+def test_runner_wraps_record_runner(defendant1, three_striker, pendings, monkeypatch, capsys):
+    '''Runner prompts for the record with the makers and prints the RecordRunner report.'''
+    class Made:
+        def __init__(self, **attributes):
+            self.__dict__.update(attributes)
+    monkeypatch.setattr(run_all_records, "DefendantMaker", lambda: Made(_defendant=defendant1))
+    monkeypatch.setattr(run_all_records, "RecordMaker", lambda: Made(_convictions=three_striker))
+    monkeypatch.setattr(run_all_records, "PendingMaker", lambda: Made(_pendings=pendings))
+    runner = Runner()
+    assert RecordRunner().run(defendant1, three_striker, pendings) == runner.report
+    assert True == runner.is_habitual
+    assert 8 == runner.felonypoints
+    printed = capsys.readouterr().out
+    assert "John Doe, born 1999-01-01:" in printed
+    assert "Habitual Eligible as of:\t2018-01-03" in printed
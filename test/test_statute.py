@@ -0,0 +1,54 @@
+from src.statute import Statute, parse_statute, FELONY_RECORD_EXCLUDED, HABITUAL_EXCLUDED, STATUTE_CACHE_SIZE
+from src.charge import Charge
+from datetime import date
+
+def test_parse():
+    '''This tests parsing the chapter, section, and subsection from statute text.'''
+    statute = parse_statute("NCGS 20-141.4(a2)")
+    assert "NCGS 20-141.4(a2)" == statute.text
+    assert "20" == statute.chapter
+    assert "141.4" == statute.section
+    assert "(a2)" == statute.subsection
+    statute = parse_statute("15A-1340.14")
+    assert ("15A", "1340.14", "") == (statute.chapter, statute.section, statute.subsection)
+    statute = parse_statute("90-95(d)(2)")
+    assert ("90", "95", "(d)(2)") == (statute.chapter, statute.section, statute.subsection)
+    assert "90-95(d)(2)" == str(statute)
+
+def test_unparseable():
+    '''Text without a citation should parse to an unclassified statute rather than raise.'''
+    statute = parse_statute("aaaaaaaaaa")
+    assert None == statute.chapter
+    assert None == statute.section
+    assert 0 == statute.flags
+
+def test_cached():
+    '''Text parsed recently should return the same Statute, and the cache should be bounded.'''
+    assert parse_statute("14-72") is parse_statute("14-72")
+    assert parse_statute("14-72") is not Statute("14-72")
+    assert STATUTE_CACHE_SIZE == parse_statute.cache_info().maxsize
+
+def test_felony_record_exclusions():
+    '''Chapter 20 is excluded from felony records except 20-141.4, 20-138.1, and 20-138.2.'''
+    assert parse_statute("20-28(a1)").excluded_from_felony_record
+    assert parse_statute("NCGS 20-141").excluded_from_felony_record
+    assert FELONY_RECORD_EXCLUDED == parse_statute("20-28").flags
+    for text in ("20-141.4(a2)", "20-138.1", "20-138.2", "14-72", "90-95(d)(2)"):
+        assert not parse_statute(text).excluded_from_felony_record
+    assert not parse_statute("14-120-1").excluded_from_felony_record     # "20-" is only a substring here
+
+def test_habitual_exclusions():
+    '''Habitual B&E (14-7.31) and habitual misdemeanor assault (14-33.2) are excluded from habitual analysis.'''
+    assert parse_statute("14-7.31").excluded_from_habitual
+    assert HABITUAL_EXCLUDED == parse_statute("NCGS 14-33.2").flags
+    assert not parse_statute("14-33").excluded_from_habitual
+    assert not parse_statute("14-7.3").excluded_from_habitual
+
+def test_charge_statute():
+    '''A Charge parses its statute when it is set and reports its felony record points.'''
+    charge = Charge("DWLR/I", "Class 1 Misdemeanor", date(2009,1, 1), date(2015,4, 4), "Randolph County", "20-28(a1)")
+    assert parse_statute("20-28(a1)") is charge.parsed_statute
+    assert 0 == charge.felony_record_points
+    charge.statute = "20-138.1"
+    assert "138.1" == charge.parsed_statute.section
+    assert 1 == charge.felony_record_points